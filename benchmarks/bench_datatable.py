@@ -0,0 +1,232 @@
+"""
+Benchmarks of the DataTable hot paths, in asv's format: setup builds the
+inputs for each combination of params, time_* methods are timed and
+peakmem_* methods have their peak memory measured. They run with asv or
+with the offline runner in benchmarks/run.py.
+"""
+import numpy as np
+
+import tisch
+
+from .common import COLS, ROWS, SCHEMAS, check_size, make_data, make_table
+
+
+class Constructor:
+    params = [ROWS, COLS, SCHEMAS]
+    param_names = ['rows', 'cols', 'schema']
+
+    def setup(self, rows, cols, schema):
+        check_size(rows)
+        self.data = make_data(rows, cols, schema)
+
+    def time_constructor(self, rows, cols, schema):
+        tisch.DataTable(self.data)
+
+    def time_constructor_no_categorical(self, rows, cols, schema):
+        tisch.DataTable(self.data, categorical = False)
+
+    def peakmem_constructor(self, rows, cols, schema):
+        tisch.DataTable(self.data)
+
+
+class GetItem:
+    params = [ROWS, SCHEMAS]
+    param_names = ['rows', 'schema']
+
+    def setup(self, rows, schema):
+        self.df = make_table(rows, 10, schema)
+        self.mask = tisch.DataTable({'mask': np.arange(rows) % 3 == 0})
+        self.rows = list(range(0, rows, 7))
+        self.positions = np.arange(0, rows, 7)
+
+    def time_column(self, rows, schema):
+        self.df['c0']
+
+    def time_column_list(self, rows, schema):
+        self.df[['c0', 'c3', 'c5']]
+
+    def time_boolean(self, rows, schema):
+        self.df[self.mask]
+
+    def time_tuple_slice(self, rows, schema):
+        self.df[10:rows // 2, 'c1':'c4']
+
+    def time_tuple_list(self, rows, schema):
+        self.df[self.rows, ['c0', 'c2']]
+
+    def time_tuple_array(self, rows, schema):
+        self.df[self.positions, :]
+
+    def time_tuple_boolean(self, rows, schema):
+        self.df[self.mask, ['c0', 'c1']]
+
+
+class Aggregations:
+    params = [ROWS, COLS, SCHEMAS]
+    param_names = ['rows', 'cols', 'schema']
+
+    def setup(self, rows, cols, schema):
+        self.df = make_table(rows, cols, schema)
+
+    def _fresh(self):
+        # A new DataTable over the same arrays, so the statistics cache is empty
+        return tisch.DataTable._new(dict(self.df._data), self.df._categories,
+                                    self.df._validity)
+
+    def time_sum(self, rows, cols, schema):
+        self.df.sum()
+
+    def time_mean(self, rows, cols, schema):
+        self.df.mean()
+
+    def time_std(self, rows, cols, schema):
+        self.df.std()
+
+    def time_min_uncached(self, rows, cols, schema):
+        self._fresh().min()
+
+    def time_max_cached(self, rows, cols, schema):
+        self.df.max()
+
+    def time_isna(self, rows, cols, schema):
+        self.df.isna()
+
+    def time_count(self, rows, cols, schema):
+        self._fresh().count()
+
+    def peakmem_sum(self, rows, cols, schema):
+        self.df.sum()
+
+
+class Counting:
+    params = [ROWS, SCHEMAS]
+    param_names = ['rows', 'schema']
+
+    def setup(self, rows, schema):
+        self.df = make_table(rows, 4, schema)
+        self.plain = make_table(rows, 4, schema, categorical = False)
+
+    def time_val_counts(self, rows, schema):
+        self.df.val_counts()
+
+    def time_val_counts_not_categorical(self, rows, schema):
+        self.plain.val_counts()
+
+    def time_unique(self, rows, schema):
+        self.df.unique()
+
+    def time_nunique(self, rows, schema):
+        tisch.DataTable._new(dict(self.df._data), self.df._categories).nunique()
+
+    def peakmem_val_counts(self, rows, schema):
+        self.plain.val_counts()
+
+
+class Sorting:
+    params = [ROWS, SCHEMAS]
+    param_names = ['rows', 'schema']
+
+    def setup(self, rows, schema):
+        self.df = make_table(rows, 4, schema)
+
+    def time_sort_single(self, rows, schema):
+        self.df.sort_vals('c1')
+
+    def time_sort_descending(self, rows, schema):
+        self.df.sort_vals('c1', ascending = False)
+
+    def time_sort_multi(self, rows, schema):
+        self.df.sort_vals(['c2', 'c1'], ascending = [True, False])
+
+    def time_argsort(self, rows, schema):
+        self.df.argsort_vals('c0')
+
+    def time_nlargest(self, rows, schema):
+        self.df.nlargest(100, 'c0')
+
+    def peakmem_sort_single(self, rows, schema):
+        self.df.sort_vals('c1')
+
+
+class Processes:
+    params = [ROWS, [1, 4]]
+    param_names = ['rows', 'processes']
+
+    def setup(self, rows, processes):
+        self.df = make_table(rows, 2, 'numeric')
+        # Strings with many distinct values, which stay object columns
+        rng = np.random.RandomState(0)
+        ids = np.array([f"id{i}" for i in rng.randint(0, rows, rows)], dtype = 'object')
+        self.strings = tisch.DataTable({'s': ids, 'n': np.arange(rows)}, categorical = False)
+
+    def _options(self, processes):
+        return tisch.option_context(processes = processes, parallel_min_size = 10 ** 5)
+
+    def time_sort(self, rows, processes):
+        with self._options(processes):
+            self.df.sort_vals('c0')
+
+    def time_val_counts(self, rows, processes):
+        with self._options(processes):
+            self.df.val_counts()
+
+    def time_sort_strings(self, rows, processes):
+        with self._options(processes):
+            self.strings.sort_vals('s')
+
+    def time_groupby_strings(self, rows, processes):
+        with self._options(processes):
+            self.strings.groupby('s').agg('sum')
+
+    def time_val_counts_strings(self, rows, processes):
+        with self._options(processes):
+            self.strings['s'].val_counts()
+
+
+class Sample:
+    params = [ROWS]
+    param_names = ['rows']
+
+    def setup(self, rows):
+        self.df = make_table(rows, 10, 'mixed')
+
+    def time_sample_fraction(self, rows):
+        self.df.sample(fraction = 0.1, seed = 1)
+
+    def time_sample_replace(self, rows):
+        self.df.sample(n = rows // 10, replace = True, seed = 1)
+
+
+class Repr:
+    params = [ROWS, SCHEMAS]
+    param_names = ['rows', 'schema']
+
+    def setup(self, rows, schema):
+        self.df = make_table(rows, 10, schema)
+
+    def time_repr_html(self, rows, schema):
+        self.df._repr_html_()
+
+
+class Arithmetic:
+    params = [ROWS, COLS]
+    param_names = ['rows', 'cols']
+
+    def setup(self, rows, cols):
+        self.df = make_table(rows, cols, 'numeric')
+        self.other = self.df['c0']
+
+    def time_add_scalar(self, rows, cols):
+        self.df + 1
+
+    def time_mul_column(self, rows, cols):
+        self.df * self.other
+
+    def time_compare(self, rows, cols):
+        self.df > 0
+
+    def time_round(self, rows, cols):
+        self.df.round(2)
+
+    def peakmem_add_scalar(self, rows, cols):
+        self.df + 1
@@ -0,0 +1,58 @@
+"""
+Data generators shared by the benchmarks.
+
+Row counts go from 1e3 to 1e8. Sizes above TISCH_BENCH_MAX_ROWS (1e6 by
+default) are skipped, by raising NotImplementedError in setup as asv
+expects, so that a default run fits on a laptop.
+"""
+import os
+
+import numpy as np
+
+import tisch
+
+ROWS = [10 ** 3, 10 ** 5, 10 ** 6, 10 ** 7, 10 ** 8]
+COLS = [1, 10]
+SCHEMAS = ['numeric', 'string', 'mixed']
+
+WORDS = np.array(['alpha', 'beta', 'gamma', 'delta', 'epsilon', 'zeta', 'eta', 'theta'],
+                 dtype = 'object')
+
+def max_rows():
+    return int(float(os.environ.get('TISCH_BENCH_MAX_ROWS', 10 ** 6)))
+
+def check_size(rows):
+    if rows > max_rows():
+        raise NotImplementedError(f"{rows} rows is above TISCH_BENCH_MAX_ROWS")
+
+def make_column(kind, rows, rng):
+    if kind == 'float':
+        values = rng.standard_normal(rows)
+        values[::97] = np.nan
+        return values
+    if kind == 'int':
+        return rng.randint(0, 1000, rows)
+    if kind == 'bool':
+        return rng.rand(rows) > 0.5
+    # Strings with few distinct values, plus some missing ones
+    values = WORDS[rng.randint(0, len(WORDS), rows)]
+    values[::101] = None
+    return values
+
+def make_data(rows, cols, schema, seed = 0):
+    """
+    A dict of cols columns of the given schema: 'numeric' alternates float
+    and int columns, 'string' holds string columns only, and 'mixed'
+    cycles through float, int, string and bool columns
+    """
+    rng = np.random.RandomState(seed)
+    kinds = {
+        'numeric': ['float', 'int'],
+        'string': ['string'],
+        'mixed': ['float', 'int', 'string', 'bool']
+    }[schema]
+    return {f"c{i}": make_column(kinds[i % len(kinds)], rows, rng) for i in range(cols)}
+
+def make_table(rows, cols, schema, seed = 0, categorical = 'auto'):
+    check_size(rows)
+    return tisch.DataTable(make_data(rows, cols, schema, seed), categorical = categorical)
@@ -0,0 +1,165 @@
+"""
+Offline runner for the benchmarks, for machines without asv.
+
+Every time_* benchmark is timed (best of several repeats) and has the
+peak memory of one extra call measured with tracemalloc, which NumPy
+reports its array allocations to. Results can be saved as a baseline and
+later runs compared against it.
+
+Usage:
+------
+python -m benchmarks.run                              run everything up to 1e6 rows
+python -m benchmarks.run --max-rows 1e8 -b Sorting    include larger sizes, one suite
+python -m benchmarks.run --save benchmarks/baseline.json
+python -m benchmarks.run --compare benchmarks/baseline.json --threshold 1.2
+"""
+import argparse
+import inspect
+import itertools
+import json
+import os
+import re
+import sys
+import timeit
+import tracemalloc
+
+from . import bench_datatable
+
+MODULES = [bench_datatable]
+
+def discover(pattern):
+    """
+    Yields (suite name, class) for every benchmark class whose name
+    matches the regular expression pattern
+    """
+    for module in MODULES:
+        for name, cls in inspect.getmembers(module, inspect.isclass):
+            if cls.__module__ == module.__name__ and re.search(pattern, name):
+                yield name, cls
+
+def peak_memory(func):
+    """
+    Peak memory traced while calling func once, in bytes
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def measure(func, repeat, min_time):
+    """
+    Best time per call and the peak traced memory of one call
+    """
+    # Calibrate the number of calls per repeat so each takes min_time
+    number = 1
+    while True:
+        elapsed = timeit.timeit(func, number = number)
+        if elapsed >= min_time or number >= 1000:
+            break
+        number *= 10
+    best = min(timeit.repeat(func, number = number, repeat = repeat)) / number
+    return best, peak_memory(func)
+
+def run(pattern, repeat, min_time):
+    results = {}
+    for suite, cls in discover(pattern):
+        params = getattr(cls, 'params', [[]])
+        names = getattr(cls, 'param_names', [])
+        methods = sorted(name for name in dir(cls) if name.startswith(('time_', 'peakmem_')))
+
+        for combo in itertools.product(*params):
+            label = ', '.join(f"{n}={v}" for n, v in zip(names, combo))
+            bench = cls()
+            try:
+                if hasattr(bench, 'setup'):
+                    bench.setup(*combo)
+            except NotImplementedError:
+                continue
+
+            for method in methods:
+                call = lambda: getattr(bench, method)(*combo)
+                key = f"{suite}.{method}({label})"
+                if method.startswith('peakmem_'):
+                    results[key] = {'peak_bytes': peak_memory(call)}
+                else:
+                    seconds, peak = measure(call, repeat, min_time)
+                    results[key] = {'seconds': seconds, 'peak_bytes': peak}
+                report(key, results[key])
+    return results
+
+def format_time(seconds):
+    for unit, scale in (('s', 1), ('ms', 1e-3), ('us', 1e-6)):
+        if seconds >= scale:
+            return f"{seconds / scale:8.2f} {unit}"
+    return f"{seconds / 1e-9:8.2f} ns"
+
+def format_bytes(n):
+    for unit, scale in (('GB', 2 ** 30), ('MB', 2 ** 20), ('KB', 2 ** 10)):
+        if n >= scale:
+            return f"{n / scale:8.2f} {unit}"
+    return f"{n:8d} B "
+
+def report(key, result):
+    time = format_time(result['seconds']) if 'seconds' in result else ' ' * 11
+    print(f"{time}  {format_bytes(result['peak_bytes'])}  {key}", flush = True)
+
+def compare(results, baseline, threshold):
+    """
+    Prints the benchmarks that got slower or use more memory than in the
+    baseline by more than threshold times
+
+    Returns
+    -------
+    The number of regressions
+    """
+    regressions = 0
+    print(f"\nChanges against the baseline (threshold {threshold}x):")
+    for key, result in results.items():
+        if key not in baseline:
+            continue
+        for metric in ('seconds', 'peak_bytes'):
+            old, new = baseline[key].get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            ratio = new / old
+            if ratio > threshold or ratio < 1 / threshold:
+                flag = 'REGRESSION' if ratio > threshold else 'improvement'
+                regressions += ratio > threshold
+                print(f"{ratio:6.2f}x  {metric:10}  {flag:11}  {key}")
+    print(f"{regressions} regression(s)")
+    return regressions
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = __doc__,
+                                     formatter_class = argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('-b', '--bench', default = '.',
+                        help = 'regular expression selecting benchmark classes')
+    parser.add_argument('--max-rows', type = float,
+                        help = 'largest row count to run (default 1e6)')
+    parser.add_argument('--repeat', type = int, default = 5)
+    parser.add_argument('--min-time', type = float, default = 0.05,
+                        help = 'minimum duration of each timing repeat, in seconds')
+    parser.add_argument('--save', help = 'write the results to this JSON file')
+    parser.add_argument('--compare', help = 'JSON file of baseline results to compare with')
+    parser.add_argument('--threshold', type = float, default = 1.2)
+    args = parser.parse_args(argv)
+
+    if args.max_rows is not None:
+        os.environ['TISCH_BENCH_MAX_ROWS'] = str(int(args.max_rows))
+
+    results = run(args.bench, args.repeat, args.min_time)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(results, f, indent = 2, sort_keys = True)
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold):
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -123,3 +123,1190 @@ class TestDataTableSelect:
             _ = df_tisch["a", "b", "c"]
         
 
+
+class TestDataTableCounting:
+    def test_val_counts(self):
+        df = tisch.DataTable({
+            "a": np.array([3, 1, 3, 2, 3, 1]),
+            "b": np.array(['x', 'y', 'x', None, 'x', None], dtype = 'object')
+        })
+        a, b = df.val_counts()
+        assert a._data['a'].tolist() == [3, 1, 2]
+        assert a._data['count'].tolist() == [3, 2, 1]
+        assert b._data['b'].tolist() == ['x', None, 'y']
+        assert b._data['count'].tolist() == [3, 2, 1]
+
+        b = df['b'].val_counts(dropna = True, normalize = True)
+        assert b._data['b'].tolist() == ['x', 'y']
+        assert b._data['count'].tolist() == [0.75, 0.25]
+
+    def test_val_counts_float_nan(self):
+        df = tisch.DataTable({
+            "a": np.array([0.5, np.nan, 0.5, np.nan, np.nan])
+        })
+        counts = df.val_counts()
+        assert np.isnan(counts._data['a'][0])
+        assert counts._data['count'].tolist() == [3, 2]
+        assert df.val_counts(dropna = True)._data['a'].tolist() == [0.5]
+
+    def test_val_counts_unsorted(self):
+        df = tisch.DataTable({"a": np.array([5, 1, 1, 9, 1000000])})
+        counts = df.val_counts(sort = False)
+        assert counts._data['a'].tolist() == [1, 5, 9, 1000000]
+        assert counts._data['count'].tolist() == [2, 1, 1, 1]
+
+    def test_val_counts_int8(self):
+        df = tisch.DataTable({"a": np.arange(-100, 101, dtype = 'int8')})
+        counts = df.val_counts(sort = False)
+        assert counts._data['a'].tolist() == list(range(-100, 101))
+        assert counts._data['count'].tolist() == [1] * 201
+        assert df.nunique()._data['a'][0] == 201
+
+    def test_unique_nunique(self):
+        df = tisch.DataTable({
+            "a": np.array([True, False, True]),
+            "b": np.array(['p', 'q', 'p'])
+        })
+        a, b = df.unique()
+        assert sorted(a._data['a'].tolist()) == [False, True]
+        assert sorted(b._data['b'].tolist()) == ['p', 'q']
+        assert df.nunique()._data['b'].tolist() == [2]
+
+    def test_array_counter(self):
+        counter = tisch.ArrayCounter(np.array([1, 2, 2]))
+        assert counter[2] == 2
+        assert counter[7] == 0
+
+class TestDataTableGroupBy:
+    df = tisch.DataTable({
+        "k1": np.array(['b', 'a', 'b', 'a', 'c']),
+        "k2": np.array([1, 1, 1, 2, 1]),
+        "v": np.array([1.0, 2.0, 3.0, 4.0, 5.0]),
+        "n": np.array([10, 20, 30, 40, 50])
+    })
+
+    def test_single_key(self):
+        result = self.df.groupby('k1').agg({'v': ['sum', 'mean', 'count'], 'n': 'max'})
+        assert result.columns == ['k1', 'v_sum', 'v_mean', 'v_count', 'n']
+        assert result._data['k1'].tolist() == ['a', 'b', 'c']
+        assert result._data['v_sum'].tolist() == [6.0, 4.0, 5.0]
+        assert result._data['v_mean'].tolist() == [3.0, 2.0, 5.0]
+        assert result._data['v_count'].tolist() == [2, 2, 1]
+        assert result._data['n'].tolist() == [40, 30, 50]
+        assert result._data['n'].dtype.kind == 'i'
+
+    def test_multi_key(self):
+        result = self.df.groupby(['k1', 'k2']).agg({'n': ['first', 'last', 'sum']})
+        assert result._data['k1'].tolist() == ['a', 'a', 'b', 'c']
+        assert result._data['k2'].tolist() == [1, 2, 1, 1]
+        assert result._data['n_first'].tolist() == [20, 40, 10, 50]
+        assert result._data['n_last'].tolist() == [20, 40, 30, 50]
+        assert result._data['n_sum'].tolist() == [20, 40, 40, 50]
+
+    def test_var_std(self):
+        result = self.df.groupby('k2').agg({'v': ['var', 'std']})
+        values = np.array([1.0, 2.0, 3.0, 5.0])
+        assert np.isclose(result._data['v_var'][0], np.var(values))
+        assert np.isclose(result._data['v_std'][0], np.std(values))
+        assert result._data['v_var'][1] == 0
+
+    def test_missing_keys_and_errors(self):
+        df = tisch.DataTable({
+            "k": np.array([1.0, np.nan, 1.0]),
+            "s": np.array(['x', 'y', 'z'])
+        })
+        result = df.groupby('k').agg('first')
+        assert result._data['s'].tolist() == ['x']
+        assert df.groupby('k').mean().columns == ['k']
+        with pytest.raises(TypeError):
+            df.groupby('k').agg({'s': 'mean'})
+        with pytest.raises(ValueError):
+            df.groupby('k').agg({'s': 'median'})
+        with pytest.raises(KeyError):
+            df.groupby('missing')
+
+    def test_narrow_keys(self):
+        df = tisch.DataTable({"k": np.array([-100, 100, -100], dtype = 'int8'),
+                              "v": np.array([1, 2, 3])})
+        result = df.groupby('k').agg({'v': 'sum', 'k': 'count'})
+        assert result.columns == ['k', 'v', 'k_count']
+        assert result._data['k'].tolist() == [-100, 100]
+        assert result._data['v'].tolist() == [4, 2]
+        assert result._data['k_count'].tolist() == [2, 1]
+
+class TestDataTableMerge:
+    left = tisch.DataTable({
+        "k": np.array([1, 2, 2, 4]),
+        "v": np.array([0.1, 0.2, 0.3, 0.4]),
+        "s": np.array(['a', 'b', 'c', 'd'])
+    })
+    right = tisch.DataTable({
+        "k": np.array([2, 3, 4, 4]),
+        "v": np.array([20, 30, 40, 41])
+    })
+
+    def check_engines(self, how):
+        results = [self.left.merge(self.right, on = 'k', how = how, engine = engine)
+                   for engine in ('hash', 'sort')]
+        for col in results[0].columns:
+            a, b = results[0]._data[col], results[1]._data[col]
+            assert a.dtype == b.dtype
+            assert np.array_equal(a, b) or (a.dtype.kind == 'f' and np.allclose(a, b, equal_nan = True))
+        return results[0]
+
+    def test_inner(self):
+        result = self.check_engines('inner')
+        assert result.columns == ['k', 'v_x', 's', 'v_y']
+        assert result._data['k'].tolist() == [2, 2, 4, 4]
+        assert result._data['s'].tolist() == ['b', 'c', 'd', 'd']
+        assert result._data['v_y'].tolist() == [20, 20, 40, 41]
+
+    def test_left_right(self):
+        result = self.check_engines('left')
+        assert result._data['k'].tolist() == [1, 2, 2, 4, 4]
+        assert result._data['v_y'].dtype.kind == 'i'
+        assert result.isna()._data['v_y'].tolist() == [True, False, False, False, False]
+
+        result = self.check_engines('right')
+        assert result._data['k'].tolist() == [2, 2, 3, 4, 4]
+        assert result._data['s'].tolist() == ['b', 'c', None, 'd', 'd']
+
+    def test_outer(self):
+        result = self.check_engines('outer')
+        assert result._data['k'].tolist() == [1, 2, 2, 4, 4, 3]
+        assert result._data['k'].dtype.kind == 'i'
+        assert result._data['v_y'][-1] == 30
+
+    def test_outer_empty_side(self):
+        empty = self.left[:0, :]
+        for engine in ('hash', 'sort'):
+            result = empty.merge(self.right.sort_vals('k'), on = 'k', how = 'outer',
+                                 engine = engine)
+            assert result._data['k'].tolist() == sorted(self.right._data['k'].tolist())
+        nulls = tisch.DataTable({"k": np.array([None, None], dtype = 'object'),
+                                 "v": np.array([1, 2])}, categorical = False)
+        result = nulls.merge(nulls, on = 'k', how = 'outer', engine = 'hash')
+        assert result._column('v_x').tolist()[:2] == [1, 2]
+        assert result._column('v_y').tolist()[2:] == [1, 2]
+
+    def test_multi_key(self):
+        left = tisch.DataTable({
+            "a": np.array(['x', 'x', 'y']),
+            "b": np.array([1, 2, 1]),
+            "l": np.array([1, 2, 3])
+        })
+        right = tisch.DataTable({
+            "a": np.array(['y', 'x', 'x']),
+            "b": np.array([1, 2, 2]),
+            "r": np.array([10, 20, 21])
+        })
+        result = left.merge(right, on = ['a', 'b'])
+        assert result._data['l'].tolist() == [2, 2, 3]
+        assert result._data['r'].tolist() == [20, 21, 10]
+
+        sorted_result = left.merge(right.sort_vals(['a', 'b']), on = ['a', 'b'], engine = 'sort')
+        assert sorted_result._data['r'].tolist() == [20, 21, 10]
+
+    def test_errors(self):
+        with pytest.raises(ValueError):
+            self.right.merge(self.left.sort_vals('v', ascending = False), on = 'k', engine = 'sort')
+        with pytest.raises(ValueError):
+            self.left.merge(self.right, how = 'cross')
+        with pytest.raises(KeyError):
+            self.left.merge(self.right, on = 's')
+
+class TestReadCSV:
+    def write_csv(self, tmp_path, rows):
+        path = tmp_path / 'data.csv'
+        path.write_text('\n'.join(','.join(row) for row in rows) + '\n')
+        return str(path)
+
+    def test_infer_types(self, tmp_path):
+        path = self.write_csv(tmp_path, [
+            ['i', 'f', 'b', 's', 'm'],
+            ['1', '1.5', 'True', 'x', '3'],
+            ['2', '', 'False', '', ''],
+        ])
+        df = tisch.read_csv(path)
+        assert df.columns == ['i', 'f', 'b', 's', 'm']
+        assert df._data['i'].dtype == np.int64
+        assert df._data['f'].dtype == np.float64 and np.isnan(df._data['f'][1])
+        assert df._data['b'].tolist() == [True, False]
+        assert df._data['s'].tolist() == ['x', None]
+        assert df._data['m'].dtype == np.int64
+        assert df.isna()._data['m'].tolist() == [False, True]
+
+    def test_widen_after_sample(self, tmp_path):
+        rows = [['a', 'b']] + [[str(i), 'y'] for i in range(10)] + [['2.5', 'z']]
+        df = tisch.read_csv(self.write_csv(tmp_path, rows), sample_size = 5)
+        assert df._data['a'].dtype == np.float64
+        assert df._data['a'][-1] == 2.5
+        assert len(df) == 11
+
+    def test_dtypes_usecols(self, tmp_path):
+        path = self.write_csv(tmp_path, [['a', 'b', 'c'], ['1', 'x', '3'], ['2', 'y', '4']])
+        df = tisch.read_csv(path, dtypes = {'c': 'float'}, usecols = ['c', 'a'])
+        assert df.columns == ['a', 'c']
+        assert df._data['c'].dtype == np.float64
+        with pytest.raises(ValueError):
+            tisch.read_csv(path, dtypes = {'b': 'int'})
+        with pytest.raises(KeyError):
+            tisch.read_csv(path, usecols = ['d'])
+
+    def test_chunks(self, tmp_path):
+        rows = [['a', 'b']] + [[str(i), str(i % 3 == 0)] for i in range(25)]
+        chunks = list(tisch.read_csv(self.write_csv(tmp_path, rows), chunksize = 10))
+        assert [len(chunk) for chunk in chunks] == [10, 10, 5]
+        assert chunks[2]._data['a'].tolist() == [20, 21, 22, 23, 24]
+        assert chunks[0]._data['b'].dtype == np.bool_
+
+class TestSaveLoad:
+    df = tisch.DataTable({
+        "i": np.array([1, 2, 3]),
+        "f": np.array([0.5, np.nan, 2.5]),
+        "b": np.array([True, False, True]),
+        "s": np.array(['ab', None, 'ünï'], dtype = 'object')
+    })
+
+    def test_round_trip(self, tmp_path):
+        self.df.save(str(tmp_path / 'dt'))
+        loaded = tisch.load(str(tmp_path / 'dt'))
+        assert loaded.columns == self.df.columns
+        assert isinstance(loaded._data['i'], np.memmap)
+        assert loaded._data['i'].tolist() == [1, 2, 3]
+        assert np.isnan(loaded._data['f'][1])
+        assert loaded._data['b'].dtype == np.bool_
+        assert loaded._data['s'].tolist() == ['ab', None, 'ünï']
+
+        loaded = tisch.load(str(tmp_path / 'dt'), mmap = False, columns = ['s', 'f'])
+        assert loaded.columns == ['s', 'f']
+        assert not isinstance(loaded._data['f'], np.memmap)
+
+    def test_errors(self, tmp_path):
+        self.df.save(str(tmp_path / 'dt'))
+        with pytest.raises(KeyError):
+            tisch.load(str(tmp_path / 'dt'), columns = ['x'])
+
+        df = tisch.DataTable({"o": np.array([1, 'a'], dtype = 'object')})
+        with pytest.raises(TypeError):
+            df.save(str(tmp_path / 'bad'))
+
+class TestDataTableLazy:
+    df = tisch.DataTable({
+        "a": np.array([1, 5, 3, 8, 4]),
+        "b": np.array([0.5, 1.5, 2.5, 3.5, 4.5]),
+        "c": np.array(['p', 'q', 'r', 's', 't'])
+    })
+
+    def test_comparisons(self):
+        mask = (self.df['a'] > 3) & ~(self.df['c'] == 's')
+        assert self.df[mask]._data['a'].tolist() == [5, 4]
+
+    def test_collect_matches_eager(self):
+        lazy = self.df.lazy()[tisch.col('a') > 2][['a', 'b']] * 2
+        result = lazy.collect()
+        expected = self.df[self.df['a'] > 2][['a', 'b']] * 2
+        assert result.columns == expected.columns
+        for col in result.columns:
+            assert result._data[col].tolist() == expected._data[col].tolist()
+
+    def test_pruning_and_fusion(self):
+        lazy = self.df.lazy()[(tisch.col('b') > 1) & (tisch.col('b') < 4)] \
+            .rename({'a': 'x'})[tisch.col('x') != 8]['x'].sort_vals('x', ascending = False)
+        plan = lazy.explain().splitlines()
+        assert plan[0] == 'scan a, b'
+        assert plan.count('apply mask') == 1
+        assert lazy.collect()._data['x'].tolist() == [5, 3]
+
+    def test_errors(self):
+        with pytest.raises(KeyError):
+            self.df.lazy()['z'].collect()
+        with pytest.raises(KeyError):
+            self.df.lazy().drop('a')[tisch.col('a') > 1].collect()
+        with pytest.raises(ValueError):
+            self.df.lazy()[tisch.col('a') + 1].collect()
+        with pytest.raises(TypeError):
+            self.df.lazy()[5]
+
+class TestDataTableCategorical:
+    def make(self):
+        return tisch.DataTable({
+            "country": np.array(['de', 'us', 'de', 'fr', 'us', 'de']),
+            "n": np.array([1, 2, 3, 4, 5, 6])
+        })
+
+    def test_auto_and_explicit(self):
+        df = self.make()
+        assert 'country' in df._categories
+        assert df._data['country'].dtype == np.int8
+        assert df._categories['country'].tolist() == ['de', 'fr', 'us']
+        assert df.dtypes._column('Data Type').tolist() == ['category', 'integer']
+
+        df = tisch.DataTable({"a": np.array(['x', 'y', 'z'])})
+        assert df._categories == {}
+        df = tisch.DataTable({"a": np.array(['x', 'y', 'z'])}, categorical = ['a'])
+        assert df._categories['a'].tolist() == ['x', 'y', 'z']
+        with pytest.raises(TypeError):
+            tisch.DataTable({"a": np.array([1, 2])}, categorical = ['a'])
+
+        df = tisch.DataTable({"a": np.array(['x', 'y', 'z'])}, categorical = False).to_categorical()
+        assert 'a' in df._categories
+
+    def test_select_and_compare(self):
+        df = self.make()
+        result = df[df['country'] == 'de']
+        assert result._column('country').tolist() == ['de', 'de', 'de']
+        assert result._data['n'].tolist() == [1, 3, 6]
+        assert (df['country'] > 'de')._data['country'].tolist() == \
+            [False, True, False, True, True, False]
+        assert (df['country'] + '!')._column('country')[0] == 'de!'
+        assert df.head(2).values.tolist() == [['de', 1], ['us', 2]]
+        df.columns = ['c', 'n']
+        assert df['c']._column('c')[1] == 'us'
+
+    def test_counts_sort_group(self):
+        df = self.make()
+        counts = df['country'].val_counts()
+        assert counts._data['country'].tolist() == ['de', 'us', 'fr']
+        assert counts._data['count'].tolist() == [3, 2, 1]
+        assert df.nunique()._data['country'].tolist() == [3]
+        assert df.min()._data['country'].tolist() == ['de']
+
+        result = df.sort_vals('country', ascending = False)
+        assert result._column('country').tolist() == ['us', 'us', 'fr', 'de', 'de', 'de']
+
+        result = df.groupby('country').agg({'n': 'sum', 'country': 'count'})
+        assert result._column('country').tolist() == ['de', 'fr', 'us']
+        assert result._data['country_count'].tolist() == [3, 1, 2]
+        assert result._data['n'].tolist() == [10, 4, 7]
+
+    def test_missing_and_merge(self):
+        df = tisch.DataTable({
+            "s": np.array(['a', None, 'a', 'b', None, 'a'], dtype = 'object')
+        })
+        assert 's' in df._categories
+        assert df.isna()._data['s'].tolist() == [False, True, False, False, True, False]
+        assert (df['s'] != 'a')._data['s'].tolist() == [False, True, False, True, True, False]
+
+        other = tisch.DataTable({
+            "s": np.array(['b', 'a', 'c', 'c']),
+            "v": np.array([1, 2, 3, 4])
+        })
+        result = df.merge(other, on = 's', how = 'left')
+        assert result._column('s').tolist() == ['a', None, 'a', 'b', None, 'a']
+        assert result._data['v'][[0, 3]].tolist() == [2, 1]
+
+    def test_save_load(self, tmp_path):
+        df = self.make()
+        df.save(str(tmp_path / 'dt'))
+        loaded = tisch.load(str(tmp_path / 'dt'))
+        assert isinstance(loaded._data['country'], np.memmap)
+        assert loaded._column('country').tolist() == df._column('country').tolist()
+
+        # Overwritten in place: stale column files go, earlier loads still read
+        (tmp_path / 'dt' / 'notes.txt').write_text('kept')
+        df['n'].save(str(tmp_path / 'dt'))
+        assert sorted(p.name for p in (tmp_path / 'dt').iterdir()) == [
+            'col_0.bin', 'notes.txt', 'schema.json']
+        assert tisch.load(str(tmp_path / 'dt')).columns == ['n']
+        assert loaded._column('country').tolist() == df._column('country').tolist()
+
+    def test_memory(self):
+        strings = np.array(['alpha', 'beta', 'gamma'] * 1000, dtype = 'object')
+        plain = tisch.DataTable({"s": strings}, categorical = False)
+        encoded = tisch.DataTable({"s": strings})
+        assert encoded.nbytes < plain.nbytes / 10
+
+
+class TestDataTableNulls:
+
+    def make(self):
+        return tisch.DataTable({
+            "i": np.ma.MaskedArray([1, 2, 3, 4], mask = [False, True, False, False]),
+            "b": np.ma.MaskedArray([True, False, True, False], mask = [False, False, True, False]),
+            "f": np.array([1.5, 2.5, np.nan, 4.5]),
+            "k": np.array([1, 1, 2, 2])
+        })
+
+    def test_masks(self):
+        df = self.make()
+        assert df._data['i'].dtype.kind == 'i' and df._data['b'].dtype.kind == 'b'
+        assert set(df._validity) == {'i', 'b'}
+        assert df.isna()._data['i'].tolist() == [False, True, False, False]
+        assert df.count()._data['i'].tolist() == [3]
+        assert df.count()._data['f'].tolist() == [3]
+        assert df.count()._data['k'].tolist() == [4]
+        assert df.sum()._data['i'].tolist() == [8]
+        assert df._column('i')[1] != df._column('i')[1]
+
+        subset = df[[1, 2], :]
+        assert subset.isna()._data['i'].tolist() == [True, False]
+        assert subset.isna()._data['b'].tolist() == [False, True]
+        assert 'i' not in df[[0, 2], :]._validity
+
+    def test_operations(self):
+        df = self.make()
+        result = df['i'] + df['k']
+        assert result._data['i'].dtype.kind == 'i'
+        assert result.isna()._data['i'].tolist() == [False, True, False, False]
+        assert result._data['i'][[0, 2, 3]].tolist() == [2, 5, 6]
+
+        filtered = df[df['b']]
+        assert filtered._data['k'].tolist() == [1]
+        assert df.sort_vals('i')._data['k'].tolist() == [1, 2, 2, 1]
+
+        grouped = df.groupby('k').agg({'i': ['sum', 'count', 'min']})
+        assert grouped._data['i_sum'].tolist() == [1, 7]
+        assert grouped._data['i_count'].tolist() == [1, 2]
+        assert grouped._data['i_min'].tolist() == [1, 3]
+
+    def test_fillna_dropna(self):
+        df = self.make()
+        filled = df.fillna({'i': 0, 'f': -1.0})
+        assert filled._data['i'].tolist() == [1, 0, 3, 4]
+        assert 'i' not in filled._validity and 'b' in filled._validity
+        assert filled._data['f'].tolist() == [1.5, 2.5, -1.0, 4.5]
+        assert df.isna()._data['i'].tolist() == [False, True, False, False]
+        assert filled._data['i'].dtype == df._data['i'].dtype
+        assert df.fillna({'i': 0.5})._data['i'].tolist() == [1, 0.5, 3, 4]
+        assert df.fillna({'b': 0})._data['b'].tolist() == [True, False, False, False]
+        assert df.fillna({'b': 0})._data['b'].dtype == np.bool_
+        with pytest.raises(TypeError):
+            df.fillna({'b': 2})
+        with pytest.raises(TypeError):
+            df.fillna({'i': 'x'})
+
+        empty = tisch.DataTable({"i": np.ma.MaskedArray([1, 2], mask = [True, True])})
+        for method in ('min', 'max', 'argmin'):
+            assert getattr(empty, method)().isna()._data['i'].tolist() == [True]
+        assert empty.min()._data['i'].dtype == empty._data['i'].dtype
+
+        assert df.dropna()._data['k'].tolist() == [1, 2]
+        assert df.dropna()._validity == {}
+
+        cats = tisch.DataTable({"s": np.array(['b', None, 'b', 'd'], dtype = 'object')},
+                               categorical = True)
+        filled = cats.fillna('c')
+        assert filled._categories['s'].tolist() == ['b', 'c', 'd']
+        assert filled._column('s').tolist() == ['b', 'c', 'b', 'd']
+
+    def test_csv_and_save(self, tmp_path):
+        path = tmp_path / 'nulls.csv'
+        path.write_text('i,b\n1,True\n,\n3,False\n')
+        df = tisch.read_csv(str(path))
+        assert df._data['i'].dtype.kind == 'i' and df._data['b'].dtype.kind == 'b'
+        assert df.isna()._data['b'].tolist() == [False, True, False]
+
+        df.save(str(tmp_path / 'dt'))
+        loaded = tisch.load(str(tmp_path / 'dt'))
+        assert loaded.isna()._data['i'].tolist() == [False, True, False]
+
+
+class TestDataTableStats:
+
+    def make(self):
+        return tisch.DataTable({
+            "a": np.array([1, 2, 3, 5]),
+            "b": np.array([4.0, np.nan, 1.0, 4.0])
+        })
+
+    def test_caller_array_changed(self):
+        arr = np.arange(5)
+        df = tisch.DataTable({"a": arr})
+        assert df.min()._data['a'].tolist() == [0]
+        arr[0] = -10
+        assert df.min()._data['a'].tolist() == [0]
+        assert df._data['a'][0] == 0
+        assert tisch.DataTable({"a": arr}, copy = False)._data['a'] is arr
+
+        other = np.arange(5, 10)
+        df['b'] = other
+        assert df.min()._data['b'].tolist() == [5]
+        other[:] = 0
+        assert df.min()._data['b'].tolist() == [5]
+
+        # Shared key values and cached results are copied before any change
+        grouped = df.groupby('a')
+        summed = grouped.agg('sum')
+        summed[0, 'a'] = 99
+        assert grouped.agg('sum')._data['a'][0] == 0
+        low = df.min()
+        low[0, 'a'] = 99
+        assert df.min()._data['a'].tolist() == [0]
+
+    def test_cache_fill_and_share(self):
+        df = self.make()
+        assert df.max()._data['a'].tolist() == [5]
+        assert df._stats['a']['max'].tolist() == [5]
+        assert df.nunique()._data['b'].tolist() == [3]
+        assert df.nunique(dropna = True)._data['b'].tolist() == [2]
+        assert df.count()._data['b'].tolist() == [3]
+
+        renamed = df.rename({'a': 'x'})
+        assert renamed._stats['x'] is df._stats['a']
+        assert df['a']._stats['a'] is df._stats['a']
+        assert 'a' not in df[[0, 1], :]._stats
+
+    def test_invalidation(self):
+        df = self.make()
+        assert df.max()._data['a'].tolist() == [5]
+        df['a'] = np.array([9, 1, 1, 1])
+        assert df.max()._data['a'].tolist() == [9]
+
+        df.columns = ['c', 'd']
+        assert df.min()._data['c'].tolist() == [1]
+        assert df.fillna(0.0).count()._data['d'].tolist() == [4]
+
+    def test_sortedness(self):
+        df = self.make()
+        result = df.sort_vals('a')
+        assert result._data['a'] is df._data['a']
+        assert df._stats['a']['sorted']
+        assert df.sort_vals('a', ascending = False)._data['a'].tolist() == [5, 3, 2, 1]
+        assert not df._is_sorted_column('b')
+
+
+class TestOptions:
+
+    def make(self):
+        rng = np.random.RandomState(0)
+        data = {f"c{i}": rng.rand(1000) for i in range(8)}
+        data['i'] = rng.randint(0, 100, 1000)
+        data['s'] = np.array(['x', 'y'] * 500, dtype = 'object')
+        return tisch.DataTable(data)
+
+    def test_threads_match_serial(self):
+        df = self.make()
+        serial = [df.sum(), df.std(), df.round(2), df * 3, df['c0'] > 0.5]
+        with tisch.option_context(threads = 4, parallel_min_size = 0):
+            assert tisch.get_option('threads') == 4
+            threaded = [df.sum(), df.std(), df.round(2), df * 3, df['c0'] > 0.5]
+        assert tisch.get_option('threads') == 1
+
+        for a, b in zip(serial, threaded):
+            assert a.columns == b.columns
+            for col in a.columns:
+                assert a._data[col].tolist() == b._data[col].tolist()
+
+    def test_processes_match_serial(self):
+        rng = np.random.RandomState(0)
+        floats = rng.randint(0, 50, 2000) / 4
+        floats[::7] = np.nan
+        df = tisch.DataTable({'i': rng.randint(0, 10 ** 6, 2000), 'f': floats,
+                              'k': rng.randint(0, 3, 2000)})
+        run = lambda: [df.sort_vals('i'), df.sort_vals('f', ascending = False),
+                       df[['i', 'f']].val_counts()[1], df.groupby('f').agg('sum')]
+        serial = run()
+        with tisch.option_context(processes = 2, parallel_min_size = 100):
+            assert tisch.get_option('processes') == 2
+            parallel = run()
+            order = tisch._stable_argsort(df._data['f'])
+        assert tisch.get_option('processes') == 1
+        assert order.tolist() == np.argsort(df._data['f'], kind = 'stable').tolist()
+
+        for a, b in zip(serial, parallel):
+            assert a.columns == b.columns
+            for col in a.columns:
+                np.testing.assert_array_equal(a._data[col], b._data[col])
+
+    def test_processes_strings(self):
+        rng = np.random.RandomState(0)
+        words = np.array([f"w{i}" if i % 3 else f"wé{i}" for i in range(700)], dtype = 'object')
+        values = words[rng.randint(0, 700, 1000)]
+        values[::9] = None
+        df = tisch.DataTable({'s': values, 'n': np.arange(1000)}, categorical = False)
+        run = lambda: [df.sort_vals('s'), df.sort_vals('s', ascending = False),
+                       df.groupby('s').agg('sum'), df.merge(df[:50, :], on = 's')]
+        serial = run()
+        with tisch.option_context(processes = 3, parallel_min_size = 100):
+            parallel = run()
+            codes, uniques = tisch._factorize(values, sort = False)
+        expected = tisch._factorize(values, sort = False)
+        assert codes.tolist() == expected[0].tolist()
+        assert uniques.tolist() == expected[1].tolist()
+
+        for a, b in zip(serial, parallel):
+            assert a.columns == b.columns
+            for col in a.columns:
+                assert a._data[col].tolist() == b._data[col].tolist()
+
+    def test_invalid(self):
+        with pytest.raises(KeyError):
+            tisch.set_options(cores = 2)
+        with pytest.raises(ValueError):
+            tisch.set_options(threads = 0)
+        with pytest.raises(ValueError):
+            tisch.set_options(processes = 0)
+
+
+class TestChunkedDataTable:
+
+    def make(self):
+        rng = np.random.RandomState(1)
+        full = tisch.DataTable({
+            "a": rng.randint(0, 100, 1000),
+            "b": rng.rand(1000),
+            "s": rng.choice(np.array(['x', 'y', 'z'], dtype = 'object'), 1000)
+        })
+        chunks = [full[i:i + 300, :] for i in range(0, 1000, 300)]
+        return full, tisch.ChunkedDataTable(chunks)
+
+    def test_reductions(self):
+        full, chunked = self.make()
+        for col in full.columns:
+            assert chunked.nunique()._data[col].tolist() == full.nunique()._data[col].tolist()
+        assert len(chunked) == 1000
+        assert chunked.sum()._data['a'].tolist() == full.sum()._data['a'].tolist()
+        assert chunked.max()._data['s'].tolist() == ['z']
+        for method in ('mean', 'var', 'std'):
+            expected = getattr(full, method)()
+            result = getattr(chunked, method)()
+            assert np.allclose(result._data['a'], expected._data['a'])
+            assert np.allclose(result._data['b'], expected._data['b'])
+
+        counts = chunked['s'].val_counts()
+        expected = full['s'].val_counts()
+        assert counts._data['s'].tolist() == expected._column('s').tolist()
+        assert counts._data['count'].tolist() == expected._data['count'].tolist()
+
+    def test_filter_and_slices(self):
+        full, chunked = self.make()
+        filtered = chunked[chunked['a'] > 50]
+        assert filtered.count()._data['a'].tolist() == full[full['a'] > 50].count()._data['a'].tolist()
+        assert (chunked['b'] * 2).to_table()._data['b'].tolist() == (full['b'] * 2)._data['b'].tolist()
+        assert chunked.head(5)._data['a'].tolist() == full.head(5)._data['a'].tolist()
+        assert chunked.tail(350)._data['a'].tolist() == full.tail(350)._data['a'].tolist()
+
+    def test_from_csv_and_concat(self, tmp_path):
+        path = tmp_path / 'data.csv'
+        path.write_text('k,v\n' + ''.join(f'{i},{i % 3}\n' for i in range(10)))
+        chunked = tisch.ChunkedDataTable.from_csv(str(path), chunksize = 4)
+        assert chunked.sum()._data['k'].tolist() == [45]
+        assert len(chunked) == 10
+
+        with pytest.raises(TypeError):
+            tisch.ChunkedDataTable(iter([]))
+
+        left = tisch.DataTable({"s": np.array(['a', 'b']), "n": np.array([1, 2])}, categorical = True)
+        right = tisch.DataTable({"s": np.array(['c', 'a']), "n": np.array([3, 4])}, categorical = True)
+        both = tisch.concat([left, right])
+        assert both._categories['s'].tolist() == ['a', 'b', 'c']
+        assert both._column('s').tolist() == ['a', 'b', 'c', 'a']
+
+
+class TestDataTableWindows:
+
+    def make(self):
+        return tisch.DataTable({
+            "a": np.array([1.0, 5.0, 2.0, 8.0, 3.0, np.nan, 4.0]),
+            "s": np.array(['p', 'q', 'r', 's', 't', 'u', 'v'], dtype = 'object')
+        })
+
+    def test_rolling_matches_loop(self):
+        rng = np.random.RandomState(2)
+        values = rng.rand(200)
+        df = tisch.DataTable({"a": values})
+        for window in (1, 5, 64, 300):
+            result = df.rolling(window, min_periods = 1)
+            for method in ('sum', 'mean', 'min', 'max', 'std'):
+                expected = [getattr(np, method)(values[max(i - window + 1, 0):i + 1])
+                            for i in range(len(values))]
+                assert np.allclose(getattr(result, method)()._data['a'], expected)
+
+    def test_min_periods_and_missing(self):
+        df = self.make()
+        result = df.rolling(3).sum()
+        assert np.isnan(result._data['a'][:2]).all()
+        assert result._data['a'][2:5].tolist() == [8.0, 15.0, 13.0]
+        assert np.isnan(result._data['a'][5:]).all()
+        assert df.rolling(3, min_periods = 2).max()._data['a'][5:].tolist() == [8.0, 4.0]
+        assert result._data['s'].tolist() == df._data['s'].tolist()
+        assert df.expanding().mean()._data['a'][-1] == 23.0 / 6
+
+    def test_cumulative_and_diff(self):
+        df = self.make()
+        cumsum = df.cumsum()._data['a']
+        assert cumsum[:5].tolist() == [1.0, 6.0, 8.0, 16.0, 19.0]
+        assert np.isnan(cumsum[5]) and cumsum[6] == 23.0
+        assert df.cummax()._data['a'][[0, 1, 6]].tolist() == [1.0, 5.0, 8.0]
+        assert df.cummin()._data['a'][6] == 1.0
+
+        ints = tisch.DataTable({"n": np.array([1, 2, 3, 4])})
+        assert ints.cumprod()._data['n'].tolist() == [1, 2, 6, 24]
+        diff = ints.diff(-1)._data['n']
+        assert diff[:3].tolist() == [-1.0, -1.0, -1.0] and np.isnan(diff[3])
+        assert ints.pct_diff(2)._data['n'][2:].tolist() == [200.0, 100.0]
+        assert np.isnan(ints.diff(10)._data['n']).all()
+
+        flags = tisch.DataTable({"b": np.ma.MaskedArray([True, False, True, True],
+                                                        mask = [False, True, False, False])})
+        assert flags.diff()._data['b'][3] == 0.0
+        cumsum = flags.cumsum()._data['b']
+        assert cumsum[[0, 2, 3]].tolist() == [1.0, 2.0, 3.0] and np.isnan(cumsum[1])
+
+    def test_mixed_magnitudes(self):
+        df = tisch.DataTable({"a": np.array([1e17] + [1.0] * 10)})
+        assert df.rolling(2).sum()._data['a'][2:].tolist() == [2.0] * 9
+        assert df.rolling(4).mean()._data['a'][4:].tolist() == [1.0] * 7
+
+
+class TestDataTableTopK:
+
+    def make(self):
+        return tisch.DataTable({
+            "rev": np.array([5.0, 9.0, np.nan, 9.0, 1.0, 7.0, 9.0]),
+            "n": np.array([3, 1, 8, 2, 5, 4, 1]),
+            "s": np.array(['c', 'a', 'b', 'e', 'd', 'f', 'g'], dtype = 'object')
+        })
+
+    def test_nlargest(self):
+        df = self.make()
+        result = df.nlargest(2, 'rev')
+        assert result._data['rev'].tolist() == [9.0, 9.0]
+        assert result._data['n'].tolist() == [1, 2]
+
+        result = df.nlargest(3, ['rev', 'n'])
+        assert result._data['n'].tolist() == [2, 1, 1]
+        assert result._data['s'].tolist() == ['e', 'a', 'g']
+        assert len(df.nlargest(10, 'rev')) == 6
+        assert len(df.nlargest(0, 'rev')) == 0
+
+    def test_nsmallest(self):
+        df = self.make()
+        assert df.nsmallest(3, 'n')._data['s'].tolist() == ['a', 'g', 'e']
+        assert df.nsmallest(2, 's')._data['s'].tolist() == ['a', 'b']
+        assert df.nsmallest(2, ['n', 's'])._data['s'].tolist() == ['a', 'g']
+
+        rng = np.random.RandomState(3)
+        big = tisch.DataTable({"v": rng.randint(0, 50, 5000)})
+        expected = np.sort(big._data['v'])[:100]
+        assert big.nsmallest(100, 'v')._data['v'].tolist() == expected.tolist()
+
+
+class TestDataTableSort:
+
+    def make(self):
+        return tisch.DataTable({
+            "g": np.array([2, 1, 2, 1, 3, 1]),
+            "v": np.array([0.5, np.nan, 0.5, 2.0, 1.0, 3.0]),
+            "s": np.array(['b', 'a', 'c', 'a', None, 'b'], dtype = 'object'),
+            "i": np.arange(6)
+        })
+
+    def test_stable_directions(self):
+        df = self.make()
+        assert df.sort_vals('g', ascending = False)._data['i'].tolist() == [4, 0, 2, 1, 3, 5]
+        result = df.sort_vals(['g', 'v'], ascending = [True, False])
+        assert result._data['i'].tolist() == [5, 3, 1, 0, 2, 4]
+        assert df.sort_vals('v', na_position = 'first')._data['i'].tolist() == [1, 0, 2, 4, 3, 5]
+        assert df.sort_vals('s')._data['i'].tolist() == [1, 3, 0, 5, 2, 4]
+        assert df.sort_vals('s', ascending = False)._data['i'].tolist() == [2, 0, 5, 1, 3, 4]
+
+        mixed = tisch.DataTable({"m": np.array(['b', 1, 'a', 2], dtype = 'object')},
+                                categorical = False)
+        with pytest.raises(TypeError):
+            mixed.sort_vals('m')
+
+    def test_argsort_reuse(self):
+        df = self.make()
+        order = df.argsort_vals(['g', 's'])
+        assert order.dtype == np.intp
+        other = tisch.DataTable({"x": np.arange(6) * 10})
+        assert other[order, :]._data['x'].tolist() == [10, 30, 50, 0, 20, 40]
+
+    def test_radix_matches_lexsort(self):
+        rng = np.random.RandomState(4)
+        df = tisch.DataTable({
+            "a": rng.randint(-5, 5, 2000),
+            "b": rng.randint(0, 1000, 2000),
+            "c": rng.rand(2000) > 0.5
+        })
+        order = df.argsort_vals(['a', 'c', 'b'], ascending = [False, True, True])
+        expected = np.lexsort([df._data['b'], df._data['c'], -df._data['a']])
+        assert order.tolist() == expected.tolist()
+
+
+class TestDataTableIndex:
+
+    def make(self):
+        return tisch.DataTable({
+            "id": np.array([7, 3, 9, 3, 1, 7, 5]),
+            "s": np.array(['b', 'a', None, 'c', 'a', 'b', 'd'], dtype = 'object'),
+            "c": np.array(['x', 'y', 'x', 'y', 'x', 'y', 'x']),
+            "v": np.arange(7)
+        }, categorical = ['c'])
+
+    def check(self, df):
+        assert df.lookup('id', 3)._data['v'].tolist() == [1, 3]
+        assert df.lookup('id', [7, 1, 42, 7])._data['v'].tolist() == [0, 4, 5]
+        assert df.lookup('s', ['a', None])._data['v'].tolist() == [1, 4]
+        assert df.lookup('c', 'y')._data['v'].tolist() == [1, 3, 5]
+        assert df.range('id', 3, 7)._data['v'].tolist() == [0, 1, 3, 5, 6]
+        assert df.range('id', high = 3)._data['v'].tolist() == [1, 3, 4]
+        assert df.range('s', 'b', 'c')._data['v'].tolist() == [0, 3, 5]
+        assert df.range('c', 'xa')._data['v'].tolist() == [1, 3, 5]
+
+    def test_with_and_without_index(self):
+        df = self.make()
+        self.check(df)
+        for col in ('id', 's', 'c'):
+            df.create_index(col)
+        self.check(df)
+        for col in ('id', 's', 'c'):
+            df.create_index(col, kind = 'hash')
+        self.check(df)
+
+    def test_invalidation(self):
+        df = self.make()
+        df.create_index('id')
+        assert df['id']._index_of('id') is not None
+        df['id'] = np.array([1, 1, 1, 1, 1, 1, 2])
+        assert 'id' not in df._indexes
+        assert df.lookup('id', 2)._data['v'].tolist() == [6]
+        with pytest.raises(ValueError):
+            df.create_index('id', kind = 'btree')
+
+
+class TestProfile:
+
+    def test_records(self):
+        df = tisch.DataTable({"a": np.arange(10.0), "b": np.arange(10)})
+        original = tisch.DataTable.sort_vals
+        with tisch.profile() as p:
+            df.sort_vals('a', ascending = False).head(3)
+            df['a'] + 1
+            assert tisch.DataTable.sort_vals is not original
+        assert tisch.DataTable.sort_vals is original
+
+        assert [r['method'] for r in p.records] == ['sort_vals', 'head', '__getitem__', '__add__']
+        sort, head = p.records[:2]
+        assert (sort['rows_in'], sort['cols_in'], sort['rows_out']) == (10, 2, 10)
+        assert sort['columns_copied'] == 2 and sort['bytes_allocated'] == 160
+        assert head['columns_shared'] == 2 and head['rows_out'] == 3
+
+        summary = p.summary()
+        assert sorted(summary._data['method'].tolist()) == ['__add__', '__getitem__', 'head',
+                                                            'sort_vals']
+        assert 'sort_vals' in p.report()
+
+    def test_hooks(self):
+        df = tisch.DataTable({"a": np.arange(5)})
+        seen = []
+        tisch.add_profile_hook(seen.append)
+        try:
+            df.head(2)
+        finally:
+            tisch.remove_profile_hook(seen.append)
+        df.head(2)
+        # head calls __getitem__, which hooks see at depth 1
+        assert [(r['method'], r['depth']) for r in seen] == [('__getitem__', 1), ('head', 0)]
+
+
+class TestDataTableMemory:
+
+    def test_memory_usage(self):
+        words = np.array(['a' * 100, 'b', None], dtype = 'object')
+        df = tisch.DataTable({"i": np.arange(3), "s": words}, categorical = False)
+        usage = df.memory_usage()
+        assert usage._data['Column Name'].tolist() == ['i', 's']
+        assert usage._data['Bytes'][0] == 24
+        assert usage._data['Bytes'][1] > df.memory_usage(deep = False)._data['Bytes'][1] + 100
+        assert df.nbytes == usage._data['Bytes'].sum()
+
+    def test_compact(self):
+        df = tisch.DataTable({
+            "small": np.array([1, -5, 100] * 10),
+            "big": np.array([0, 70000, 1] * 10),
+            "half": np.array([0.5, 1.25, np.nan] * 10),
+            "pi": np.array([np.pi, 1.0, 2.0] * 10),
+            "word": np.array(['x', 'y', 'x'] * 10, dtype = 'object'),
+        }, categorical = False)
+        compacted, report = df.compact(report = True)
+        dtypes = {col: val.dtype.name for col, val in compacted._data.items()}
+        assert dtypes == {'small': 'int8', 'big': 'int32', 'half': 'float32',
+                          'pi': 'float64', 'word': 'int8'}
+        assert compacted['word']._column('word').tolist() == df._data['word'].tolist()
+        assert (compacted['small'] == df['small']).all()
+        assert (compacted['small'] * 1000)._data['small'].tolist() == [1000, -5000, 100000] * 10
+        saved = report._data['Saved']
+        assert saved.sum() == df.nbytes - compacted.nbytes and saved[3] == 0
+
+    def test_compact_nulls_and_constructor(self):
+        masked = np.ma.MaskedArray([1, 2, 3], mask = [False, True, False])
+        masked.data[1] = 2 ** 40
+        df = tisch.DataTable({"m": masked, "f": np.array([1.0, 2.0, 3.0])}, compact = True)
+        assert df._data['m'].dtype == np.int8 and df._data['f'].dtype == np.float32
+        assert df.isna()._data['m'].tolist() == [False, True, False]
+
+    def test_compact_arithmetic_does_not_overflow(self):
+        df = tisch.DataTable({"k": np.array([1, 1, 1, 2]),
+                              "a": np.array([100, 100, 100, -100])}).compact()
+        assert df._data['a'].dtype == np.int8
+        a = df['a']
+        assert (a + a)._data['a'].tolist() == [200, 200, 200, -200]
+        assert (a * a)._data['a'].tolist() == [10000] * 4
+        assert (a - (-100))._data['a'].tolist() == [200, 200, 200, 0]
+        assert (-100 - a)._data['a'].tolist() == [-200, -200, -200, 0]
+        assert (a > 1000)._data['a'].tolist() == [False] * 4
+        assert a.cumsum()._data['a'].tolist() == [100, 200, 300, 200]
+        assert df.groupby('k').sum()._data['a'].tolist() == [300, -100]
+
+
+class TestDataTableCopyOnWrite:
+
+    def test_shared_until_set(self):
+        df = tisch.DataTable({"a": np.arange(5), "b": np.arange(5.0)})
+        derived = [df.copy(), df.rename({'a': 'c'}), df.drop('b'), df['a'], df.head(3)]
+        for table in derived:
+            assert np.shares_memory(next(iter(table._data.values())), df._data['a'])
+        with pytest.raises(ValueError):
+            df._data['a'][0] = 10
+
+        copy = derived[0]
+        copy[0, 'a'] = 10
+        copy[copy['b'] > 2, 'b'] = -1.0
+        assert copy._data['a'].tolist() == [10, 1, 2, 3, 4]
+        assert copy._data['b'].tolist() == [0.0, 1.0, 2.0, -1.0, -1.0]
+        assert df._data['a'].tolist() == [0, 1, 2, 3, 4]
+        assert derived[4]._data['a'].tolist() == [0, 1, 2]
+
+    def test_set_rows_nulls_and_categories(self):
+        df = tisch.DataTable({
+            "m": np.ma.MaskedArray([1, 2, 3], mask = [False, True, True]),
+            "s": np.array(['x', 'y', 'x'], dtype = 'object')
+        }, categorical = True)
+        df.min()
+        df[[1], 'm'] = 5
+        df[2, 's'] = 'z'
+        assert df.isna()._data['m'].tolist() == [False, False, True]
+        assert df.min()._data['m'].tolist() == [1]
+        assert df._column('s').tolist() == ['x', 'y', 'z']
+        with pytest.raises(KeyError):
+            df[0, 'missing'] = 1
+
+
+class TestPivot:
+
+    def setup_method(self):
+        self.df = tisch.DataTable({
+            "r": np.array(['a', 'a', 'b', 'b', 'c', None], dtype = 'object'),
+            "c": np.array(['x', 'y', 'x', 'x', 'y', 'x'], dtype = 'object'),
+            "v": np.array([1, 2, 3, 4, 5, 6])
+        })
+
+    def test_pivot_table(self):
+        table = self.df.pivot_table('r', 'c', 'v', 'sum')
+        assert table.columns == ['r', 'x', 'y']
+        assert table._column('r').tolist() == ['a', 'b', 'c']
+        assert table._data['x'].tolist()[:2] == [1, 7]
+        assert table.isna()._data['x'].tolist() == [False, False, True]
+
+        mean = self.df.pivot_table('r', 'c', 'v')
+        assert np.isnan(mean._data['y'][1]) and mean._data['x'][1] == 3.5
+        filled = self.df.pivot_table('r', 'c', 'v', 'max', fill_value = -1)
+        assert filled._data['y'].tolist() == [2, -1, 5]
+        with pytest.raises(KeyError):
+            self.df.pivot_table('r', 'missing', 'v')
+
+        df = tisch.DataTable({
+            "r": np.array(['a', 'a', 'b']),
+            "c": np.array(['x', 'x', 'x']),
+            "v": np.array([1.0, np.nan, np.nan])
+        })
+        assert df.pivot_table('r', 'c', 'v')._data['x'].tolist()[0] == 1.0
+        assert df.pivot_table('r', 'c', 'v', 'sum', fill_value = 0)._data['x'].tolist() == [1.0, 0]
+        clash = tisch.DataTable({"r": np.array(['a', 'b']),
+                                 "c": np.array([1, '1'], dtype = 'object'),
+                                 "v": np.array([1, 2])}, categorical = False)
+        with pytest.raises(ValueError):
+            clash.pivot_table('r', 'c', 'v')
+
+    def test_crosstab(self):
+        table = tisch.crosstab(self.df['r'], self.df['c'])
+        assert table.columns == ['r', 'x', 'y']
+        assert table._data['x'].tolist() == [1, 2, 0]
+        assert table._data['y'].tolist() == [1, 0, 1]
+        counts = tisch.crosstab(np.array([1, 1, 2]), np.array(['p', 'q', 'p']))
+        assert counts.columns == ['row_0', 'p', 'q']
+        assert counts._data['q'].tolist() == [1, 0]
+
+
+class TestQuantileAndSketches:
+
+    def test_quantile(self):
+        df = tisch.DataTable({
+            "a": np.array([4.0, np.nan, 1.0, 3.0, 2.0]),
+            "m": np.ma.MaskedArray([1, 2, 3, 100, 5], mask = [False, False, False, True, False]),
+            "s": np.array(['x', 'y', 'x', 'y', 'x'], dtype = 'object')
+        })
+        result = df.quantile([0, 0.5, 0.75, 1])
+        assert result.columns == ['a', 'm']
+        assert result._data['a'].tolist() == [1.0, 2.5, 3.25, 4.0]
+        assert result._data['m'].tolist() == np.quantile([1, 2, 3, 5], [0, 0.5, 0.75, 1]).tolist()
+        assert df.quantile()._data['a'].tolist() == [2.5]
+        with pytest.raises(ValueError):
+            df.quantile(1.5)
+
+    def test_approx(self):
+        rng = np.random.RandomState(0)
+        values = rng.randint(0, 20000, 100000)
+        df = tisch.DataTable({
+            "v": values,
+            "s": np.array([f"id{i}" for i in values], dtype = 'object')
+        }, categorical = False)
+        exact = len(np.unique(values))
+        estimates = df.nunique(approx = True)
+        assert abs(estimates._data['v'][0] - exact) < 0.03 * exact
+        assert abs(estimates._data['s'][0] - exact) < 0.03 * exact
+        median = df.quantile(0.5, approx = True)._data['v'][0]
+        assert abs(median - np.median(values)) < 0.02 * 20000
+
+    def test_merge(self):
+        rng = np.random.RandomState(1)
+        values = rng.standard_normal(20000)
+        halves = [tisch.KLLSketch(seed = 0).update(part) for part in np.split(values, 2)]
+        merged = halves[0].merge(halves[1])
+        assert merged.count == 20000 and merged.quantile(1) == values.max()
+        assert abs(merged.quantile(0.9) - np.quantile(values, 0.9)) < 0.05
+
+        chunks = tisch.ChunkedDataTable([tisch.DataTable({"v": np.arange(i * 1000, (i + 1) * 1000)})
+                                         for i in range(5)])
+        assert abs(chunks.nunique(approx = True)._data['v'][0] - 5000) < 100
+        assert chunks.nunique()._data['v'].tolist() == [5000]
+        assert abs(chunks.quantile(0.5)._data['v'][0] - 2500) < 100
+        with pytest.raises(ValueError):
+            tisch.HyperLogLog(10).merge(tisch.HyperLogLog(12))
+
+
+class TestStringMethods:
+
+    def setup_method(self):
+        self.names = np.array(['Alice Smith', ' bob ', None, 'ALICE smith', 'carl'], dtype = 'object')
+
+    def test_transforms(self):
+        for categorical in (False, True):
+            df = tisch.DataTable({"n": self.names, "v": np.arange(5)}, categorical = categorical)
+            lower = df.str.lower()
+            assert lower.columns == ['n']
+            assert lower._column('n').tolist() == ['alice smith', ' bob ', None, 'alice smith', 'carl']
+            assert df.str.strip()._column('n').tolist()[1] == 'bob'
+            assert df.str.slice(-3)._column('n').tolist() == ['ith', 'ob ', None, 'ith', 'arl']
+            assert df.str.replace('i', 'I', 1)._column('n').tolist()[0] == 'AlIce Smith'
+        # Unchanged strings keep their objects
+        df = tisch.DataTable({"n": self.names}, categorical = False)
+        assert df.str.lower()._data['n'][4] is self.names[4]
+
+    def test_predicates_filter(self):
+        for categorical in (False, True):
+            df = tisch.DataTable({"n": self.names, "v": np.arange(5)}, categorical = categorical)
+            contains = df['n'].str.contains('li')
+            assert contains.isna()._data['n'].tolist() == [False, False, True, False, False]
+            assert df[contains]._data['v'].tolist() == [0]
+            assert df[df['n'].str.startswith('ALI')]._data['v'].tolist() == [3]
+            assert df[df['n'].str.endswith('l')]._data['v'].tolist() == [4]
+            lengths = df.str.len()
+            assert lengths._column('n').tolist()[:2] == [11, 5] and lengths.isna()._data['n'][2]
+
+    def test_split(self):
+        df = tisch.DataTable({"n": self.names, "c": np.array(['a-1', 'b', 'a-1', None, 'a-1'])},
+                             categorical = ['c'])
+        parts = df.str.split()
+        assert parts.columns == ['n_0', 'n_1', 'c_0']
+        assert parts._column('n_1').tolist() == ['Smith', None, None, 'smith', None]
+        assert df.str.split('-')._column('c_1').tolist() == ['1', None, '1', None, '1']
+
+
+class TestInterop:
+
+    def setup_method(self):
+        self.df = tisch.DataTable({
+            "i": np.arange(4),
+            "f": np.array([1.0, np.nan, 3.0, 4.0]),
+            "s": np.array(['x', None, 'y', 'x'], dtype = 'object'),
+            "k": np.array(['q', 'p', None, 'q'], dtype = 'object'),
+            "m": np.ma.MaskedArray([1, 2, 3, 4], mask = [False, True, False, False])
+        }, categorical = ['k'])
+
+    def test_pandas_round_trip(self):
+        pd = pytest.importorskip('pandas')
+        frame = self.df.to_pandas()
+        assert np.shares_memory(frame['i'].to_numpy(), self.df._data['i'])
+        assert str(frame['m'].dtype) == 'Int64' and frame['m'].isna().tolist()[1]
+        assert frame['k'].tolist()[:2] == ['q', 'p']
+
+        back = tisch.DataTable.from_pandas(frame)
+        assert back.columns == self.df.columns
+        assert back._column('k').tolist() == ['q', 'p', None, 'q']
+        assert back.isna()._data['m'].tolist() == [False, True, False, False]
+        unsorted = pd.DataFrame({"c": pd.Categorical(['b', 'a', 'b'], categories = ['b', 'a'])})
+        table = tisch.DataTable.from_pandas(unsorted)
+        assert table._categories['c'].tolist() == ['a', 'b']
+        assert table._column('c').tolist() == ['b', 'a', 'b']
+
+    def test_interchange(self):
+        pd = pytest.importorskip('pandas')
+        frame = pd.api.interchange.from_dataframe(self.df)
+        assert frame['i'].tolist() == [0, 1, 2, 3]
+        assert frame['s'].isna().tolist() == [False, True, False, False]
+        assert frame['k'].isna().tolist() == [False, False, True, False]
+        assert frame['m'].isna().tolist() == [False, True, False, False]
+        data, _ = self.df.__dataframe__().get_column_by_name('i').get_buffers()['data']
+        assert data.__dlpack_device__() == (1, 0)
+        column = self.df.__dataframe__(allow_copy = False).get_column_by_name('s')
+        with pytest.raises(RuntimeError):
+            column.get_buffers()
+
+    def test_array(self):
+        assert np.asarray(self.df[['i', 'f']]).dtype == np.float64
+        single = np.asarray(self.df['i'])
+        assert single.shape == (4, 1) and np.shares_memory(single, self.df._data['i'])
+        values = self.df.values
+        assert values.shape == (4, 5) and values[0, 2] == 'x'
+
+
+class TestSample:
+
+    def setup_method(self):
+        self.df = tisch.DataTable({
+            "g": np.array(['a'] * 50 + ['b'] * 30 + ['c'] * 20, dtype = 'object'),
+            "v": np.arange(100)
+        })
+
+    def test_sample(self):
+        state = np.random.get_state()[1].copy()
+        sample = self.df.sample(10, seed = 3)
+        assert (np.random.get_state()[1] == state).all()
+        assert sample._data['v'].tolist() == self.df.sample(10, seed = 3)._data['v'].tolist()
+        assert len(set(sample._data['v'].tolist())) == 10
+        assert len(self.df.sample(fraction = 0.25, seed = 1)) == 25
+        assert len(self.df.sample(200, replace = True, seed = 1)) == 200
+        with pytest.raises(ValueError):
+            self.df.sample(200)
+
+    def test_stratified(self):
+        sample = self.df.sample(5, stratified = 'g', seed = 1)
+        assert sample._column('g').tolist() == ['a'] * 5 + ['b'] * 5 + ['c'] * 5
+        assert len(set(sample._data['v'].tolist())) == 15
+        sample = self.df.sample(fraction = 0.1, stratified = 'g', seed = 1)
+        assert sample._column('g').tolist() == ['a'] * 5 + ['b'] * 3 + ['c'] * 2
+        values = self.df.sample(3, stratified = 'g', replace = True, seed = 2)._data['v']
+        assert (values[6:] >= 80).all()
+        with pytest.raises(ValueError):
+            self.df.sample(30, stratified = 'g')
+        assert len(self.df.sample(30, stratified = 'g', replace = True, seed = 1)) == 90
+
+    def test_reservoir(self):
+        counts = np.zeros(100)
+        for seed in range(300):
+            sampler = tisch.ReservoirSampler(10, seed)
+            for start in range(0, 100, 7):
+                sampler.update(self.df[start:start + 7, :])
+            assert sampler.count == 100
+            counts[sampler.result()._data['v']] += 1
+        assert counts.sum() == 3000 and counts.min() > 5
+
+        chunks = tisch.ChunkedDataTable([self.df[i:i + 30, :] for i in range(0, 100, 30)])
+        assert len(chunks.sample(4, seed = 0)) == 4
+        assert len(chunks.sample(500, seed = 0)) == 100
+        with pytest.raises(ValueError):
+            tisch.ChunkedDataTable([]).sample(4)
@@ -1,800 +1,6017 @@
+import csv
+import enum
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import types
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import islice, repeat
+
 import numpy as np
 
-__version__ = '0.0.1'
+try:
+    from multiprocessing import shared_memory
+except ImportError:
+    # Python < 3.8: the processes option has no effect
+    shared_memory = None
+
+__version__ = '0.0.1'
+
+_OPTIONS = {
+    # Number of threads that process the columns of a DataTable in
+    # parallel. 1 runs everything in the calling thread
+    'threads': 1,
+    # Number of worker processes that sort, count and factorize large
+    # columns by row ranges. 1 keeps the work in the calling process
+    'processes': 1,
+    # Tables with fewer values than this are processed serially, since
+    # dispatching to threads would cost more than it saves
+    'parallel_min_size': 1000000
+}
+
+def set_options(**options):
+    """
+    Sets global options
+
+    Parameters:
+    -----------
+    threads: int
+        Number of threads used to process the columns of a DataTable in
+        parallel, in aggregations, element-wise functions and arithmetic.
+        NumPy releases the GIL inside these, so columns run concurrently.
+        1 (default) disables threading
+    processes: int
+        Number of worker processes that split the sorting, counting and
+        factorizing of a single column, in sort_vals, argsort_vals,
+        val_counts, groupby and merges. The column is shared with the
+        workers through shared memory. Numeric columns are split by row
+        ranges, and the sorted partial results merged. String columns,
+        whose hashing holds the GIL, are split by value ranges picked
+        from a sample, so their sorts and group keys are encoded by the
+        workers and need no merge; this pays off for strings with many
+        distinct values (those with few are stored as categoricals). The
+        val_counts of strings stays in-process, since handing the strings
+        to the workers costs about as much as counting them. 1 (default)
+        disables it. As with multiprocessing, scripts using it must guard
+        their entry point with if __name__ == '__main__'
+    parallel_min_size: int
+        Minimum number of values (rows times columns) for a DataTable to
+        be processed in parallel, or of rows for a column to be split
+        across processes
+    """
+    for name, value in options.items():
+        if name not in _OPTIONS:
+            raise KeyError(f"Unknown option {name}")
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise TypeError(f"Option {name} must be an integer")
+        if name in ('threads', 'processes') and value < 1:
+            raise ValueError(f"{name} must be at least 1")
+    _OPTIONS.update(options)
+
+def get_option(name):
+    """
+    Returns the current value of a global option
+    """
+    if name not in _OPTIONS:
+        raise KeyError(f"Unknown option {name}")
+    return _OPTIONS[name]
+
+@contextmanager
+def option_context(**options):
+    """
+    Sets global options within a with block, restoring them afterwards
+
+    Usage:
+    ------
+    with tisch.option_context(threads = 8):
+        df.sum()
+    """
+    previous = dict(_OPTIONS)
+    set_options(**options)
+    try:
+        yield
+    finally:
+        _OPTIONS.clear()
+        _OPTIONS.update(previous)
+
+_POOL = None
+_POOL_THREADS = 0
+_POOL_LOCK = threading.Lock()
+
+def _thread_pool(threads):
+    """
+    The shared thread pool, recreated when the number of threads changes
+    """
+    global _POOL, _POOL_THREADS
+    with _POOL_LOCK:
+        if _POOL_THREADS != threads:
+            if _POOL is not None:
+                _POOL.shutdown(wait = False)
+            _POOL = ThreadPoolExecutor(max_workers = threads, thread_name_prefix = 'tisch')
+            _POOL_THREADS = threads
+        return _POOL
+
+_PROCESS_POOL = None
+_PROCESS_POOL_SIZE = 0
+
+def _init_worker():
+    # Workers must not split their own ranges across processes again
+    _OPTIONS['processes'] = 1
+
+def _process_pool(processes):
+    """
+    The shared process pool, recreated when the number of processes changes
+    """
+    global _PROCESS_POOL, _PROCESS_POOL_SIZE
+    with _POOL_LOCK:
+        if _PROCESS_POOL_SIZE != processes:
+            if _PROCESS_POOL is not None:
+                _PROCESS_POOL.shutdown(wait = False)
+            _PROCESS_POOL = ProcessPoolExecutor(max_workers = processes,
+                                                initializer = _init_worker)
+            _PROCESS_POOL_SIZE = processes
+        return _PROCESS_POOL
+
+def _use_processes(arr):
+    """
+    Whether a numeric or object array is split across worker processes
+    """
+    return shared_memory is not None and _OPTIONS['processes'] > 1 and \
+        arr.dtype.kind in 'iufcO' and len(arr) >= _OPTIONS['parallel_min_size']
+
+def _map_columns(func, cols, size):
+    """
+    Applies func to every column name in cols, in parallel when the
+    threads option allows it and the table holds at least
+    parallel_min_size values
+
+    Returns
+    -------
+    A list of the results, in the order of cols
+    """
+    threads = _OPTIONS['threads']
+    if threads == 1 or len(cols) < 2 or size < _OPTIONS['parallel_min_size']:
+        return [func(col) for col in cols]
+    return list(_thread_pool(threads).map(func, cols))
+
+@contextmanager
+def _shared_arrays(arrays, fill = True):
+    """
+    Shared memory blocks holding arrays of the shapes and types of arrays,
+    and their values too if fill, which are freed on exit. Yields the
+    (name, shape, dtype) spec of every array, for worker processes to
+    attach to, and a view onto each block
+    """
+    blocks, specs, views = [], [], []
+    try:
+        for arr in arrays:
+            block = shared_memory.SharedMemory(create = True, size = max(arr.nbytes, 1))
+            blocks.append(block)
+            views.append(np.ndarray(arr.shape, dtype = arr.dtype, buffer = block.buf))
+            if fill:
+                views[-1][...] = arr
+            specs.append((block.name, arr.shape, arr.dtype.str))
+        yield [specs, views]
+    finally:
+        # The views must be released before their blocks can be closed
+        del views[:]
+        for block in blocks:
+            block.close()
+            block.unlink()
+
+def _run_partition(func, specs, task):
+    """
+    Runs in a worker process: attaches to the shared arrays of specs and
+    returns func(views, *task)
+    """
+    blocks = [shared_memory.SharedMemory(name = name) for name, _, _ in specs]
+    try:
+        views = [np.ndarray(shape, dtype = dtype, buffer = block.buf)
+                 for block, (_, shape, dtype) in zip(blocks, specs)]
+        result = func(views, *task)
+        del views[:]
+        return result
+    finally:
+        for block in blocks:
+            try:
+                block.close()
+            except BufferError:
+                # Still referenced by the traceback of a failed func
+                pass
+
+def _row_ranges(n):
+    """
+    One (start, stop) range of rows per worker process
+    """
+    bounds = np.linspace(0, n, _OPTIONS['processes'] + 1).astype('int64').tolist()
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _map_partitions(func, inputs, outputs, tasks):
+    """
+    Copies the inputs into shared memory, next to blocks for the outputs,
+    and runs func(views, *task) in the worker processes for every task.
+    views holds the inputs followed by the outputs, which func fills in
+
+    Returns
+    -------
+    A list of two items: copies of the outputs and the results of func,
+    in the order of tasks
+    """
+    processes = _OPTIONS['processes']
+    with _shared_arrays(inputs) as (input_specs, _), \
+            _shared_arrays(outputs, fill = False) as (output_specs, views):
+        pool = _process_pool(processes)
+        futures = [pool.submit(_run_partition, func, input_specs + output_specs, task)
+                   for task in tasks]
+        results = [future.result() for future in futures]
+        outputs = [view.copy() for view in views]
+    return [outputs, results]
+
+def _argsort_partition(views, start, stop):
+    arr, order = views
+    order[start:stop] = _stable_argsort(arr[start:stop]) + start
+
+def _count_partition(views, start, stop):
+    return np.unique(views[0][start:stop], return_counts = True)
+
+def _factorize_partition(views, start, stop):
+    arr, codes = views
+    codes[start:stop], uniques = _factorize(arr[start:stop])
+    return uniques
+
+def _factorize_strings_partition(views, start, stop, low, high, sort):
+    data, nulls, codes = views
+    arr = np.empty(stop - start, dtype = 'object')
+    if stop > start:
+        arr[:] = data[low:high].tobytes().decode('utf-8').split('\x00')
+    arr[nulls[start:stop]] = None
+    local, uniques = _factorize(arr, sort = sort)
+    codes[start:stop] = local
+    rows = np.flatnonzero(local >= 0)
+    _, first = np.unique(local[rows], return_index = True)
+    return [uniques, rows[first] + start]
+
+def _merge_sorted_uniques(runs):
+    """
+    Merges sorted arrays of distinct values with a stable sort, which
+    merges the runs in O(n log k)
+
+    Returns
+    -------
+    A list of two arrays: the union of the values, and the position in it
+    of every value of the concatenated runs
+    """
+    merged = np.concatenate(runs)
+    order = np.argsort(merged, kind = 'stable')
+    ordered = merged[order]
+    new = np.ones(len(ordered), dtype = 'bool')
+    new[1:] = ordered[1:] != ordered[:-1]
+    inverse = np.empty(len(merged), dtype = 'intp')
+    inverse[order] = np.cumsum(new) - 1
+    return [ordered[new], inverse]
+
+def _combine_codes(codes, runs, ranges):
+    """
+    Maps codes, local to the sorted uniques in runs of the row range they
+    are in, to the merged uniques of all ranges
+
+    Returns
+    -------
+    A list of three arrays: the codes, the merged uniques and the position
+    in them of every value of the concatenated runs
+    """
+    uniques, remap = _merge_sorted_uniques(runs)
+    offsets = np.cumsum([0] + [len(u) for u in runs[:-1]])
+    base = np.repeat(offsets, [stop - start for start, stop in ranges])
+    missing = codes < 0
+    codes = remap[np.where(missing, 0, base + codes)] if len(remap) else codes
+    codes[missing] = -1
+    return [codes, uniques, remap]
+
+def _parallel_argsort(arr):
+    """
+    Stable argsort across worker processes: each sorts one row range, and
+    a stable sort of the concatenated sorted runs merges them, as NumPy's
+    timsort merges runs in O(n log k)
+    """
+    (order,), _ = _map_partitions(_argsort_partition, [arr],
+                                  [np.empty(len(arr), dtype = 'intp')], _row_ranges(len(arr)))
+    return order[np.argsort(arr[order], kind = 'stable')]
+
+def _parallel_unique_counts(arr):
+    """
+    np.unique(arr, return_counts = True) across worker processes: each
+    counts one row range, and the counts of equal values are summed
+    """
+    _, results = _map_partitions(_count_partition, [arr], [], _row_ranges(len(arr)))
+    uniques, inverse = _merge_sorted_uniques([u for u, _ in results])
+    counts = np.bincount(inverse, weights = np.concatenate([c for _, c in results]),
+                         minlength = len(uniques))
+    return [uniques, counts.astype('int64')]
+
+def _parallel_factorize(arr):
+    """
+    _factorize of a numeric array across worker processes: each encodes
+    one row range, and the local codes are remapped to the union of the
+    sorted uniques
+    """
+    ranges = _row_ranges(len(arr))
+    (codes,), results = _map_partitions(_factorize_partition, [arr],
+                                        [np.empty(len(arr), dtype = 'intp')], ranges)
+    codes, uniques, _ = _combine_codes(codes, results, ranges)
+    return [codes, uniques]
+
+def _parallel_factorize_strings(arr, sort = True):
+    """
+    _factorize of an object array of strings across worker processes, as
+    a sample sort: strings picked at regular intervals split the values
+    into one range per worker, so that the workers get disjoint, ordered
+    sets of strings and their sorted uniques follow one another. The
+    strings of each range are joined by NUL characters and encoded as
+    UTF-8 into shared memory, and each worker decodes and factorizes them.
+    If sort is False the workers leave their uniques in order of first
+    occurrence.
+
+    Returns
+    -------
+    A list of three arrays: the codes, the uniques and the row of
+    the first occurrence of each unique; or None if arr holds values other
+    than strings and None, or strings containing NUL characters
+    """
+    n = len(arr)
+    processes = _OPTIONS['processes']
+    if n == 0:
+        return None
+    nulls = np.asarray(arr == None, dtype = 'bool')
+    values = np.where(nulls, '', arr) if nulls.any() else arr
+    try:
+        sample = np.sort(values[::max(n // (1024 * processes), 1)])
+        splitters = sample[len(sample) * np.arange(1, processes) // processes]
+        partitions = np.searchsorted(splitters, values, side = 'right')
+    except TypeError:
+        return None
+    # A stable order keeps the rows of each partition in their order
+    order = _stable_argsort(partitions)
+    bounds = [0] + np.cumsum(np.bincount(partitions, minlength = processes)).tolist()
+    ranges = list(zip(bounds[:-1], bounds[1:]))
+    values, nulls = values[order], nulls[order]
+
+    parts, offsets = [], [0]
+    for start, stop in ranges:
+        try:
+            text = '\x00'.join(values[start:stop].tolist())
+            if text.count('\x00') != max(stop - start - 1, 0):
+                return None
+            parts.append(text.encode('utf-8'))
+        except (TypeError, UnicodeEncodeError):
+            return None
+        offsets.append(offsets[-1] + len(parts[-1]))
+    data = np.frombuffer(b''.join(parts), dtype = 'uint8')
+    del parts
+
+    tasks = [(start, stop, low, high, sort)
+             for (start, stop), low, high in zip(ranges, offsets[:-1], offsets[1:])]
+    (codes,), results = _map_partitions(_factorize_strings_partition, [data, nulls],
+                                        [np.empty(n, dtype = 'intp')], tasks)
+    # The uniques of each range come after those of the previous one
+    sizes = [len(uniques) for uniques, _ in results]
+    base = np.repeat(np.cumsum([0] + sizes[:-1]), np.diff(bounds))
+    result = np.empty(n, dtype = 'intp')
+    result[order] = np.where(codes < 0, -1, codes + base)
+    uniques = np.concatenate([uniques for uniques, _ in results])
+    first = order[np.concatenate([rows for _, rows in results])]
+    return [result, uniques, first]
+
+def _is_missing_scalar(x):
+    return x is None or (isinstance(x, float) and x != x)
+
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype = 'uint8')
+
+def _pack_validity(valid):
+    """
+    Packs a boolean validity array into a bitmap with np.packbits
+
+    Returns
+    -------
+    The packed bitmap, or None when every value is valid
+    """
+    if valid.all():
+        return None
+    return np.packbits(valid)
+
+def _unpack_validity(packed, length):
+    return np.unpackbits(packed, count = length).view('bool')
+
+def _count_valid(packed):
+    """
+    Number of valid values in a packed bitmap, counted per byte
+    """
+    return int(_POPCOUNT[packed].sum(dtype = 'int64'))
+
+def _unique_counts(arr, dropna = False, sort = True, categories = None, valid = None):
+    """
+    Counts the occurrences of every distinct value in a 1-dimensional array.
+
+    Boolean and small-range integer arrays are counted with np.bincount,
+    other numeric arrays with np.unique (split across worker processes
+    when the processes option allows it), and object arrays are hashed in
+    bulk through collections.Counter. Missing values (NaN, None and the
+    values flagged invalid) are collected into a single entry unless
+    dropna is True.
+
+    Parameters
+    ----------
+    arr: np.ndarray
+    dropna: bool
+        If True, missing values are not counted
+    sort: bool
+        If True, uniques are ordered by descending count (ties keep
+        their original order)
+    categories: np.ndarray
+        If given, arr holds the codes of a categorical column with these
+        categories, which are counted with np.bincount
+    valid: np.ndarray
+        Boolean array flagging the valid values of arr, if it has nulls
+
+    Returns
+    -------
+    A list of two arrays: the unique values and their counts. The missing
+    entry of an integer or boolean array is masked in a np.ma.MaskedArray
+    """
+    n_missing = 0
+    if valid is not None:
+        n_missing = len(arr) - int(valid.sum())
+        arr = arr[valid]
+    kind = arr.dtype.kind
+
+    if categories is not None:
+        counts = np.bincount(arr.astype('intp') + 1, minlength = len(categories) + 1)
+        n_missing += counts[0]
+        present = counts[1:] > 0
+        uniques = categories[present]
+        counts = counts[1:][present]
+    elif kind == 'O':
+        # Not split across processes: handing the strings to the workers
+        # costs about as much as counting them here
+        counter = Counter(arr.tolist())
+        keys, counts = [], []
+        for key, count in counter.items():
+            if _is_missing_scalar(key):
+                n_missing += count
+            else:
+                keys.append(key)
+                counts.append(count)
+        uniques = np.empty(len(keys), dtype = 'object')
+        uniques[:] = keys
+        counts = np.array(counts, dtype = 'int64')
+    elif kind == 'b':
+        counts = np.bincount(arr.view('uint8'), minlength = 2)
+        uniques = np.array([False, True])
+        present = counts > 0
+        uniques, counts = uniques[present], counts[present]
+    elif kind in 'iu' and len(arr) > 0 and \
+            int(arr.max()) - int(arr.min()) <= 2 * len(arr):
+        # Offsets are taken in int64, as they can overflow narrow types
+        wide, low = _widen(arr), arr.min()
+        counts = np.bincount((wide - low).astype('intp'))
+        uniques = (np.flatnonzero(counts).astype(wide.dtype) + low).astype(arr.dtype)
+        counts = counts[counts > 0]
+    elif kind in 'fc':
+        nan_mask = np.isnan(arr)
+        n_missing += int(nan_mask.sum())
+        uniques, counts = _sorted_counts(arr[~nan_mask])
+    else:
+        uniques, counts = _sorted_counts(arr)
+
+    if n_missing and not dropna:
+        counts = np.append(counts, n_missing)
+        if uniques.dtype.kind in 'Ofc':
+            uniques = np.append(uniques, None if uniques.dtype.kind == 'O' else np.nan)
+            uniques = uniques.astype(arr.dtype if categories is None else 'object')
+        else:
+            mask = np.zeros(len(uniques) + 1, dtype = 'bool')
+            mask[-1] = True
+            uniques = np.ma.MaskedArray(np.concatenate([uniques, np.zeros(1, uniques.dtype)]),
+                                        mask = mask)
+
+    counts = counts.astype('int64')
+    if sort:
+        order = np.argsort(-counts, kind = 'stable')
+        uniques = uniques[order]
+        counts = counts[order]
+
+    return [uniques, counts]
+
+def _sorted_counts(arr):
+    if _use_processes(arr):
+        return _parallel_unique_counts(arr)
+    return np.unique(arr, return_counts = True)
+
+def _factorize(arr, sort = True, categories = None, strict = False):
+    """
+    Encodes a 1-dimensional array as integer codes into its unique values.
+
+    Boolean and small-range integer arrays are encoded with np.bincount,
+    other numeric arrays with np.unique, and object arrays are hashed in
+    bulk with a dictionary; numeric and string arrays are split across
+    worker processes when the processes option allows it. Missing values (NaN and None) get the code -1.
+
+    Parameters
+    ----------
+    arr: np.ndarray
+    sort: bool
+        If True, the uniques of object arrays are sorted when their values
+        are comparable. Numeric uniques are always sorted.
+    categories: np.ndarray
+        If given, arr holds the codes of a categorical column with these
+        categories, and is re-encoded without hashing any value
+    strict: bool
+        If True, object values that cannot be compared raise the TypeError
+        of their sort, instead of keeping the order of first occurrence
+
+    Returns
+    -------
+    A list of two arrays: the codes (np.intp) and the unique values
+    """
+    if categories is not None:
+        present = np.zeros(len(categories) + 1, dtype = 'bool')
+        present[arr] = True
+        rank = np.cumsum(present[:-1]) - 1
+        rank = np.append(rank, -1)
+        return [rank[arr].astype('intp'), categories[present[:-1]]]
+
+    kind = arr.dtype.kind
+
+    if kind == 'O':
+        result = _parallel_factorize_strings(arr, sort) if _use_processes(arr) else None
+        if result is not None:
+            codes, uniques, first = result
+            if sort:
+                return [codes, uniques]
+            # Order of first occurrence, as the dictionary gives
+            order = np.argsort(first, kind = 'stable')
+            rank = np.empty(len(order) + 1, dtype = 'intp')
+            rank[order] = np.arange(len(order))
+            rank[-1] = -1
+            return [rank[codes], uniques[order]]
+
+        values = arr.tolist()
+        table = dict.fromkeys(values)
+        keys = [k for k in table if not _is_missing_scalar(k)]
+        if sort:
+            try:
+                keys.sort()
+            except TypeError:
+                if strict:
+                    raise
+        mapping = {k: -1 for k in table}
+        mapping.update(zip(keys, range(len(keys))))
+        codes = np.fromiter(map(mapping.__getitem__, values), dtype = 'intp',
+                            count = len(values))
+        uniques = np.empty(len(keys), dtype = 'object')
+        uniques[:] = keys
+        return [codes, uniques]
+
+    if len(arr) > 0 and (kind == 'b' or (kind in 'iu' and
+                         int(arr.max()) - int(arr.min()) <= 2 * len(arr))):
+        # Offsets are taken in int64, as they can overflow narrow types
+        wide, low = _widen(arr), arr.min()
+        offsets = (wide - low).astype('intp') if kind != 'b' else arr.view('uint8')
+        present = np.bincount(offsets) > 0
+        rank = np.cumsum(present) - 1
+        uniques = np.flatnonzero(present)
+        if kind == 'b':
+            uniques = uniques.astype('bool')
+        else:
+            uniques = (uniques.astype(wide.dtype) + low).astype(arr.dtype)
+        return [rank[offsets].astype('intp'), uniques]
+
+    if _use_processes(arr):
+        return _parallel_factorize(arr)
+
+    if kind in 'fc':
+        nan_mask = np.isnan(arr)
+        if nan_mask.any():
+            codes = np.full(len(arr), -1, dtype = 'intp')
+            uniques, codes[~nan_mask] = np.unique(arr[~nan_mask], return_inverse = True)
+            return [codes, uniques]
+
+    uniques, codes = np.unique(arr, return_inverse = True)
+    return [codes.astype('intp'), uniques]
+
+def _factorize_valid(arr, categories = None, valid = None):
+    """
+    Factorizes only the valid values of arr; invalid values get the code -1
+    """
+    if valid is None:
+        return _factorize(arr, categories = categories)
+    codes = np.full(len(arr), -1, dtype = 'intp')
+    codes[valid], uniques = _factorize(arr[valid], categories = categories)
+    return [codes, uniques]
+
+def _group_codes(arrays, categories = None, validity = None):
+    """
+    Factorizes one or more key arrays of equal length into a single
+    array of group codes. Groups are ordered by their key values and
+    rows with a missing value in any key get the code -1. categories
+    holds the categories of each key that is categorical, or None, and
+    validity the validity array of each key that has nulls, or None.
+
+    Returns
+    -------
+    A list of the group codes, the number of groups and a list holding
+    the key values of every group (one array per key)
+    """
+    if categories is None:
+        categories = [None] * len(arrays)
+    if validity is None:
+        validity = [None] * len(arrays)
+
+    codes, uniques = _factorize_valid(arrays[0], categories[0], validity[0])
+    if len(arrays) == 1:
+        return [codes, len(uniques), [uniques]]
+
+    combined = codes.astype('int64')
+    missing = codes < 0
+    size = max(len(uniques), 1)
+    for arr, cats, valid in zip(arrays[1:], categories[1:], validity[1:]):
+        codes, uniques = _factorize_valid(arr, cats, valid)
+        missing |= codes < 0
+        if size * max(len(uniques), 1) >= 2 ** 62:
+            # Compress the combined codes before they overflow
+            _, combined = np.unique(combined, return_inverse = True)
+            size = int(combined.max()) + 1 if len(combined) else 1
+        combined = combined * len(uniques) + codes
+        size *= max(len(uniques), 1)
+
+    valid = np.flatnonzero(~missing)
+    _, first, group = np.unique(combined[valid], return_index = True,
+                                return_inverse = True)
+    codes = np.full(len(combined), -1, dtype = 'intp')
+    codes[valid] = group
+    first_rows = valid[first]
+
+    key_values = []
+    for arr, cats in zip(arrays, categories):
+        values = arr[first_rows]
+        key_values.append(values if cats is None else _decode_categorical(values, cats))
+
+    return [codes, len(first_rows), key_values]
+
+# Aggregations whose per-column results are kept in the statistics cache
+_CACHED_AGGS = {np.min: 'min', np.max: 'max'}
+
+# Operators that compare, and so need no widening of compacted integers
+_COMPARISONS = ('__eq__', '__ne__', '__lt__', '__le__', '__gt__', '__ge__')
+
+_CATEGORICAL_MAX_RATIO = 0.5
+
+def _codes_dtype(n_categories):
+    """
+    Smallest signed integer type that can index n_categories categories
+    """
+    for dtype in ('int8', 'int16', 'int32'):
+        if n_categories <= np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype('int64')
+
+def _encode_categorical(arr):
+    """
+    Dictionary-encodes an array of strings
+
+    Returns
+    -------
+    A list of the integer codes (-1 for missing values) and the
+    categories, which are sorted when they are comparable
+    """
+    if arr.dtype.kind == 'U':
+        arr = arr.astype('object')
+    codes, categories = _factorize(arr)
+    return [codes.astype(_codes_dtype(len(categories))), categories]
+
+def _decode_categorical(codes, categories):
+    """
+    Turns categorical codes back into an object array, with None for
+    missing values
+    """
+    lookup = np.empty(len(categories) + 1, dtype = 'object')
+    lookup[:-1] = categories
+    return lookup[codes]
+
+def _is_low_cardinality(arr):
+    """
+    Checks on a sample whether an array holds strings with few enough
+    distinct values to be worth dictionary-encoding
+    """
+    if len(arr) == 0 or arr.dtype.kind not in 'OU':
+        return False
+    sample = arr[:10000].tolist()
+    if arr.dtype.kind == 'O' and not all(isinstance(v, str) or v is None for v in sample):
+        return False
+    return len(set(sample)) <= _CATEGORICAL_MAX_RATIO * len(sample)
+
+_SMALL_INTS = [np.dtype('int8'), np.dtype('int16'), np.dtype('int32')]
+
+def _widen(arr):
+    """
+    Integer arrays narrower than 64 bits as int64, so that computations on
+    compacted columns cannot overflow. Other arrays are returned as they are
+    """
+    if arr.dtype.kind in 'iu' and arr.dtype.itemsize < 8:
+        return arr.astype('int64')
+    return arr
+
+def _downcast(arr, valid = None):
+    """
+    The array in the smallest type that holds its values exactly: int8,
+    int16 or int32 for integer arrays, and float32 for float arrays whose
+    values all survive the round trip. Other arrays are returned as they
+    are. Only the valid entries are considered, and invalid ones are
+    zeroed so they cannot overflow.
+    """
+    kind = arr.dtype.kind
+    if kind not in 'iuf' or len(arr) == 0:
+        return arr
+    if valid is not None:
+        arr = np.where(valid, arr, 0)
+
+    if kind == 'f':
+        if arr.dtype.itemsize <= 4:
+            return arr
+        with np.errstate(over = 'ignore'):
+            small = arr.astype('float32')
+        if np.array_equal(small.astype(arr.dtype), arr, equal_nan = True):
+            return small
+        return arr
+
+    low, high = int(arr.min()), int(arr.max())
+    for dtype in _SMALL_INTS:
+        if dtype.itemsize >= arr.dtype.itemsize:
+            break
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return arr.astype(dtype)
+    return arr
+
+_FNV_OFFSET = np.uint64(14695981039346656037)
+_FNV_PRIME = np.uint64(1099511628211)
+
+def _mix64(h):
+    """
+    The splitmix64 finalizer, spreading every input bit over all output bits
+    """
+    h = (h ^ (h >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    h = (h ^ (h >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return h ^ (h >> np.uint64(31))
+
+def _hash64(arr, block = 65536):
+    """
+    64-bit hashes of the values of an array, computed with NumPy and the
+    same in every process, unlike hash() of strings. Numbers are hashed
+    by their bits, and strings with FNV-1a over their code points, one
+    character position at a time across a block of strings.
+    """
+    kind = arr.dtype.kind
+    if kind == 'f':
+        # Adding 0.0 turns -0.0 into 0.0
+        return _mix64((arr.astype('float64') + 0.0).view('uint64'))
+    if kind in 'iub':
+        return _mix64(arr.astype('int64').view('uint64'))
+
+    hashes = np.empty(len(arr), dtype = 'uint64')
+    for start in range(0, len(arr), block):
+        points = arr[start:start + block].astype('U')
+        width = points.dtype.itemsize // 4
+        points = points.view('uint32').reshape(len(points), width)
+        h = np.full(len(points), _FNV_OFFSET, dtype = 'uint64')
+        for j in range(width):
+            # Shorter strings are padded with zeros, which are skipped
+            c = points[:, j].astype('uint64')
+            h = np.where(c == 0, h, (h ^ c) * _FNV_PRIME)
+        hashes[start:start + block] = h
+    return _mix64(hashes)
+
+def _take(arr, indexer, categorical = False, valid = None):
+    """
+    Gathers the values of arr at the positions in indexer. Positions equal
+    to -1 are filled with a missing value: NaN for float arrays, None for
+    object arrays, the code -1 for the codes of a categorical column, and
+    an invalid entry for integer and boolean arrays.
+
+    Returns
+    -------
+    A list of the gathered values and their validity array, which is None
+    when no value is invalid
+    """
+    missing = indexer < 0
+    has_missing = missing.any()
+    safe = np.where(missing, 0, indexer) if has_missing else indexer
+
+    if len(arr) > 0:
+        out = arr[safe]
+    else:
+        out = np.zeros(len(indexer), dtype = arr.dtype)
+    out_valid = valid[safe] if valid is not None and len(arr) > 0 else None
+
+    if has_missing:
+        kind = out.dtype.kind
+        if categorical:
+            out[missing] = -1
+        elif kind in 'fc':
+            out[missing] = np.nan
+        elif kind == 'O':
+            out[missing] = None
+        if out_valid is not None:
+            out_valid = out_valid & ~missing
+        elif kind in 'biu' and not categorical:
+            out_valid = ~missing
+
+    return [out, out_valid]
+
+def _lookup(uniques, arr, categories = None):
+    """
+    Finds the position of every value of arr in uniques, or -1 when the
+    value is missing from it. If categories is given, arr holds the codes
+    of a categorical column and only its categories are looked up.
+    """
+    if categories is not None:
+        positions = np.append(_lookup(uniques, categories), -1)
+        return positions[arr].astype('intp')
+
+    if uniques.dtype.kind == 'O' or arr.dtype.kind == 'O':
+        mapping = dict(zip(uniques.tolist(), range(len(uniques))))
+        return np.fromiter(map(mapping.get, arr.tolist(), repeat(-1)),
+                           dtype = 'intp', count = len(arr))
+
+    if len(uniques) == 0:
+        return np.full(len(arr), -1, dtype = 'intp')
+    pos = np.searchsorted(uniques, arr)
+    found = uniques[np.minimum(pos, len(uniques) - 1)] == arr
+    return np.where(found, pos, -1).astype('intp')
+
+def _join_codes(left_arrays, right_arrays, left_categories, right_categories,
+                left_validity, right_validity):
+    """
+    Encodes the join keys of both sides as shared integer codes. The hash
+    table is built by factorizing the shorter side, and the keys of the
+    longer side are probed against it. Keys that are missing, or that do
+    not occur on the build side, get the code -1. The categories and
+    validity lists hold the categories and validity array of each key, or None.
+
+    Returns
+    -------
+    A list of the left codes, the right codes and the number of codes
+    """
+    swap = len(right_arrays[0]) < len(left_arrays[0])
+    build, probe = (right_arrays, left_arrays) if swap else (left_arrays, right_arrays)
+    build_cats, probe_cats = (right_categories, left_categories) if swap else \
+        (left_categories, right_categories)
+    build_valid, probe_valid = (right_validity, left_validity) if swap else \
+        (left_validity, right_validity)
+
+    build_codes, probe_codes, size = None, None, 0
+    for build_arr, probe_arr, build_cat, probe_cat, build_ok, probe_ok in zip(
+            build, probe, build_cats, probe_cats, build_valid, probe_valid):
+        codes, uniques = _factorize_valid(build_arr, build_cat, build_ok)
+        probe_codes_ = _lookup(uniques, probe_arr, probe_cat)
+        if probe_ok is not None:
+            probe_codes_[~probe_ok] = -1
+
+        if build_codes is None:
+            build_codes, probe_codes = codes, probe_codes_
+            size = len(uniques)
+            continue
+
+        build_codes = np.where((build_codes < 0) | (codes < 0), -1,
+                               build_codes.astype('int64') * len(uniques) + codes)
+        probe_codes = np.where((probe_codes < 0) | (probe_codes_ < 0), -1,
+                               probe_codes.astype('int64') * len(uniques) + probe_codes_)
+
+        # Compress the combined codes so they stay dense
+        combined = np.unique(build_codes[build_codes >= 0])
+        build_codes = _lookup(combined, build_codes)
+        probe_codes = _lookup(combined, probe_codes)
+        size = len(combined)
+
+    if swap:
+        return [probe_codes, build_codes, size]
+    return [build_codes, probe_codes, size]
+
+def _expand_matches(first, n_match, order, keep_unmatched):
+    """
+    Expands per-row match ranges into pairs of row positions.
+
+    Row i of the driving side matches the rows order[first[i]:first[i] + n_match[i]]
+    of the other side. If keep_unmatched is True, rows without a match are
+    paired with -1.
+    """
+    n_rows = np.maximum(n_match, 1) if keep_unmatched else n_match
+    driver_idx = np.repeat(np.arange(len(n_match)), n_rows)
+    offsets = np.arange(len(driver_idx)) - np.repeat(np.cumsum(n_rows) - n_rows, n_rows)
+    positions = np.repeat(first, n_rows) + offsets
+
+    if len(order) == 0:
+        other_idx = np.full(len(driver_idx), -1, dtype = 'intp')
+    else:
+        other_idx = order[np.minimum(positions, len(order) - 1)]
+        if keep_unmatched:
+            other_idx[np.repeat(n_match == 0, n_rows)] = -1
+
+    return [driver_idx, other_idx]
+
+def _hash_join_indexers(driver_codes, other_codes, size, keep_unmatched):
+    valid = other_codes >= 0
+    order = np.argsort(other_codes, kind = 'stable')[len(other_codes) - valid.sum():]
+    counts = np.bincount(other_codes[valid], minlength = size)
+    starts = np.cumsum(counts) - counts
+
+    present = driver_codes >= 0
+    first = np.zeros(len(driver_codes), dtype = 'intp')
+    n_match = np.zeros(len(driver_codes), dtype = 'intp')
+    first[present] = starts[driver_codes[present]]
+    n_match[present] = counts[driver_codes[present]]
+
+    return _expand_matches(first, n_match, order, keep_unmatched)
+
+def _is_sorted(arrays):
+    """
+    Checks whether the rows formed by the arrays are in ascending
+    lexicographic order, without any missing values
+    """
+    if len(arrays[0]) < 2:
+        return True
+
+    try:
+        ordered = np.zeros(len(arrays[0]) - 1, dtype = 'bool')
+        equal = np.ones(len(arrays[0]) - 1, dtype = 'bool')
+        for arr in arrays:
+            if arr.dtype.kind == 'f' and np.isnan(arr).any():
+                return False
+            ordered |= equal & np.asarray(arr[1:] > arr[:-1], dtype = 'bool')
+            equal &= np.asarray(arr[1:] == arr[:-1], dtype = 'bool')
+        return bool(np.all(ordered | equal))
+    except TypeError:
+        return False
+
+def _sort_keys(left_arrays, right_arrays):
+    """
+    Turns sorted multi-column keys into a single searchsorted-able key on
+    each side: a structured array whose fields compare lexicographically.
+    Object columns are replaced by order-preserving integer codes.
+    """
+    if len(left_arrays) == 1:
+        return [left_arrays[0], right_arrays[0]]
+
+    fields_left, fields_right = [], []
+    for left_arr, right_arr in zip(left_arrays, right_arrays):
+        if left_arr.dtype.kind == 'O' or right_arr.dtype.kind == 'O':
+            codes, _ = _factorize(np.concatenate([left_arr, right_arr]))
+            left_arr, right_arr = codes[:len(left_arr)], codes[len(left_arr):]
+        fields_left.append(left_arr)
+        fields_right.append(right_arr)
+
+    return [np.rec.fromarrays(fields_left), np.rec.fromarrays(fields_right)]
+
+def _sort_join_indexers(driver_keys, other_keys, keep_unmatched):
+    lo = np.searchsorted(other_keys, driver_keys, 'left')
+    hi = np.searchsorted(other_keys, driver_keys, 'right')
+    order = np.arange(len(other_keys))
+    return _expand_matches(lo, hi - lo, order, keep_unmatched)
+
+def _shift(arr, n):
+    """
+    The values of arr as floats, moved down by n positions (up for a
+    negative n), with NaN in the positions left empty
+    """
+    length = len(arr)
+    out = np.empty(length, dtype = 'float64')
+    k = min(abs(n), length)
+    if n >= 0:
+        out[:k] = np.nan
+        out[k:] = arr[:length - k]
+    else:
+        out[length - k:] = np.nan
+        out[:length - k] = arr[k:]
+    return out
+
+def _accumulate(ufunc, identity, arr):
+    """
+    Cumulative ufunc of arr that skips NaN, leaving NaN at their positions
+    """
+    arr = _widen(arr)
+    if arr.dtype.kind == 'f':
+        missing = np.isnan(arr)
+        if missing.any():
+            out = ufunc.accumulate(np.where(missing, identity, arr))
+            out[missing] = np.nan
+            return out
+    return ufunc.accumulate(arr)
+
+def _window_sums(arr, window):
+    """
+    Sums of the last window values at every position, so the cost does
+    not depend on the window size. The array is cut into blocks of window
+    values, and each window is the sum of a suffix of one block and a
+    prefix of the next. Rounding errors stay within a block, rather than
+    carrying along a single prefix sum whose differences would cancel.
+    """
+    arr = _widen(arr)
+    n = len(arr)
+    if n == 0:
+        return arr.copy()
+    window = min(window, n)
+    blocks = -(-n // window)
+    padded = np.zeros(blocks * window, dtype = arr.dtype)
+    padded[:n] = arr
+    padded = padded.reshape(blocks, window)
+    sums = np.cumsum(padded, axis = 1).ravel()[:n]
+    suffixes = np.cumsum(padded[:, ::-1], axis = 1)[:, ::-1].ravel()
+
+    # Windows not aligned with a block also cover the end of the previous one
+    positions = np.arange(window, n)
+    positions = positions[(positions + 1) % window != 0]
+    sums[positions] += suffixes[positions - window + 1]
+    return sums
+
+def _window_extreme(ufunc, identity, arr, window):
+    """
+    Minimum (ufunc = np.minimum) or maximum (np.maximum) of the last window
+    values at every position, in O(n) for any window size.
+
+    This is the van Herk/Gil-Werman scheme: the array is cut into blocks of
+    window values, and every window spans the end of one block and the
+    start of the next one, so it is the extreme of a suffix extreme and a
+    prefix extreme, both computed with one accumulate per block.
+    """
+    length = len(arr)
+    window = min(window, length)
+    if length == 0:
+        return arr.copy()
+
+    n_blocks = -(-length // window)
+    padded = np.full(n_blocks * window, identity, dtype = arr.dtype)
+    padded[:length] = arr
+    blocks = padded.reshape(n_blocks, window)
+    prefix = ufunc.accumulate(blocks, axis = 1).ravel()
+    suffix = ufunc.accumulate(blocks[:, ::-1], axis = 1)[:, ::-1].ravel()
+
+    out = np.empty(length, dtype = arr.dtype)
+    # Windows that are not full yet cover the start of the first block only
+    out[:window - 1] = prefix[:window - 1]
+    starts = np.arange(length - window + 1)
+    out[window - 1:] = ufunc(suffix[starts], prefix[starts + window - 1])
+    return out
+
+
+def _ascending_key(arr, missing, descending = False):
+    """
+    An array whose ascending order is the order of arr, or the reverse
+    order if descending. Strings are replaced by their rank, and missing
+    positions hold arbitrary values.
+    """
+    kind = arr.dtype.kind
+    if kind == 'O':
+        # Values that cannot be ordered raise, as np.argsort would
+        arr = _factorize(arr, strict = True)[0]
+    elif kind == 'f' and missing.any():
+        arr = np.where(missing, 0, arr)
+    if not descending:
+        return arr
+    if kind == 'f':
+        return -arr
+    # Bitwise not reverses the order of integers without overflowing
+    return ~arr
+
+def _ranges(starts, ends):
+    """
+    The concatenation of the integer ranges [start, end) as one array
+    """
+    lengths = np.maximum(ends - starts, 0)
+    offsets = np.cumsum(lengths) - lengths
+    return np.repeat(starts - offsets, lengths) + np.arange(lengths.sum())
+
+def _stable_argsort(arr):
+    """
+    Stable argsort. Integer and boolean arrays spanning fewer than 2**16
+    values are offset into uint8 or uint16, which NumPy sorts with a radix
+    sort in linear time. Other numeric arrays are split across worker
+    processes when the processes option allows it
+    """
+    if arr.dtype.kind in 'biu' and len(arr) > 0:
+        if arr.dtype.kind == 'b':
+            arr = arr.view('uint8')
+        low, high = int(arr.min()), int(arr.max())
+        if high - low < 2 ** 16:
+            arr = (arr - low).astype('uint8' if high - low < 2 ** 8 else 'uint16')
+    if arr.dtype.kind != 'O' and arr.dtype.itemsize > 2 and _use_processes(arr):
+        return _parallel_argsort(arr)
+    return np.argsort(arr, kind = 'stable')
+
+def _stable_order(keys):
+    """
+    Stable permutation that sorts rows by several key arrays, most
+    significant first. Integer keys whose combined range fits in 64 bits
+    are merged into one mixed-radix key and sorted in a single pass,
+    other keys are sorted with np.lexsort
+    """
+    if len(keys) == 1:
+        return _stable_argsort(keys[0])
+
+    if all(k.dtype.kind in 'biu' and k.dtype != np.uint64 for k in keys) and len(keys[0]) > 0:
+        lows = [int(k.min()) for k in keys]
+        spans = [int(k.max()) - low + 1 for k, low in zip(keys, lows)]
+        total = 1
+        for span in spans:
+            total *= span
+        if total < 2 ** 63:
+            combined = np.zeros(len(keys[0]), dtype = 'int64')
+            for k, low, span in zip(keys, lows, spans):
+                combined *= span
+                combined += k.astype('int64') - low
+            return _stable_argsort(combined)
+
+    return np.lexsort(keys[::-1])
+
+class Rolling:
+    """
+    Moving-window calculations over the rows of a DataTable, created by
+    DataTable.rolling and DataTable.expanding.
+
+    Sums, means and standard deviations come from prefix sums, and minimums
+    and maximums from block-wise accumulations, so the cost of every
+    function is linear in the number of rows whatever the window size.
+    Missing values are skipped, and a position with fewer than min_periods
+    values in its window is NaN. Results are floats, and string columns are
+    passed through unchanged.
+    """
+
+    def __init__(self, table, window, min_periods = None):
+        if not isinstance(window, int) or isinstance(window, bool) or window < 1:
+            raise ValueError("window must be a positive integer")
+        if min_periods is None:
+            min_periods = window
+        if not isinstance(min_periods, int) or min_periods < 1:
+            raise ValueError("min_periods must be a positive integer")
+
+        self._table = table
+        self._window = window
+        self._min_periods = min_periods
+
+    def _apply(self, func):
+        def window_func(value):
+            value = value.astype('float64')
+            missing = np.isnan(value)
+            counts = _window_sums((~missing).astype('int64'), self._window)
+            result = func(value, missing, counts)
+            result[counts < self._min_periods] = np.nan
+            return result
+
+        return self._table._non_agg(window_func, materialize = True)
+
+    def _sums(self, value, missing):
+        return _window_sums(np.where(missing, 0, value), self._window)
+
+    def count(self):
+        return self._apply(lambda value, missing, counts: counts.astype('float64'))
+
+    def sum(self):
+        return self._apply(lambda value, missing, counts: self._sums(value, missing))
+
+    def mean(self):
+        def mean(value, missing, counts):
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                return self._sums(value, missing) / counts
+
+        return self._apply(mean)
+
+    def var(self):
+        def var(value, missing, counts):
+            # Centering first limits the cancellation between the sums
+            if (~missing).any():
+                value = value - np.mean(value[~missing])
+            sums = self._sums(value, missing)
+            squares = _window_sums(np.where(missing, 0, value * value), self._window)
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                result = (squares - sums * sums / counts) / counts
+            # Rounding can leave tiny negative variances
+            np.maximum(result, 0, where = ~np.isnan(result), out = result)
+            result[counts == 1] = 0
+            return result
+
+        return self._apply(var)
+
+    def std(self):
+        return self.var()._non_agg(np.sqrt)
+
+    def min(self):
+        return self._apply(lambda value, missing, counts: _window_extreme(
+            np.minimum, np.inf, np.where(missing, np.inf, value), self._window))
+
+    def max(self):
+        return self._apply(lambda value, missing, counts: _window_extreme(
+            np.maximum, -np.inf, np.where(missing, -np.inf, value), self._window))
+
+
+# NumPy 2 has string ufuncs in np.strings, older versions the slower np.char
+_STRINGS = getattr(np, 'strings', np.char)
+
+def _slice_strings(arr, start, stop, step):
+    if hasattr(_STRINGS, 'slice'):
+        return _STRINGS.slice(arr, start, stop, step)
+    return np.array([s[start:stop:step] for s in arr.tolist()], dtype = 'U')
+
+
+class ReservoirSampler:
+    """
+    Keeps a uniform random sample of k rows from a stream of DataTables,
+    such as the chunks of a ChunkedDataTable, in memory bounded by k rows
+    and one chunk.
+
+    Every row of a chunk is considered at once: the row with stream
+    position t (from 0) draws a slot in [0, t] and replaces the row in
+    that slot when it is below k, as in reservoir sampling's Algorithm R.
+    """
+
+    def __init__(self, k, seed = None):
+        """
+        Parameters:
+        -----------
+        k: int
+            Number of rows to keep
+        seed: int or np.random.Generator
+            Seed for the random number generator, or the generator itself
+        """
+        if not isinstance(k, int) or isinstance(k, bool) or k < 1:
+            raise ValueError("k must be a positive integer")
+        self.k = k
+        self.count = 0
+        self._sample = None
+        self._rng = np.random.default_rng(seed)
+
+    def update(self, table):
+        """
+        Offers the rows of a DataTable, which must have the same columns as
+        the ones before
+
+        Returns:
+        --------
+        The sampler itself
+        """
+        if not isinstance(table, DataTable):
+            raise TypeError("Can only sample rows of DataTables")
+        if len(table) == 0:
+            return self
+
+        positions = np.arange(self.count, self.count + len(table))
+        slots = self._rng.integers(0, positions + 1)
+        # The first k rows fill the reservoir
+        slots = np.where(positions < self.k, positions, slots)
+        accepted = np.flatnonzero(slots < self.k)
+        # A later row replaces an earlier one drawing the same slot
+        slots, last = np.unique(slots[accepted][::-1], return_index = True)
+        rows = accepted[::-1][last]
+
+        kept = 0 if self._sample is None else len(self._sample)
+        index = np.arange(min(self.k, self.count + len(table)))
+        index[slots] = kept + np.arange(len(rows))
+        new = table._take_rows(rows)
+        combined = new if self._sample is None else concat([self._sample, new])
+        self._sample = combined._take_rows(index)
+        self.count += len(table)
+        return self
+
+    def result(self):
+        """
+        Returns
+        -------
+        A DataTable of the sampled rows, min(k, count) of them, or None
+        before any row was offered
+        """
+        return self._sample
+
+
+class StringMethods:
+    """
+    Vectorized string functions over the string columns of a DataTable,
+    created by DataTable.str. Other columns are left out of the results.
+
+    Categorical columns are processed once per category, and the results
+    gathered by code. Other string columns are converted to a NumPy unicode
+    array and processed by the string ufuncs of np.strings, and values a
+    function leaves unchanged keep their original objects.
+
+    Missing values stay missing: they are None in string results, and null
+    in boolean and integer results. isna reports those nulls, and a boolean
+    result used as a filter leaves their rows out.
+    """
+
+    def __init__(self, table):
+        self._table = table
+
+    def _columns(self):
+        return [col for col, val in self._table._data.items()
+                if col in self._table._categories or val.dtype.kind == 'O']
+
+    def _apply(self, func, strings):
+        """
+        Applies func, a function of a unicode array, to every string column
+
+        Parameters
+        ----------
+        func: the function, returning an array of the same length
+        strings: whether func returns strings, rather than booleans or
+            integers
+        """
+        table = self._table
+        data = {}
+        categories = {}
+        validity = {}
+        for col in self._columns():
+            val = table._data[col]
+            if col in table._categories:
+                cats = table._categories[col]
+                result = func(cats.astype('U'))
+                missing = val < 0
+                # Missing codes pick the extra last slot
+                if strings:
+                    result, categories[col] = _encode_categorical(result)
+                    data[col] = np.append(result, -1).astype(result.dtype)[val]
+                else:
+                    data[col] = np.append(result, np.zeros(1, dtype = result.dtype))[val]
+            else:
+                missing = table._missing(col)
+                present = ~missing
+                original = val[present].astype('U')
+                result = func(original)
+                if strings:
+                    out = val.copy()
+                    changed = result != original
+                    out[np.flatnonzero(present)[changed]] = result[changed].astype('object')
+                    data[col] = out
+                else:
+                    out = np.zeros(len(val), dtype = result.dtype)
+                    out[present] = result
+                    data[col] = out
+            if not strings:
+                packed = _pack_validity(~missing)
+                if packed is not None:
+                    validity[col] = packed
+
+        return DataTable._new(data, categories, validity)
+
+    def lower(self):
+        return self._apply(_STRINGS.lower, strings = True)
+
+    def upper(self):
+        return self._apply(_STRINGS.upper, strings = True)
+
+    def strip(self, chars = None):
+        """
+        Removes leading and trailing whitespace, or the characters in chars
+        """
+        return self._apply(lambda arr: _STRINGS.strip(arr, chars), strings = True)
+
+    def replace(self, old, new, count = -1):
+        """
+        Replaces occurrences of the substring old with new, only the first
+        count ones if count is not -1
+        """
+        return self._apply(lambda arr: _STRINGS.replace(arr, old, new, count), strings = True)
+
+    def slice(self, start = None, stop = None, step = None):
+        """
+        Takes s[start:stop:step] of every string s
+        """
+        return self._apply(lambda arr: _slice_strings(arr, start, stop, step), strings = True)
+
+    def contains(self, sub):
+        """
+        Whether each string contains the substring sub, matched literally
+        """
+        return self._apply(lambda arr: _STRINGS.find(arr, sub) >= 0, strings = False)
+
+    def startswith(self, prefix):
+        return self._apply(lambda arr: _STRINGS.startswith(arr, prefix), strings = False)
+
+    def endswith(self, suffix):
+        return self._apply(lambda arr: _STRINGS.endswith(arr, suffix), strings = False)
+
+    def len(self):
+        """
+        The number of characters of each string
+        """
+        return self._apply(_STRINGS.str_len, strings = False)
+
+    def split(self, sep = None, maxsplit = -1):
+        """
+        Splits every string around sep, as str.split does
+
+        Returns:
+        --------
+        A DataTable with the parts of each column in columns named
+        '<column>_0', '<column>_1', ..., holding None for the rows with
+        fewer parts and for missing values
+        """
+        table = self._table
+        data = {}
+        for col in self._columns():
+            val = table._data[col]
+            if col in table._categories:
+                strings, codes = table._categories[col], val
+            else:
+                # The present values are split, and coded by their position
+                present = ~table._missing(col)
+                strings = val[present]
+                codes = np.full(len(val), -1, dtype = 'intp')
+                codes[present] = np.arange(len(strings))
+
+            parts = [str(s).split(sep, maxsplit) for s in strings.tolist()]
+            width = max(map(len, parts), default = 0)
+            for i in range(width):
+                # The extra last slot decodes missing codes to None
+                lookup = np.empty(len(parts) + 1, dtype = 'object')
+                lookup[:-1] = [p[i] if i < len(p) else None for p in parts]
+                data[f"{col}_{i}"] = lookup[codes]
+
+        return DataTable(data, copy = False)
+
+
+class ArrayCounter:
+    """
+    A substitute to the original collections.Counter class, but it
+    takes in a NumPy Array
+    """
+    def __init__(self, arr: np.ndarray):
+        self._arr = arr
+        uniques, counts = _unique_counts(arr, sort = False)
+        self._uniques = uniques
+        self._counts = counts
+        self._dict = dict(zip(uniques.tolist(), counts.tolist()))
+        
+    def __getitem__(self, x):
+        return self._dict.get(x, 0)
+
+    def items(self):
+        return self._dict.items()
+
+    def uniques_counts(self):
+        return [self._uniques, self._counts]
+
+
+class HyperLogLog:
+    """
+    HyperLogLog sketch, estimating the number of distinct values seen in
+    2 ** precision one-byte registers. The relative standard error is
+    about 1.04 / sqrt(2 ** precision), 0.8% with the default precision.
+
+    Sketches of the same precision merge into the sketch of the combined
+    values, so chunks or partitions of the data can be sketched apart.
+    """
+    _ALPHAS = {16: 0.673, 32: 0.697, 64: 0.709}
+
+    def __init__(self, precision = 14):
+        if not isinstance(precision, int) or not 4 <= precision <= 18:
+            raise ValueError("Precision must be an int from 4 to 18")
+        self.precision = precision
+        self.registers = np.zeros(2 ** precision, dtype = 'uint8')
+
+    def update(self, values):
+        """
+        Adds the values of an array, which must not hold missing values
+
+        Returns:
+        --------
+        The sketch itself
+        """
+        hashes = _hash64(np.asarray(values))
+        bits = 64 - self.precision
+        index = (hashes >> np.uint64(bits)).astype('intp')
+        rest = hashes & np.uint64((1 << bits) - 1)
+        # The rank is the position of the first 1 bit in the remaining bits,
+        # whose length frexp gives exactly since they fit in a float64
+        rank = bits + 1 - np.frexp(rest.astype('float64'))[1]
+        np.maximum.at(self.registers, index, rank.astype('uint8'))
+        return self
+
+    def merge(self, other):
+        """
+        Adds the values seen by another sketch of the same precision
+
+        Returns:
+        --------
+        The sketch itself
+        """
+        if not isinstance(other, HyperLogLog) or other.precision != self.precision:
+            raise ValueError("Can only merge HyperLogLog sketches of the same precision")
+        np.maximum(self.registers, other.registers, out = self.registers)
+        return self
+
+    def estimate(self):
+        """
+        Returns
+        -------
+        The estimated number of distinct values
+        """
+        m = len(self.registers)
+        alpha = self._ALPHAS.get(m, 0.7213 / (1 + 1.079 / m))
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype('int64')))
+        zeros = np.count_nonzero(self.registers == 0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # Linear counting is more accurate for small counts
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class KLLSketch:
+    """
+    KLL sketch of the distribution of a stream of numbers, answering
+    quantile queries with a rank error of roughly 1.7 / k while keeping
+    O(k) values.
+
+    Values are kept in levels, those at level h standing for 2 ** h values
+    each. A full level is sorted and every other value, starting at a
+    random one of the first two, moves up a level. Sketches merge level by
+    level, so chunks or partitions of the data can be sketched apart.
+    """
+
+    def __init__(self, k = 200, seed = None):
+        if not isinstance(k, int) or k < 8:
+            raise ValueError("k must be an int of at least 8")
+        self.k = k
+        self.count = 0
+        self.min = np.nan
+        self.max = np.nan
+        self._levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, level):
+        depth = len(self._levels) - level - 1
+        return max(int(np.ceil(self.k * (2 / 3) ** depth)), 2)
+
+    def _compress(self):
+        level = 0
+        while level < len(self._levels):
+            items = self._levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self._levels):
+                    self._levels.append(np.empty(0))
+                items = np.sort(items)
+                # With an odd number of values the first one stays behind
+                odd = len(items) % 2
+                promoted = items[odd + self._rng.integers(2)::2]
+                self._levels[level] = items[:odd]
+                self._levels[level + 1] = np.concatenate([self._levels[level + 1], promoted])
+            level += 1
+
+    def update(self, values):
+        """
+        Adds the values of a numeric array, skipping NaN
+
+        Returns:
+        --------
+        The sketch itself
+        """
+        values = np.asarray(values, dtype = 'float64')
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.min = np.fmin(self.min, values.min())
+        self.max = np.fmax(self.max, values.max())
+        self.count += len(values)
+        self._levels[0] = np.concatenate([self._levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Adds the values seen by another sketch
+
+        Returns:
+        --------
+        The sketch itself
+        """
+        if not isinstance(other, KLLSketch):
+            raise TypeError("Can only merge a KLLSketch")
+        while len(self._levels) < len(other._levels):
+            self._levels.append(np.empty(0))
+        for level, items in enumerate(other._levels):
+            self._levels[level] = np.concatenate([self._levels[level], items])
+        self.min = np.fmin(self.min, other.min)
+        self.max = np.fmax(self.max, other.max)
+        self.count += other.count
+        self._compress()
+        return self
+
+    def quantile(self, q):
+        """
+        Parameters:
+        -----------
+        q: float or list of floats between 0 and 1
+
+        Returns:
+        --------
+        The estimated quantile(s), one of the values seen, or NaN if the
+        sketch is empty
+        """
+        qs = np.atleast_1d(np.asarray(q, dtype = 'float64'))
+        if self.count == 0:
+            result = np.full(len(qs), np.nan)
+        else:
+            items = np.concatenate(self._levels)
+            weights = np.concatenate([np.full(len(items), 2.0 ** level)
+                                      for level, items in enumerate(self._levels)])
+            order = np.argsort(items, kind = 'stable')
+            items = items[order]
+            cumulative = np.cumsum(weights[order])
+            positions = np.searchsorted(cumulative, qs * cumulative[-1])
+            result = items[np.minimum(positions, len(items) - 1)]
+            result[qs <= 0] = self.min
+            result[qs >= 1] = self.max
+        return result if np.ndim(q) else result[0]
+
+class DataTable:
+
+    def __init__(self, data, categorical = 'auto', compact = False, copy = True):
+        """
+        A DataTable denotes a table of values, and the values can be of any type.
+        DataTable is created by passing a dictionary of keys and a list of values
+        for those keys.
+
+        String columns can be stored as categorical columns: integer codes
+        into a dictionary of their distinct values. Comparisons, sorting,
+        counting and grouping then work on the codes.
+
+        Missing values are NaN in float columns and None in string columns.
+        Columns of any type can also hold nulls by passing a
+        np.ma.MaskedArray: the mask is stored as a packed validity bitmap,
+        so integer and boolean columns keep their type. Columns without
+        nulls carry no bitmap.
+
+        Parameters:
+        -----------
+        data: dict
+            A dictionary of string keys, each mapped to a NumPy Array 
+        categorical: 'auto', bool or list
+            'auto' (default) stores string columns with few distinct values
+            as categorical columns. True does so for every string column,
+            False for none, and a list for the named columns only
+        compact: bool
+            If True, integer and float columns are stored in the smallest
+            type that holds their values exactly, as DataTable.compact does
+        copy: bool
+            If True (default), arrays that are stored as they were passed
+            are copied, so that changing them afterwards cannot change the
+            DataTable or leave its cached statistics stale. If False they
+            are used as they are, and must not be changed
+        """
+
+        self._check_input_type(data)
+        originals = data
+        self._check_array_length(data)
+
+        data, self._validity = self._split_masks(data)
+        data, self._categories = self._encode_categoricals(data, categorical)
+        self._data = self._convert_unicode_to_object(data)
+        self._stats = {}
+        self._indexes = {}
+        if compact:
+            for col, val in self._data.items():
+                if col not in self._categories:
+                    self._data[col] = _downcast(val, self._valid(col))
+        if copy:
+            for col, val in self._data.items():
+                if np.may_share_memory(val, originals[col]):
+                    self._data[col] = val.copy()
+
+    @classmethod
+    def _new(cls, data, categories = None, validity = None):
+        """
+        Creates a DataTable from columns that are already valid, without
+        the checks and conversions done by the constructor
+        """
+        table = cls.__new__(cls)
+        table._data = data
+        table._categories = categories if categories is not None else {}
+        table._validity = validity if validity is not None else {}
+        table._stats = {}
+        table._indexes = {}
+        return table
+
+    def _derive(self, data, sources = None, rows = None):
+        """
+        Creates a DataTable from columns selected or gathered from this
+        DataTable, so that categorical columns keep their categories and
+        columns with nulls keep their validity bitmap. Columns that are the
+        very same arrays share their statistics cache entry and index.
+        Columns that share memory with this DataTable's are made read-only
+        in both, so neither can change the other; see _writable.
+
+        Parameters
+        ----------
+        data: dict
+            The new columns
+        sources: dict
+            Maps new column names to the names of the columns they come
+            from, when they differ
+        rows: the selection of rows the new columns were gathered with,
+            if any. Validity bitmaps are gathered with it
+        """
+        categories = {}
+        validity = {}
+        stats = {}
+        indexes = {}
+        for col in data:
+            source = sources.get(col, col) if sources else col
+            if source in self._data:
+                val = data[col]
+                if val is self._data[source]:
+                    data[col] = self._share(source)
+                elif val.base is not None and np.may_share_memory(val, self._data[source]):
+                    self._share(source)
+                    val.flags.writeable = False
+            if source in self._categories:
+                categories[col] = self._categories[source]
+            if source in self._validity:
+                packed = self._validity[source]
+                if rows is not None:
+                    packed = _pack_validity(self._valid(source)[rows])
+                if packed is not None:
+                    validity[col] = packed
+            if rows is None and source in self._data and data[col] is self._data[source]:
+                stats[col] = self._stats_of(source)
+                if self._index_of(source) is not None:
+                    indexes[col] = self._indexes[source]
+        table = DataTable._new(data, categories, validity)
+        table._stats = stats
+        table._indexes = indexes
+        return table
+
+    def _share(self, col):
+        """
+        Makes a column read-only so that other DataTables can share it
+        without a copy, and returns it. A writable array is swapped for a
+        read-only view of it, which leaves the array the DataTable was
+        created from writable.
+        """
+        val = self._data[col]
+        if val.flags.writeable:
+            view = val.view()
+            view.flags.writeable = False
+            for cache in (self._stats, self._indexes):
+                entry = cache.get(col)
+                if entry is not None and entry['array'] is val:
+                    entry['array'] = view
+            self._data[col] = val = view
+        return val
+
+    def _writable(self, col):
+        """
+        The array of a column, ready to be modified in place. A read-only
+        column, which may be shared with other DataTables, is first
+        replaced by a private copy: this is the copy in copy-on-write. The
+        statistics and index of the column are dropped.
+        """
+        val = self._data[col]
+        if not val.flags.writeable:
+            val = self._data[col] = val.copy()
+        self._stats.pop(col, None)
+        self._indexes.pop(col, None)
+        return val
+
+    def _stats_of(self, col):
+        """
+        The statistics cache entry of a column: a dict filled lazily with
+        its min, max, null count, distinct count and sortedness. The entry
+        is emptied if the column's array was replaced since it was filled
+        """
+        entry = self._stats.get(col)
+        if entry is None or entry['array'] is not self._data[col]:
+            entry = self._stats[col] = {'array': self._data[col]}
+        return entry
+
+    def _null_count(self, col):
+        entry = self._stats_of(col)
+        if 'null_count' not in entry:
+            val = self._data[col]
+            if col in self._validity:
+                n = len(val) - _count_valid(self._validity[col])
+            elif col in self._categories:
+                n = np.count_nonzero(val < 0)
+            elif val.dtype.kind == 'O':
+                n = np.count_nonzero(val == None)
+            elif val.dtype.kind in 'iub':
+                n = 0
+            else:
+                n = np.count_nonzero(np.isnan(val))
+            entry['null_count'] = int(n)
+        return entry['null_count']
+
+    def _is_sorted_column(self, col):
+        """
+        Whether a column is in ascending order without missing values
+        """
+        entry = self._stats_of(col)
+        if 'sorted' not in entry:
+            entry['sorted'] = self._null_count(col) == 0 and _is_sorted([self._data[col]])
+        return entry['sorted']
+
+    def _valid(self, col):
+        """
+        The unpacked validity array of a column, or None if it has no bitmap
+        """
+        packed = self._validity.get(col)
+        if packed is None:
+            return None
+        return _unpack_validity(packed, len(self._data[col]))
+
+    def _split_masks(self, data):
+        """
+        Replaces masked arrays with their data, turning masks into packed
+        validity bitmaps. Masked strings become None instead.
+        """
+        updated_data = {}
+        validity = {}
+        for k, v in data.items():
+            if isinstance(v, np.ma.MaskedArray):
+                valid = ~np.ma.getmaskarray(v)
+                v = np.ma.getdata(v)
+                if v.dtype.kind in 'OU':
+                    v = v.astype('object')
+                    v[~valid] = None
+                else:
+                    packed = _pack_validity(valid)
+                    if packed is not None:
+                        validity[k] = packed
+            updated_data[k] = v
+        return updated_data, validity
+
+
+    def _check_input_type(self, data):
+        if not isinstance(data, dict):
+            raise TypeError("Input type is not a dictionary")
+        
+        for key, value in data.items():
+            if not isinstance(key, str):
+                raise TypeError(f"Dictionary keys must be a string")            
+            if not isinstance(value, np.ndarray):
+                raise TypeError(f"Dictionary values must be a NumPy array")
+            if value.ndim != 1:
+                raise ValueError(f"Dictionary values must be a 1-dimensional array")
+
+    def _check_array_length(self, data):
+        for i, value in enumerate(data.values()):
+            if i == 0:
+                arr_len = len(value)
+            elif arr_len != len(value):
+                raise ValueError("All arrays must be of the same length") 
+
+    def _encode_categoricals(self, data, categorical):
+        if categorical is True:
+            columns = [k for k, v in data.items() if v.dtype.kind in 'OU']
+        elif categorical is False:
+            columns = []
+        elif categorical == 'auto':
+            columns = [k for k, v in data.items() if _is_low_cardinality(v)]
+        elif isinstance(categorical, list):
+            columns = categorical
+            for col in columns:
+                if col not in data:
+                    raise KeyError(col)
+                if data[col].dtype.kind not in 'OU':
+                    raise TypeError("Only string columns can be categorical")
+        else:
+            raise TypeError("categorical must be 'auto', a bool or a list")
+
+        data = dict(data)
+        categories = {}
+        for col in columns:
+            codes, cats = _encode_categorical(data[col])
+            if categorical == 'auto' and len(cats) > _CATEGORICAL_MAX_RATIO * len(codes):
+                continue
+            data[col] = codes
+            categories[col] = cats
+        return data, categories
+
+    def _column(self, col, rows = None):
+        """
+        The values of a column, with categorical codes decoded into an
+        object array, and nulls of columns with a validity bitmap turned
+        into NaN (integer and float columns) or None (other columns)
+
+        Parameters
+        ----------
+        col: str
+        rows: optional selection of rows, applied before decoding
+        """
+        values = self._data[col]
+        valid = self._valid(col)
+        if rows is not None:
+            values = values[rows]
+            if valid is not None:
+                valid = valid[rows]
+        if col in self._categories:
+            values = _decode_categorical(values, self._categories[col])
+        elif valid is not None and not valid.all():
+            values = values.astype('float64' if values.dtype.kind in 'iuf' else 'object')
+            values[~valid] = np.nan if values.dtype.kind == 'f' else None
+        return values
+
+    def _convert_unicode_to_object(self, data):
+        updated_data = {}
+        for k, v in data.items():
+            if v.dtype.kind == 'U':
+                updated_data[k] = v.astype('object')
+            else:
+                updated_data[k] = v
+        return updated_data
+
+    def __len__(self):
+        return len(next(iter(self._data.values())))
+
+    def _size(self):
+        """
+        Number of values in the DataTable, rows times columns
+        """
+        if not self._data:
+            return 0
+        return len(self) * len(self._data)
+
+    @property
+    def columns(self):
+        """
+        Gives a list of the column names for the current DataTable.
+
+        Returns
+        -------
+        A list of column names
+        """
+        return list(self._data)
+
+    @columns.setter
+    def columns(self, cols):
+        """
+        Takes in a list of columns, which is of the same length of the
+        current number of columns in the DataTable, and replaces the old
+        column names with new column names.
+
+        Parameters
+        ----------
+        cols: A list of strings
+
+        Returns
+        -------
+        None
+        """
+        if not isinstance(cols, list):
+            raise TypeError("Columns must be a list")
+        
+        if len(cols) != len(self._data):
+            raise ValueError("New column list must be of same length as old list")
+        
+        for s in cols:
+            if not isinstance(s, str):
+                raise TypeError("Column names must be strings")
+
+        if len(cols) != len(set(cols)):
+            raise ValueError("Column names must not have duplicates")
+
+        renames = dict(zip(self._data, cols))
+        self._categories = {renames[k]: v for k, v in self._categories.items()}
+        self._validity = {renames[k]: v for k, v in self._validity.items()}
+        self._stats = {renames[k]: v for k, v in self._stats.items()}
+        self._indexes = {renames[k]: v for k, v in self._indexes.items()}
+        self._data = dict(zip(cols, self._data.values()))
+
+    @property
+    def shape(self):
+        """
+        Returns
+        -------
+        A tuple consisting of number of rows and columns
+        """
+        return len(self), len(self._data)
+
+    def _repr_html_(self):
+        html = '<table><thead><tr><th></th>'
+        for col in self.columns:
+            html += f"<th>{col:10}</th>"
+        
+        html += '</tr></thead>'
+        html += '<tbody>'
+
+        only_head = False
+        num_head = 10
+        num_tail = 10
+
+        if len(self) <= 20:
+            only_head = True
+            num_head = len(self)
+
+        head = {col: self._column(col, slice(0, num_head)) for col in self._data}
+        tail = {col: self._column(col, slice(-num_tail, None)) for col in self._data}
+
+        for i in range(num_head):
+            html += f'<tr><td><strong>{i}</strong></td>'
+            for col, values in head.items():
+                kind = values.dtype.kind
+
+                if kind == 'f':
+                    html += f'<td>{values[i]:10.3f}</td>'
+                elif kind == 'b':
+                    html += f'<td>{values[i]}</td>'
+                elif kind == 'O':
+                    v = values[i]
+                    if v is None:
+                        v = 'None'
+                    html += f'<td>{v:10}</td>'
+                else:
+                    html += f'<td>{values[i]:10}</td>'
+            html += f'</tr>'
+
+        if not only_head:
+            html += f'<tr><strong><td>...</td></strong>'
+            for i in range(len(self.columns)):
+                html += '<td>...</td>'
+            html += f'</tr>'
+
+            for i in range(-num_tail, 0):
+                html += f'<tr><td><strong>{len(self) + i}</strong></td>'
+                for col, values in tail.items():
+                    kind = values.dtype.kind
+
+                    if kind == 'f':
+                        html += f'<td>{values[i]:10.3f}</td>'
+                    elif kind == 'b':
+                        html += f'<td>{values[i]}</td>'
+                    elif kind == 'O':
+                        v = values[i]
+                        if v is None:
+                            v = 'None'
+                        html += f'<td>{v:10}</td>'
+                    else:
+                        html += f'<td>{values[i]:10}</td>'
+                html += f'</tr>'
+        
+        html += '</tbody></table>'
+        return html
+
+    @property
+    def values(self):
+        """
+        Returns
+        -------
+        A 2D numpy array of values in the DataTable
+        """
+        return self._to_array()
+
+    def _to_array(self, dtype = None):
+        """
+        The values as a 2D array of the common type of the columns, filled
+        column by column
+        """
+        columns = [self._column(col) for col in self._data]
+        if dtype is None:
+            dtype = np.result_type(*columns) if columns else np.dtype('float64')
+        out = np.empty((len(self), len(columns)), dtype = dtype, order = 'F')
+        for j, values in enumerate(columns):
+            out[:, j] = values
+        return out
+
+    def __array__(self, dtype = None, copy = None):
+        """
+        Converts the DataTable with np.asarray into a 2D array, as values
+        does. A single column without nulls is returned as a read-only view
+        rather than a copy
+        """
+        if len(self._data) == 1 and not copy:
+            col = next(iter(self._data))
+            val = self._data[col]
+            if col not in self._categories and col not in self._validity and \
+                    (dtype is None or np.dtype(dtype) == val.dtype):
+                return self._share(col).reshape(-1, 1)
+        if copy is False:
+            raise ValueError("The DataTable cannot be converted to an array without a copy")
+        return self._to_array(dtype)
+
+    def __dataframe__(self, nan_as_null = False, allow_copy = True):
+        """
+        The DataFrame interchange protocol, through which other libraries
+        can read the DataTable, e.g. pandas.api.interchange.from_dataframe.
+        Numeric, boolean and categorical columns export their arrays
+        without a copy, while string columns and null masks are encoded
+        into new buffers when allow_copy is True
+        """
+        return _InterchangeFrame(self, allow_copy)
+
+    def to_pandas(self):
+        """
+        Converts the DataTable to a pandas DataFrame
+
+        Numeric, boolean and string columns are shared with the DataFrame
+        rather than copied. They are read-only on both sides, so setting
+        values in place in the DataFrame requires a copy of it. Categorical
+        columns become pandas categoricals, and integer and boolean columns
+        with nulls become nullable extension arrays over the same values.
+
+        Returns:
+        --------
+        A pandas DataFrame with a default index
+        """
+        import pandas as pd
+
+        columns = {}
+        for col, val in self._data.items():
+            if col in self._categories:
+                categories = pd.Index(self._categories[col], dtype = 'object')
+                columns[col] = pd.Categorical.from_codes(val, categories)
+            elif col in self._validity and val.dtype.kind in 'iub':
+                array = pd.arrays.BooleanArray if val.dtype.kind == 'b' else pd.arrays.IntegerArray
+                columns[col] = array(self._share(col), ~self._valid(col))
+            elif col in self._validity:
+                columns[col] = self._column(col)
+            else:
+                columns[col] = pd.Series(self._share(col), dtype = val.dtype, copy = False)
+        return pd.DataFrame(columns, copy = False)
+
+    @classmethod
+    def from_pandas(cls, df, categorical = 'auto'):
+        """
+        Creates a DataTable from a pandas DataFrame, whose index is dropped
+
+        Columns with a NumPy type share their arrays with the DataFrame.
+        String categoricals keep their codes, reordered only when the
+        categories are not sorted. Nullable extension columns and pandas
+        strings are converted, with their missing values as nulls.
+
+        Parameters:
+        -----------
+        df: pandas.DataFrame
+            A DataFrame with string column names
+        categorical: 'auto', bool or list
+            How to store the string columns, as in the constructor
+
+        Returns:
+        --------
+        A DataTable
+        """
+        import pandas as pd
+
+        if not isinstance(df, pd.DataFrame):
+            raise TypeError("Input must be a pandas DataFrame")
+
+        data = {}
+        categories = {}
+        for name, series in df.items():
+            if not isinstance(name, str):
+                raise TypeError("Column names must be strings")
+            dtype = series.dtype
+            if isinstance(dtype, pd.CategoricalDtype) and \
+                    pd.api.types.is_string_dtype(dtype.categories):
+                codes = series.array.codes
+                cats = dtype.categories.to_numpy(dtype = 'object')
+                order = np.argsort(cats, kind = 'stable')
+                if (order != np.arange(len(cats))).any():
+                    # Categorical columns need sorted categories
+                    rank = np.append(np.argsort(order), -1).astype(codes.dtype)
+                    codes = rank[codes]
+                    cats = cats[order]
+                data[name] = codes
+                categories[name] = cats
+            elif isinstance(dtype, np.dtype):
+                data[name] = series.to_numpy(copy = False)
+            elif dtype.kind in 'biuf':
+                missing = series.isna().to_numpy()
+                values = series.to_numpy(dtype = dtype.numpy_dtype, na_value = 0)
+                data[name] = np.ma.MaskedArray(values, mask = missing) if missing.any() else values
+            else:
+                data[name] = series.to_numpy(dtype = 'object', na_value = None)
+
+        # pandas copies on write, so the shared arrays are not changed in place
+        table = cls({k: v for k, v in data.items() if k not in categories},
+                    categorical = categorical, copy = False)
+        table._data = {k: data[k] if k in categories else table._data[k] for k in data}
+        table._categories.update(categories)
+        return table
+
+    @property
+    def dtypes(self):
+        """
+        Returns
+        -------
+        A two-column DataTable of column names in one columns and
+        their data types in the other
+        """
+        DTYPE_NAMES = {
+            "O": "string",
+            "i": "integer",
+            "f": "float",
+            "b": "boolean"
+        }
+
+        colnames = np.array(list(self._data.keys()))
+        
+        dtypes_ = np.array(['category' if col in self._categories else DTYPE_NAMES[v.dtype.kind]
+                            for col, v in self._data.items()])
+
+        return DataTable({
+            'Column Name': colnames,
+            'Data Type': dtypes_
+        }, copy = False)
+
+    def __getitem__(self, index):
+        """
+        Use the brackets operator to select rows and columns
+        Usage:
+        ------
+        df['col1'] ---> Selects only 'col1'
+        df[['col1', 'col2']] ---> Selects both 'col1' and 'col2'
+        df[boolean] ---> Selects a DataTable that contains a boolean condition
+        df[rs, cs] ---> Row and column selected together
+
+        Returns:
+        --------
+        A subset of the original DataTable based on the indices provided
+        """
+
+        if isinstance(index, str):
+            return self._derive({
+                index: self._data[index]
+            })
+        
+        if isinstance(index, list):
+            return self._derive({
+                col: self._data[col] for col in index
+            })
+
+        if isinstance(index, DataTable):
+            if index.shape[1] != 1:
+                raise ValueError('Index must be a one-column DataTable')
+            
+            a = next(iter(index._data.values()))
+
+            if a.dtype.kind != 'b':
+                raise ValueError('Item must be a one-column Boolean DataTable')
+            a = index._filter_mask()
+
+            return self._derive({
+                col: value[a] for col, value in self._data.items()
+            }, rows = a)
+
+        if isinstance(index, tuple):
+            return self._getitem_tuple(index)
+
+        raise TypeError("Wrong data type entered. Pass either a string, tuple, list or DataTable")
+
+    def _getitem_tuple(self, index):
+        if len(index) != 2:
+            raise TypeError("Tuple must have length of exactly 2")
+        
+        row, col = index
+
+        if isinstance(row, int):
+            row = [row]
+        elif isinstance(row, DataTable):
+            if row.shape[1] != 1:
+                raise ValueError("Row selection must be of 1 column")
+            if next(iter(row._data.values())).dtype.kind != 'b':
+                raise TypeError('Row selection must be a boolean DataTable')
+            row = row._filter_mask()
+        elif isinstance(row, np.ndarray):
+            if row.ndim != 1 or row.dtype.kind not in 'biu':
+                raise TypeError("Row selection array must be one-dimensional integers or booleans")
+        elif not isinstance(row, (list, slice)):
+            raise TypeError("Row selection is not a list, slice, int, array or DataTable")
+
+        
+        if isinstance(col, int):
+            col = [self.columns[col]]        
+        elif isinstance(col, str):
+            col = [col]
+        elif isinstance(col, list):
+            new_cols = []
+            for c in col:
+                if isinstance(c, int):
+                    new_cols.append(self.columns[c])
+                elif isinstance(c, str):
+                    # Assume c is a string
+                    new_cols.append(c)
+                
+            col = new_cols
+        elif isinstance(col, slice):
+            start = col.start
+            stop = col.stop
+            step = col.step
+
+            if isinstance(start, str):
+                start = self.columns.index(start)
+
+            if isinstance(stop, str):
+                stop = self.columns.index(stop) + 1
+            
+            col = self.columns[start:stop:step]
+
+        else:
+            raise TypeError("Column selection must be slice, int, list or str")
+
+        data = {}
+        for c in col:
+            data[c] = self._data[c][row]
+
+        return self._derive(data, rows = row)
+
+    def _filter_mask(self):
+        """
+        The values of a one-column boolean DataTable used to select rows,
+        with nulls treated as False
+        """
+        col = next(iter(self._data))
+        mask = self._data[col]
+        valid = self._valid(col)
+        if valid is not None:
+            mask = mask & valid
+        return mask
+
+    def _ipython_key_completions_(self):
+        return self.columns
+
+    def __setitem__(self, key, value):
+        """
+        Use the brackets operator to set columns or values
+        Usage:
+        ------
+        df['col1'] = value ---> Replaces or adds 'col1'
+        df[rs, 'col1'] = value ---> Sets the selected rows of 'col1'
+
+        Columns shared with other DataTables are copied before rows are set,
+        so the other DataTables keep their values. Arrays are copied as by
+        the constructor, so changing them afterwards cannot change the column.
+        """
+        if isinstance(key, tuple):
+            return self._set_rows(key, value)
+        if not isinstance(key, str):
+            raise TypeError("Key must be a string")
+
+        original = value if isinstance(value, np.ndarray) else None
+        categories = None
+        packed = None
+        if isinstance(value, np.ma.MaskedArray):
+            if value.ndim != 1:
+                raise ValueError("Value must be one-dimensional array")
+            if len(value) != len(self):
+                raise ValueError("Length of array must match DataTable's length")
+            data, validity = self._split_masks({key: value})
+            value = data[key]
+            packed = validity.get(key)
+        elif isinstance(value, np.ndarray):
+            if value.ndim != 1:
+                raise ValueError("Value must be one-dimensional array")
+            if len(value) != len(self):
+                raise ValueError("Length of array must match DataTable's length")
+        elif isinstance(value, DataTable):
+            if value.shape[1] != 1:
+                raise ValueError("Setting DataTable must be of a single column")
+            if len(value) != len(self):
+                raise ValueError("Setting DataTable must have same length as current DataTable")
+            source = next(iter(value._data))
+            categories = value._categories.get(source)
+            packed = value._validity.get(source)
+            value = value._share(source)
+        elif isinstance(value, (int, bool, str, float)):
+            value = np.repeat(value, len(self))
+        else:
+            raise TypeError("Value must be either of: DataTable, array, int, bool, str, float")
+
+        if value.dtype.kind == 'U':
+            data, cats = self._encode_categoricals({key: value}, 'auto')
+            value = data[key]
+            categories = cats.get(key)
+            if categories is None:
+                value = value.astype('object')
+        if original is not None and np.may_share_memory(value, original):
+            value = value.copy()
+
+        self._data[key] = value
+        self._categories.pop(key, None)
+        self._validity.pop(key, None)
+        self._stats.pop(key, None)
+        self._indexes.pop(key, None)
+        if categories is not None:
+            self._categories[key] = categories
+        if packed is not None:
+            self._validity[key] = packed
+
+    def _set_rows(self, index, value):
+        if len(index) != 2:
+            raise TypeError("Tuple must have length of exactly 2")
+
+        row, col = index
+        if not isinstance(col, str):
+            raise TypeError("Column must be a string")
+        if col not in self._data:
+            raise KeyError(col)
+
+        if isinstance(row, DataTable):
+            if row.shape[1] != 1:
+                raise ValueError("Row selection must be of 1 column")
+            if next(iter(row._data.values())).dtype.kind != 'b':
+                raise TypeError('Row selection must be a boolean DataTable')
+            row = row._filter_mask()
+        elif isinstance(row, np.ndarray):
+            if row.ndim != 1 or row.dtype.kind not in 'biu':
+                raise TypeError("Row selection array must be one-dimensional integers or booleans")
+        elif not isinstance(row, (int, list, slice)):
+            raise TypeError("Row selection is not a list, slice, int, array or DataTable")
+
+        if isinstance(value, DataTable):
+            if value.shape[1] != 1:
+                raise ValueError("Setting DataTable must be of a single column")
+            value = value._column(next(iter(value._data)))
+
+        if col in self._categories:
+            # Re-encode, since the new values may not be categories yet
+            values = self._column(col)
+            values[row] = value
+            codes, categories = _encode_categorical(values)
+            self._data[col] = codes
+            self._categories[col] = categories
+            self._stats.pop(col, None)
+            self._indexes.pop(col, None)
+        else:
+            self._writable(col)[row] = value
+
+        if col in self._validity:
+            valid = self._valid(col)
+            valid[row] = True
+            packed = _pack_validity(valid)
+            if packed is None:
+                del self._validity[col]
+            else:
+                self._validity[col] = packed
+
+    def head(self, n = 10):
+        """
+        Return the first n rows of the DataTable
+
+        Parameters:
+        -----------
+        n: int, default = 10
+
+        Returns:
+        --------
+        DataTable
+        """
+
+        return self[:n, :]
+
+    def tail(self, n = 10):
+        """
+        Return the last n rows of the DataTable
+
+        Parameters:
+        -----------
+        n: int, default = 10
+
+        Returns:
+        --------
+        DataTable
+        """
+
+        return self[-n:, :]
+
+    def _agg(self, func):
+        """
+        Generic Function to aggregate columns based
+        on an aggregation function
+
+        Parameters
+        ----------
+        func: The function name of the aggregation function
+
+        Returns
+        -------
+        DataTable with the aggregation applied
+        """
+
+        stat = _CACHED_AGGS.get(func)
+
+        def agg_column(col):
+            if stat is None:
+                return self._agg_column(col, func)
+            entry = self._stats_of(col)
+            if stat not in entry:
+                entry[stat] = self._agg_column(col, func)
+                # Shared with the results, which copy it before any change
+                if isinstance(entry[stat], np.ndarray):
+                    entry[stat].flags.writeable = False
+            return entry[stat]
+
+        data = {}
+        results = _map_columns(agg_column, self.columns, self._size())
+        for col, result in zip(self._data, results):
+            if result is not None:
+                data[col] = result
+
+        return DataTable(data, copy = False)
+
+    def _agg_column(self, col, func):
+        """
+        Aggregates one column into a one-element array, or returns None if
+        the function does not apply to the column's type
+        """
+        value = self._data[col]
+        if col in self._categories:
+            categories = self._categories[col]
+            if func in (np.min, np.max) and (value >= 0).any():
+                # Categories are sorted, so the smallest code is the smallest value
+                codes = value[value >= 0]
+                return categories[[func(codes)]]
+            value = _decode_categorical(value, categories)
+        elif col in self._validity:
+            value = value[self._valid(col)]
+            if len(value) == 0 and func in (np.min, np.max, np.argmin, np.argmax):
+                # Every value is null, and so is the result, as NaN is for floats
+                dtype = 'intp' if func in (np.argmin, np.argmax) else value.dtype
+                return np.ma.MaskedArray(np.zeros(1, dtype = dtype), mask = [True])
+        try:
+            return np.array([func(value)])
+        except TypeError:
+            return None
+
+    def min(self):
+        return self._agg(np.min)
+
+    def max(self):
+        return self._agg(np.max)
+
+    def mean(self):
+        return self._agg(np.mean)
+
+    def median(self):
+        return self._agg(np.median)
+
+    def quantile(self, q = 0.5, approx = False):
+        """
+        Computes quantiles of each numeric column, skipping missing values.
+        All the quantiles of a column come from a single partition of it,
+        or from indexing when the column is known to be sorted.
+
+        Parameters:
+        -----------
+        q: float or list of floats between 0 and 1, default = 0.5
+        approx: bool
+            If True, the quantiles are estimated with a KLL sketch of each
+            column, in bounded memory
+
+        Returns:
+        --------
+        A DataTable with one row per quantile. Exact quantiles interpolate
+        linearly between values, as np.quantile does
+        """
+        qs = np.atleast_1d(np.asarray(q, dtype = 'float64'))
+        if qs.ndim != 1 or len(qs) == 0 or ((qs < 0) | (qs > 1) | np.isnan(qs)).any():
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        def quantile_column(col):
+            if approx:
+                sketch = self._sketch(col, KLLSketch())
+                return None if sketch is None else sketch.quantile(qs)
+            values = self._numeric_values(col)
+            if values is None:
+                return None
+            if len(values) == 0:
+                return np.full(len(qs), np.nan)
+            if self._stats_of(col).get('sorted'):
+                positions = qs * (len(values) - 1)
+                low = np.floor(positions).astype('intp')
+                high = np.minimum(low + 1, len(values) - 1)
+                return values[low] + (values[high] - values[low]) * (positions - low)
+            return np.quantile(values, qs)
+
+        data = {}
+        results = _map_columns(quantile_column, self.columns, self._size())
+        for col, result in zip(self._data, results):
+            if result is not None:
+                data[col] = result
+        return DataTable(data, copy = False)
+
+    def _numeric_values(self, col):
+        """
+        The values of a numeric column without its nulls and NaN, or None
+        for other columns
+        """
+        val = self._data[col]
+        if col in self._categories or val.dtype.kind not in 'iuf':
+            return None
+        if col in self._validity:
+            val = val[self._valid(col)]
+        if val.dtype.kind == 'f':
+            nan = np.isnan(val)
+            if nan.any():
+                val = val[~nan]
+        return val
+
+    def _sketch(self, col, sketch):
+        """
+        Adds the values of a column, without its nulls, to a HyperLogLog or
+        KLLSketch and returns it, or returns None when a KLLSketch does not
+        apply to the column's type
+        """
+        if isinstance(sketch, KLLSketch):
+            values = self._numeric_values(col)
+            return None if values is None else sketch.update(values)
+
+        val = self._data[col]
+        if col in self._categories:
+            categories = self._categories[col]
+            # Each category present is enough for a distinct count
+            present = np.bincount(val[val >= 0], minlength = len(categories)) > 0
+            return sketch.update(categories[present])
+        if col in self._validity:
+            val = val[self._valid(col)]
+        if val.dtype.kind == 'O':
+            val = val[val != None]
+        elif val.dtype.kind == 'f':
+            val = val[~np.isnan(val)]
+        return sketch.update(val)
+
+    def sum(self):
+        return self._agg(np.sum)
+
+    def var(self):
+        return self._agg(np.var)
+
+    def std(self):
+        return self._agg(np.std)
+
+    def all(self):
+        return self._agg(np.all)
+
+    def any(self):
+        return self._agg(np.any)
+
+    def argmax(self):
+        return self._agg(np.argmax)
+
+    def argmin(self):
+        return self._agg(np.argmin)
+
+    def isna(self):
+        """
+        Finds whether each value in the DataTable is missing or not
+        
+        Returns:
+        --------
+        A DataTable of booleans
+        """
+        data = {col: self._missing(col) for col in self._data}
+        return DataTable(data, copy = False)
+
+    def _missing(self, col, rows = None):
+        """
+        Boolean array of the missing values of a column, optionally only
+        at the given rows
+        """
+        val = self._data[col]
+        if rows is not None:
+            val = val[rows]
+        if col in self._validity:
+            valid = self._valid(col)
+            return ~(valid if rows is None else valid[rows])
+        if col in self._categories:
+            return val < 0
+        if val.dtype.kind == 'O':
+            return val == None
+        if val.dtype.kind in 'iub':
+            return np.zeros(len(val), dtype = 'bool')
+        return np.isnan(val)
+
+    def count(self):
+        """
+        Returns the number of non-missing values for each column
+
+        Returns:
+        --------
+        A DataTable with the number of non-missing values for each column
+        """
+
+        data = {}
+        for col, val in self._data.items():
+            data[col] = np.array([len(val) - self._null_count(col)])
+        
+        return DataTable(data, copy = False)
+
+    def fillna(self, value):
+        """
+        Replaces missing values
+
+        Parameters:
+        -----------
+        value: scalar or dict
+            The value to put in place of missing values, or a dict mapping
+            column names to such values. Columns not in the dict are left
+            unchanged
+
+        Returns:
+        --------
+        A DataTable without missing values in the filled columns. Columns
+        with nulls keep their dtype when it holds the value (e.g. 0 for
+        False). Otherwise numeric columns are promoted, while boolean
+        columns, and strings put in numeric ones, raise a TypeError
+        """
+        if not isinstance(value, dict):
+            value = {col: value for col in self._data}
+
+        data = dict(self._data)
+        table = self._derive(data)
+        for col, fill in value.items():
+            if col not in self._data:
+                raise KeyError(col)
+            val = self._data[col]
+
+            if col in self._validity:
+                data[col] = np.where(self._valid(col), val, self._fill_value(col, fill))
+                del table._validity[col]
+            elif col in self._categories:
+                categories = self._categories[col]
+                if not isinstance(fill, str):
+                    data[col] = self._column(col)
+                    data[col][val < 0] = fill
+                    del table._categories[col]
+                    continue
+                position = np.searchsorted(categories, fill)
+                codes = val
+                if position == len(categories) or categories[position] != fill:
+                    categories = np.insert(categories, position, fill)
+                    codes = np.where(codes >= position, codes + 1, codes).astype(
+                        _codes_dtype(len(categories)))
+                data[col] = np.where(codes < 0, position, codes).astype(codes.dtype)
+                table._categories[col] = categories
+            elif val.dtype.kind == 'O':
+                data[col] = val.copy()
+                data[col][val == None] = fill
+            elif val.dtype.kind in 'fc':
+                data[col] = np.where(np.isnan(val), fill, val)
+
+        return table
+
+    def _fill_value(self, col, fill):
+        """
+        The fill value of a column with a validity bitmap, in the column's
+        own dtype when it holds the same value there. Boolean columns are
+        only filled with such values, and others are promoted as by np.where
+        to a numeric dtype, but never to a string one
+        """
+        dtype = self._data[col].dtype
+        try:
+            cast = np.asarray(fill).astype(dtype)
+            same = bool(cast == fill)
+        except (TypeError, ValueError):
+            same = False
+        if same:
+            return cast
+        if dtype.kind == 'b' or np.asarray(fill).dtype.kind in 'USO':
+            raise TypeError(f"Cannot fill the {dtype} column {col} with {fill!r}")
+        return fill
+
+    def dropna(self):
+        """
+        Drops the rows holding a missing value in any column. The validity
+        bitmaps of the columns are combined byte by byte before unpacking
+
+        Returns:
+        --------
+        A DataTable with the rows without missing values
+        """
+        packed = None
+        for bitmap in self._validity.values():
+            packed = bitmap if packed is None else packed & bitmap
+        keep = np.ones(len(self), dtype = 'bool') if packed is None else \
+            _unpack_validity(packed, len(self))
+
+        for col, val in self._data.items():
+            if col in self._validity:
+                continue
+            if col in self._categories:
+                keep &= val >= 0
+            elif val.dtype.kind == 'O':
+                keep &= val != None
+            elif val.dtype.kind in 'fc':
+                keep &= ~np.isnan(val)
+
+        if keep.all():
+            return self._derive(dict(self._data))
+        return self._derive({col: val[keep] for col, val in self._data.items()}, rows = keep)
+
+    def unique(self, dropna = False):
+        """
+        Finds the unique values in each column
+
+        Optional Parameters:
+        --------------------
+        dropna: bool
+            If True, missing values are left out
+
+        Returns
+        -------
+        A list containing one-column DataTables
+        """
+
+        dfs = []
+        for col, val in self._data.items():
+            uniques, _ = _unique_counts(val, dropna = dropna, sort = False,
+                                        categories = self._categories.get(col),
+                                        valid = self._valid(col))
+            dfs.append(DataTable({col: uniques}, copy = False))
+        
+        if len(dfs) == 1:
+            return dfs[0]
+
+        return dfs
+
+    def nunique(self, dropna = False, approx = False):
+        """
+        Finds the number of unique values in each column
+
+        Optional Parameters:
+        --------------------
+        dropna: bool
+            If True, missing values are not counted as a value
+        approx: bool
+            If True, the counts are estimated with a HyperLogLog sketch of
+            each column, in bounded memory, within about 1%
+
+        Returns:
+        --------
+        A DataTable containing the number of unique values in each column
+        """
+
+        data = {}
+        for col, val in self._data.items():
+            if approx:
+                n = self._sketch(col, HyperLogLog()).estimate()
+                if not dropna and self._null_count(col) > 0:
+                    n += 1
+                data[col] = np.array([n])
+                continue
+            entry = self._stats_of(col)
+            if 'distinct' not in entry:
+                uniques, _ = _unique_counts(val, dropna = True, sort = False,
+                                            categories = self._categories.get(col),
+                                            valid = self._valid(col))
+                entry['distinct'] = len(uniques)
+            n = entry['distinct']
+            if not dropna and self._null_count(col) > 0:
+                n += 1
+            data[col] = np.array([n])
+        
+        return DataTable(data, copy = False)
+
+    def val_counts(self, normalize = False, dropna = False, sort = True):
+        """
+        Finds the counts of all unique values for each column in the DataTable
+
+        Optional Parameters:
+        --------------------
+        normalize: bool
+            If True, return the relative frequencies of elements
+        dropna: bool
+            If True, missing values are not counted
+        sort: bool
+            If True (default), sort by descending count. If False, the
+            final sort is skipped
+
+        Returns:
+        --------
+        A list of DataTables containing all the unique value counts
+        """
+        dfs = []
+        for col, val in self._data.items():     
+            uniques, counts = _unique_counts(val, dropna = dropna, sort = sort,
+                                             categories = self._categories.get(col),
+                                             valid = self._valid(col))
+
+            if normalize:
+                counts = counts / counts.sum()
+
+            data = {col: uniques, 'count': counts}
+            dfs.append(DataTable(data, copy = False))
+
+        if len(dfs) == 1:
+            return dfs[0]
+        return dfs
+
+    def to_categorical(self, columns = None):
+        """
+        Stores string columns as categorical columns: integer codes into
+        a sorted dictionary of their distinct values
+
+        Parameters:
+        -----------
+        columns: str or list
+            Column(s) to encode. By default every string column is encoded
+
+        Returns:
+        --------
+        A DataTable with the columns encoded
+        """
+        if columns is None:
+            columns = [col for col, val in self._data.items()
+                       if val.dtype.kind == 'O' and col not in self._categories]
+        elif isinstance(columns, str):
+            columns = [columns]
+        elif not isinstance(columns, list):
+            raise TypeError("Columns must be a str or list")
+
+        columns = [col for col in columns if col not in self._categories]
+        data, categories = self._encode_categoricals(
+            {col: self._data[col] for col in columns}, columns)
+
+        table = self._derive(dict(self._data))
+        table._data.update(data)
+        table._categories.update(categories)
+        return table
+
+    def _column_bytes(self, col, deep = True):
+        """
+        The bytes held by one column, with its categories and validity
+        bitmap, and with deep the Python objects its object arrays reference
+        """
+        val = self._data[col]
+        total = val.nbytes
+        if deep and val.dtype.kind == 'O':
+            total += sum(map(sys.getsizeof, val.tolist()))
+        if col in self._categories:
+            categories = self._categories[col]
+            total += categories.nbytes
+            if deep and categories.dtype.kind == 'O':
+                total += sum(map(sys.getsizeof, categories.tolist()))
+        if col in self._validity:
+            total += self._validity[col].nbytes
+        return total
+
+    def memory_usage(self, deep = True):
+        """
+        Reports the memory used by each column
+
+        Parameters:
+        -----------
+        deep: bool
+            Whether to count the Python objects referenced by string
+            columns and categories, rather than only their pointers
+
+        Returns:
+        --------
+        A two-column DataTable of column names and the bytes used by each
+        column, including its categories and validity bitmap
+        """
+        return DataTable({
+            'Column Name': np.array(list(self._data), dtype = 'object'),
+            'Bytes': np.array([self._column_bytes(col, deep) for col in self._data],
+                              dtype = 'int64')
+        }, categorical = False, copy = False)
+
+    @property
+    def nbytes(self):
+        """
+        Returns
+        -------
+        The number of bytes held by the columns, including the strings
+        referenced by string columns, the categories of categorical columns
+        and validity bitmaps
+        """
+        return sum(self._column_bytes(col) for col in self._data)
+
+    def compact(self, report = False):
+        """
+        Stores the columns in less memory. Integer columns are downcast to
+        int8, int16 or int32 and float columns to float32 whenever that
+        keeps every value exactly, and string columns with few distinct
+        values become categorical columns. Arithmetic, cumulative sums and
+        products and group sums widen downcast integers back to int64, so
+        they cannot overflow.
+
+        Parameters:
+        -----------
+        report: bool
+            Whether to also return the bytes saved on each column
+
+        Returns:
+        --------
+        The compacted DataTable, or with report a list of it and a
+        DataTable of each column's bytes before and after and the bytes
+        saved
+        """
+        table = self._derive(dict(self._data))
+        for col, val in self._data.items():
+            if col in self._categories:
+                continue
+            if _is_low_cardinality(val):
+                codes, categories = _encode_categorical(val)
+                if len(categories) <= _CATEGORICAL_MAX_RATIO * len(codes):
+                    table._data[col] = codes
+                    table._categories[col] = categories
+                continue
+            table._data[col] = _downcast(val, self._valid(col))
+
+        if not report:
+            return table
+
+        before = np.array([self._column_bytes(col) for col in self._data], dtype = 'int64')
+        after = np.array([table._column_bytes(col) for col in self._data], dtype = 'int64')
+        return [table, DataTable({
+            'Column Name': np.array(list(self._data), dtype = 'object'),
+            'Before': before,
+            'After': after,
+            'Saved': before - after
+        }, categorical = False, copy = False)]
+
+    @property
+    def str(self):
+        """
+        Returns
+        -------
+        A StringMethods object, whose methods apply vectorized string
+        functions to the string columns
+
+        Usage:
+        ------
+        df[df['name'].str.startswith('a')] ---> Rows whose name starts with 'a'
+        """
+        return StringMethods(self)
+
+    def groupby(self, keys):
+        """
+        Groups the rows of the DataTable by the values of one or more columns
+
+        Parameters:
+        -----------
+        keys: str or list
+            Column(s) to group by
+
+        Returns:
+        --------
+        A GroupBy object, whose agg method computes the per-group summaries
+        """
+        return GroupBy(self, keys)
+
+    def pivot_table(self, index, columns, values = None, aggfunc = 'mean', fill_value = None):
+        """
+        Reshapes the DataTable into a wide table, with one row per value of
+        the index column(s) and one column per value of the columns column
+
+        The keys are factorized once into integer codes, which combine into
+        one cell code per row, and the values are then aggregated per cell
+        in a single vectorized pass, as in GroupBy.agg. Rows with a missing
+        key are left out and nulls of the values column are skipped.
+
+        Parameters:
+        -----------
+        index: str or list
+            Column(s) whose values label the rows
+        columns: str
+            Column whose values become the new columns
+        values: str
+            Column to aggregate. Without values the rows in each cell are
+            counted
+        aggfunc: str, default = 'mean'
+            sum, mean, count, min or max, or any other GroupBy.agg function
+        fill_value: optional value for the cells without any row. They are
+            null by default
+
+        Returns:
+        --------
+        A DataTable holding the index column(s) followed by one column per
+        pivoted key, named after the key
+        """
+        index = [index] if isinstance(index, str) else index
+        if not isinstance(index, list) or len(index) == 0:
+            raise TypeError("Index must be a string or a non-empty list")
+        if not isinstance(columns, str):
+            raise TypeError("Columns must be a string")
+        for key in index + [columns] + ([] if values is None else [values]):
+            if key not in self._data:
+                raise KeyError(key)
+        keep = None
+        if values is None:
+            values, aggfunc = columns, 'size'
+        else:
+            keep = ~self._missing(values)
+
+        rows = GroupBy(self, index)
+        cols = GroupBy(self, columns)
+        names = [str(v) for v in cols._key_values[0].tolist()]
+        if len(set(names)) < len(names):
+            raise ValueError("Pivoted keys with the same name, e.g. 1 and '1', cannot become columns")
+        if set(names) & set(index):
+            raise ValueError("Pivoted column names clash with the index columns")
+
+        n, m = rows._ngroups, cols._ngroups
+        valid = rows._valid & cols._valid
+        if keep is not None:
+            # Nulls and NaNs of the values column take no part in any cell
+            valid = valid & keep
+        cells = np.where(valid, cols._codes * n + rows._codes, -1)
+        result = GroupBy._from_codes(self, cells, n * m)._aggregate_column(values, aggfunc)
+
+        empty = np.bincount(cells[cells >= 0], minlength = n * m) == 0
+        if fill_value is not None:
+            result = np.where(empty, fill_value, np.ma.filled(result, fill_value))
+        elif np.ma.getdata(result).dtype.kind == 'f':
+            result = np.where(empty, np.nan, np.ma.filled(result, np.nan))
+        elif np.ma.getdata(result).dtype.kind == 'O':
+            result = np.where(empty, None, np.ma.filled(result, None))
+        else:
+            result = np.ma.MaskedArray(np.ma.getdata(result),
+                                       mask = empty | np.ma.getmaskarray(result))
+
+        data = dict(zip(index, rows._key_values))
+        matrix = result.reshape(m, n)
+        for j, name in enumerate(names):
+            data[name] = matrix[j]
+        return DataTable(data, copy = False)
+
+    def merge(self, other, on = None, how = 'inner', engine = 'auto',
+              suffixes = ('_x', '_y')):
+        """
+        Joins the DataTable with another DataTable on one or more key columns
+
+        Parameters:
+        -----------
+        other: DataTable
+        on: str or list
+            Key column(s), present in both DataTables. Defaults to the
+            columns the two DataTables have in common
+        how: str
+            'inner', 'left', 'right' or 'outer'
+        engine: str
+            'hash' builds a hash table on the smaller DataTable and probes
+            it with the other one. 'sort' merges inputs that are already
+            sorted by the keys (e.g. the output of sort_vals) with binary
+            searches. 'auto' (default) uses 'sort' when both inputs are
+            sorted, 'hash' otherwise
+        suffixes: tuple of two strings
+            Appended to the names of non-key columns present on both sides
+
+        Returns:
+        --------
+        A DataTable with the key columns, then the other columns of the left
+        and right DataTables. Rows follow the order of the left DataTable
+        (the right one for how = 'right'), and rows without a match are
+        filled with missing values; integer and boolean columns keep their
+        type and mark those rows as nulls. Missing keys never match.
+        """
+        if not isinstance(other, DataTable):
+            raise TypeError("Can only merge with another DataTable")
+        if how not in ('inner', 'left', 'right', 'outer'):
+            raise ValueError("how must be one of 'inner', 'left', 'right', 'outer'")
+        if engine not in ('auto', 'hash', 'sort'):
+            raise ValueError("engine must be one of 'auto', 'hash', 'sort'")
+
+        if on is None:
+            on = [col for col in self.columns if col in other._data]
+        elif isinstance(on, str):
+            on = [on]
+        if not isinstance(on, list) or len(on) == 0:
+            raise ValueError("Merge keys must be a string or a non-empty list")
+        for col in on:
+            if col not in self._data or col not in other._data:
+                raise KeyError(col)
+
+        left_cats = [self._categories.get(col) for col in on]
+        right_cats = [other._categories.get(col) for col in on]
+        left_valid = [self._valid(col) for col in on]
+        right_valid = [other._valid(col) for col in on]
+        has_categorical = any(c is not None for c in left_cats + right_cats)
+        has_nulls = any(v is not None for v in left_valid + right_valid)
+
+        if engine == 'auto':
+            # Categorical codes of two DataTables are not comparable, so
+            # they are joined through the hash engine, as are keys with nulls
+            if len(on) == 1:
+                is_sorted = self._is_sorted_column(on[0]) and other._is_sorted_column(on[0])
+            else:
+                is_sorted = _is_sorted([self._data[col] for col in on]) and \
+                    _is_sorted([other._data[col] for col in on])
+            engine = 'sort' if not has_categorical and not has_nulls and is_sorted else 'hash'
+
+        if engine == 'sort':
+            left_keys = [self._column(col) for col in on]
+            right_keys = [other._column(col) for col in on]
+            if not (_is_sorted(left_keys) and _is_sorted(right_keys)):
+                raise ValueError("The sort engine needs both DataTables sorted by the keys "
+                                 "without missing values")
+            left, right = _sort_keys(left_keys, right_keys)
+            if how == 'right':
+                right_idx, left_idx = _sort_join_indexers(right, left, True)
+            else:
+                left_idx, right_idx = _sort_join_indexers(left, right, how != 'inner')
+
+            if how == 'outer':
+                matched = np.zeros(len(other) + 1, dtype = 'intp')
+                lo = np.searchsorted(right, left, 'left')
+                hi = np.searchsorted(right, left, 'right')
+                np.add.at(matched, lo, 1)
+                np.add.at(matched, hi, -1)
+                unmatched = np.flatnonzero(np.cumsum(matched)[:-1] == 0)
+        else:
+            left_codes, right_codes, size = _join_codes(
+                [self._data[col] for col in on], [other._data[col] for col in on],
+                left_cats, right_cats, left_valid, right_valid)
+            if how == 'right':
+                right_idx, left_idx = _hash_join_indexers(right_codes, left_codes, size, True)
+            else:
+                left_idx, right_idx = _hash_join_indexers(left_codes, right_codes, size,
+                                                          how != 'inner')
+
+            if how == 'outer':
+                left_counts = np.bincount(left_codes[left_codes >= 0], minlength = size)
+                right_present = right_codes >= 0
+                if size == 0:
+                    # No valid key on the build side: no right row matches
+                    unmatched = np.arange(len(right_codes))
+                else:
+                    unmatched = np.flatnonzero(~right_present | (
+                        left_counts[np.where(right_present, right_codes, 0)] == 0))
+
+        if how == 'outer':
+            left_idx = np.concatenate([left_idx, np.full(len(unmatched), -1, dtype = 'intp')])
+            right_idx = np.concatenate([right_idx, unmatched])
+
+        data = {}
+        categories = {}
+        validity = {}
+        from_left = left_idx >= 0
+        for col, l_valid, r_valid in zip(on, left_valid, right_valid):
+            valid = None
+            if from_left.all():
+                data[col] = self._data[col][left_idx]
+                valid = l_valid[left_idx] if l_valid is not None else None
+                if col in self._categories:
+                    categories[col] = self._categories[col]
+            elif not from_left.any():
+                data[col] = other._data[col][right_idx]
+                valid = r_valid[right_idx] if r_valid is not None else None
+                if col in other._categories:
+                    categories[col] = other._categories[col]
+            elif col in self._categories or col in other._categories:
+                data[col] = np.where(from_left, self._column(col, np.maximum(left_idx, 0)),
+                                     other._column(col, np.maximum(right_idx, 0)))
+            else:
+                left_rows, right_rows = np.maximum(left_idx, 0), np.maximum(right_idx, 0)
+                data[col] = np.where(from_left, self._data[col][left_rows],
+                                     other._data[col][right_rows])
+                if l_valid is not None or r_valid is not None:
+                    valid = np.where(from_left,
+                                     l_valid[left_rows] if l_valid is not None else True,
+                                     r_valid[right_rows] if r_valid is not None else True)
+            if valid is not None:
+                packed = _pack_validity(valid)
+                if packed is not None:
+                    validity[col] = packed
+
+        for table, indexer, suffix, rest in ((self, left_idx, suffixes[0], other),
+                                             (other, right_idx, suffixes[1], self)):
+            for col, val in table._data.items():
+                if col in on:
+                    continue
+                name = col + suffix if col in rest._data else col
+                data[name], valid = _take(val, indexer, categorical = col in table._categories,
+                                          valid = table._valid(col))
+                if col in table._categories:
+                    categories[name] = table._categories[col]
+                if valid is not None:
+                    packed = _pack_validity(valid)
+                    if packed is not None:
+                        validity[name] = packed
+
+        return DataTable._new(data, categories, validity)
+
+    def lazy(self):
+        """
+        Starts a lazy query on the DataTable. Selections, filters, arithmetic,
+        renames, drops and sorts are recorded instead of being run, and
+        collect() runs them all at once after optimizing the plan.
+
+        Returns:
+        --------
+        A LazyTable
+        """
+        return LazyTable(self)
+
+    def rename(self, cols):
+        """
+        Rename columns in DataTable using a dictionary
+
+        Parameters:
+        -----------
+        columns: dict
+            A dict mapping old column names to the new column names
+
+        Returns:
+        --------
+        DataTable with the column name changes
+        """
+        if not isinstance(cols, dict):
+            raise TypeError('Column names must be a dict')
+
+        data = {}
+        sources = {}
+        for col, val in self._data.items():
+            data[cols.get(col, col)] = val
+            sources[cols.get(col, col)] = col
+
+        return self._derive(data, sources)
+
+    def drop(self, column):
+        """
+        Drops one or more columns in a DataTable
+
+        Parameters
+        ----------
+        columns: str or list of strings
+
+        Returns
+        -------
+        A DataTable with the column dropped
+        """
+        if isinstance(column, str):
+            column = [column]
+        elif not isinstance(column, list):
+            raise TypeError("Columns must be a str or list")
+
+        data = {}
+        for col, val in self._data.items():
+            if not col in column:
+                data[col] = val
+        
+        return self._derive(data)
+
+    def _non_agg(self, func, materialize = False, **kwargs):
+        """
+        Generic Function to recalculate columns based
+        on a non-aggregation function
+
+        Parameters
+        ----------
+        func: The function name of the non-aggregation function
+        materialize: bool
+            If True, nulls of columns with a validity bitmap are turned into
+            NaN before applying func. Otherwise func is applied to the
+            stored values and the validity bitmap is kept
+        kwargs: Any requisite extra keyword arguments for certain functions
+
+        Returns
+        -------
+        DataTable with the non-aggregation applied
+        """
+        def apply(col):
+            val = self._data[col]
+            if val.dtype.kind == 'O' or col in self._categories:
+                return val.copy()
+            if materialize and col in self._validity:
+                if val.dtype.kind == 'b':
+                    # Nullable booleans become floats, with NaN at the nulls
+                    val = np.where(self._valid(col), val, np.nan)
+                    return func(val, **kwargs)
+                return func(self._column(col), **kwargs)
+            return func(val, **kwargs)
+
+        data = dict(zip(self._data, _map_columns(apply, self.columns, self._size())))
+        table = self._derive(data)
+        if materialize:
+            for col in self._validity:
+                if col not in self._categories and self._data[col].dtype.kind != 'O':
+                    table._validity.pop(col, None)
+        return table
+
+    def abs(self):
+        """
+        Takes the absolute value of each value in the DataTable
+
+        Returns:
+        --------
+        A DataTable containing the absolute values
+        """
+        return self._non_agg(np.abs)
+
+    def round(self, n):
+        """
+        Rounds each value in the DataTable to n decimal places
+
+        Returns:
+        --------
+        A DataTable containing the rounded values
+        """
+        return self._non_agg(np.round, decimals = n)
+
+    def copy(self):
+        """
+        Makes a new copy of the DataTable. The copy shares the columns,
+        read-only, and a column is only copied once either DataTable sets
+        values in it
+
+        Returns:
+        --------
+        A new copy of the DataTable
+        """
+
+        return self._derive(dict(self._data))
+
+    def diff(self, n = 1):
+        """
+        Take the difference between the current value and
+        the nth value above it. 
+
+        Parameters:
+        -----------
+        n: int
+
+        Returns:
+        --------
+        A DataTable of values
+        """
+        def func(value):
+            return value - _shift(value, n)
+
+        return self._non_agg(func, materialize = True)
+
+    def pct_diff(self, n = 1):
+        """
+        Finds the percentage difference between the current
+        value and the nth value above it.
+
+        Parameters:
+        -----------
+        n: int
+
+        Returns:
+        --------
+        A DataTable
+        """
+        def func(value):
+            shifted = _shift(value, n)
+            value = value - shifted
+            with np.errstate(invalid = 'ignore', divide = 'ignore'):
+                value /= shifted
+            value *= 100
+            return value
+
+        return self._non_agg(func, materialize = True)
+
+    def cumsum(self):
+        """
+        Cumulative sum of each column, skipping missing values
+
+        Returns:
+        --------
+        A DataTable
+        """
+        return self._non_agg(lambda value: _accumulate(np.add, 0, value), materialize = True)
+
+    def cumprod(self):
+        """
+        Cumulative product of each column, skipping missing values
+
+        Returns:
+        --------
+        A DataTable
+        """
+        return self._non_agg(lambda value: _accumulate(np.multiply, 1, value), materialize = True)
+
+    def cummax(self):
+        """
+        Cumulative maximum of each column, skipping missing values
+
+        Returns:
+        --------
+        A DataTable
+        """
+        return self._non_agg(lambda value: _accumulate(np.maximum, -np.inf, value),
+                             materialize = True)
+
+    def cummin(self):
+        """
+        Cumulative minimum of each column, skipping missing values
+
+        Returns:
+        --------
+        A DataTable
+        """
+        return self._non_agg(lambda value: _accumulate(np.minimum, np.inf, value),
+                             materialize = True)
+
+    def rolling(self, window, min_periods = None):
+        """
+        Moving-window calculations over the last window rows
+
+        Parameters:
+        -----------
+        window: int
+            Number of rows in each window, ending at the current row
+        min_periods: int
+            Minimum number of non-missing values in a window for it to
+            have a result. Defaults to window
+
+        Returns:
+        --------
+        A Rolling object, with count, sum, mean, var, std, min and max methods
+
+        Usage:
+        ------
+        df.rolling(7).mean() ---> 7-row moving average
+        """
+        return Rolling(self, window, min_periods)
+
+    def expanding(self, min_periods = 1):
+        """
+        Calculations over all the rows up to the current one
+
+        Parameters:
+        -----------
+        min_periods: int
+            Minimum number of non-missing values for a row to have a result
+
+        Returns:
+        --------
+        A Rolling object whose window spans the whole DataTable
+        """
+        return Rolling(self, max(len(self), 1), min_periods)
+
+    def _operation(self, op, other):
+        """
+        Operator function for DataTable operations
+
+        Parameters:
+        -----------
+        op: str of the operator method
+        other: the other operand
+
+        Returns:
+        --------
+        A DataTable. Results involving a null are null
+        """
+        other_valid = None
+        if isinstance(other, DataTable):
+            if other.shape[1] != 1:
+                raise ValueError("DataTable must be of a single column")
+            other_col = next(iter(other._data))
+            if other_col in other._validity:
+                other_valid = other._valid(other_col)
+                other = other._data[other_col]
+            else:
+                other = other._column(other_col)
+        # Compacted integers are widened so that arithmetic cannot overflow
+        widen = op not in _COMPARISONS
+        if widen and isinstance(other, np.ndarray):
+            other = _widen(other)
+
+        def apply(col):
+            val = self._data[col]
+            if col in self._categories:
+                result = self._categorical_operation(col, op, other)
+                valid = other_valid
+            else:
+                if widen:
+                    val = _widen(val)
+                if val.dtype.kind in 'iu' and isinstance(other, int) and \
+                        not isinstance(other, bool):
+                    # Promote by the scalar's value, so that a scalar too large
+                    # for a compacted column widens it rather than raising
+                    val = val.astype(np.result_type(val, np.min_scalar_type(other)),
+                                     copy = False)
+                valid = self._valid(col)
+                if other_valid is not None:
+                    valid = other_valid if valid is None else valid & other_valid
+                if valid is None:
+                    result = getattr(val, op)(other)
+                else:
+                    # Nulls hold arbitrary values, which may warn
+                    with np.errstate(all = 'ignore'):
+                        result = getattr(val, op)(other)
+            if valid is not None:
+                result = np.ma.MaskedArray(result, mask = ~valid)
+            return result
+
+        data = dict(zip(self._data, _map_columns(apply, self.columns, self._size())))
+        return DataTable(data, copy = False)
+
+    def _categorical_operation(self, col, op, other):
+        """
+        Applies an operator to a categorical column. With a scalar operand
+        the operator runs once per category, and the results are gathered
+        by code. Missing values compare unequal to everything.
+        """
+        if isinstance(other, np.ndarray):
+            return getattr(self._column(col), op)(other)
+
+        categories = self._categories[col]
+        results = np.asarray(getattr(categories, op)(other))
+        if results.shape != categories.shape:
+            return getattr(self._column(col), op)(other)
+
+        if results.dtype.kind == 'b':
+            lookup = np.empty(len(categories) + 1, dtype = 'bool')
+            lookup[-1] = op == '__ne__'
+        else:
+            lookup = np.empty(len(categories) + 1, dtype = 'object')
+            lookup[-1] = None
+        lookup[:-1] = results
+        return lookup[self._data[col]]
+
+    def __add__(self, other):
+        return self._operation('__add__', other)
+
+    def __sub__(self, other):
+        return self._operation('__sub__', other)
+
+    def __mul__(self, other):
+        return self._operation('__mul__', other)
+
+    def __truediv__(self, other):
+        return self._operation('__truediv__', other)
+
+    def __radd__(self, other):
+        return self._operation('__radd__', other)
+
+    def __rsub__(self, other):
+        return self._operation('__rsub__', other)
+
+    def __rmul__(self, other):
+        return self._operation('__rmul__', other)
+
+    def __floordiv__(self, other):
+        return self._operation('__floordiv__', other)
+
+    def __pow__(self, other):
+        return self._operation('__pow__', other)
+
+    def __eq__(self, other):
+        return self._operation('__eq__', other)
+
+    def __ne__(self, other):
+        return self._operation('__ne__', other)
+
+    def __lt__(self, other):
+        return self._operation('__lt__', other)
+
+    def __le__(self, other):
+        return self._operation('__le__', other)
+
+    def __gt__(self, other):
+        return self._operation('__gt__', other)
+
+    def __ge__(self, other):
+        return self._operation('__ge__', other)
+
+    def __and__(self, other):
+        return self._operation('__and__', other)
+
+    def __or__(self, other):
+        return self._operation('__or__', other)
+
+    def __invert__(self):
+        data = {}
+        for col, val in self._data.items():
+            if col in self._validity:
+                data[col] = np.ma.MaskedArray(~val, mask = ~self._valid(col))
+            else:
+                data[col] = ~self._column(col)
+        return DataTable(data, copy = False)
+
+    def create_index(self, col, kind = 'sorted'):
+        """
+        Builds an index on a column, which lookup and range then use instead
+        of scanning the column. The index is dropped when the column is
+        replaced. Missing values are not indexed.
+
+        Parameters:
+        -----------
+        col: str
+        kind: str
+            'sorted' (default) keeps the row positions ordered by value and
+            answers lookup and range with binary searches. 'hash' maps every
+            distinct value to its rows, and only answers lookup
+
+        Returns:
+        --------
+        None
+        """
+        if col not in self._data:
+            raise KeyError(col)
+        if kind not in ('sorted', 'hash'):
+            raise ValueError("kind must be 'sorted' or 'hash'")
+
+        val = self._data[col]
+        missing = self._missing(col)
+        rows = np.flatnonzero(~missing) if missing.any() else np.arange(len(val))
+        keys = val[rows]
+        index = {'array': val, 'kind': kind}
+        if kind == 'sorted':
+            order = _stable_argsort(keys)
+            index['rows'] = rows[order]
+            index['keys'] = keys[order]
+        else:
+            codes, uniques = _factorize(keys)
+            order = _stable_argsort(codes)
+            ends = np.cumsum(np.bincount(codes, minlength = len(uniques)))
+            starts = ends - np.diff(ends, prepend = 0)
+            index['rows'] = rows[order]
+            index['bounds'] = dict(zip(uniques.tolist(), zip(starts.tolist(), ends.tolist())))
+        self._indexes[col] = index
+
+    def _index_of(self, col):
+        """
+        The index of a column, or None if it has none or the column was
+        replaced since the index was built
+        """
+        index = self._indexes.get(col)
+        if index is None or index['array'] is not self._data[col]:
+            return None
+        return index
+
+    def _probe_keys(self, col, values):
+        """
+        The distinct non-missing values to look up in a column, as stored
+        in it: codes for categorical columns
+        """
+        if not isinstance(values, (list, tuple, np.ndarray)):
+            values = [values]
+        values = [v for v in dict.fromkeys(np.asarray(values, dtype = 'object').tolist())
+                  if not _is_missing_scalar(v)]
+        if col in self._categories:
+            codes = _lookup(self._categories[col], np.array(values, dtype = 'object'))
+            return codes[codes >= 0]
+        kind = self._data[col].dtype.kind
+        return np.array(values, dtype = 'object' if kind == 'O' else None)
+
+    def lookup(self, col, values):
+        """
+        Finds the rows where a column equals one or more values. With an
+        index on the column every value is found with a binary search
+        (or a hash probe), otherwise the column is scanned once
+
+        Parameters:
+        -----------
+        col: str
+        values: scalar or list
+            The value(s) to look up
+
+        Returns:
+        --------
+        A DataTable of the matching rows, in their original order
+        """
+        if col not in self._data:
+            raise KeyError(col)
+        probe = self._probe_keys(col, values)
+        index = self._index_of(col)
+
+        if index is None:
+            val = self._data[col]
+            if len(probe) == 0:
+                rows = np.zeros(0, dtype = 'intp')
+            else:
+                if probe.dtype.kind != 'O':
+                    probe = np.unique(probe)
+                rows = np.flatnonzero((_lookup(probe, val) >= 0) & ~self._missing(col))
+            return self._take_rows(rows)
+
+        if index['kind'] == 'sorted':
+            starts = np.searchsorted(index['keys'], probe, 'left')
+            ends = np.searchsorted(index['keys'], probe, 'right')
+        else:
+            bounds = [index['bounds'].get(v, (0, 0)) for v in probe.tolist()]
+            starts = np.array([b[0] for b in bounds], dtype = 'intp')
+            ends = np.array([b[1] for b in bounds], dtype = 'intp')
+        return self._take_rows(np.sort(index['rows'][_ranges(starts, ends)]))
+
+    def range(self, col, low = None, high = None):
+        """
+        Finds the rows where a column lies between low and high, both
+        included. With a sorted index on the column the bounds are found
+        with two binary searches, otherwise the column is scanned
+
+        Parameters:
+        -----------
+        col: str
+        low, high: scalars
+            The bounds. None leaves that side open
+
+        Returns:
+        --------
+        A DataTable of the matching rows, in their original order
+        """
+        if col not in self._data:
+            raise KeyError(col)
+        if col in self._categories:
+            # Categories are sorted, so a range of values is a range of codes
+            categories = self._categories[col]
+            low = None if low is None else int(np.searchsorted(categories, low, 'left'))
+            high = None if high is None else int(np.searchsorted(categories, high, 'right')) - 1
+
+        index = self._index_of(col)
+        if index is None or index['kind'] != 'sorted':
+            missing = self._missing(col)
+            rows = np.flatnonzero(~missing)
+            val = self._data[col][rows]
+            keep = np.ones(len(rows), dtype = 'bool')
+            if low is not None:
+                keep &= np.asarray(val >= low, dtype = 'bool')
+            if high is not None:
+                keep &= np.asarray(val <= high, dtype = 'bool')
+            return self._take_rows(rows[keep])
+
+        keys = index['keys']
+        start = 0 if low is None else np.searchsorted(keys, low, 'left')
+        end = len(keys) if high is None else np.searchsorted(keys, high, 'right')
+        return self._take_rows(np.sort(index['rows'][start:max(start, end)]))
+
+    def _take_rows(self, rows):
+        """
+        Gathers the rows at the positions in the integer array rows
+        """
+        return self._derive({col: val[rows] for col, val in self._data.items()},
+                            rows = rows)
+
+    def _select_top(self, n, key, largest):
+        if isinstance(key, str):
+            key = [key]
+        elif not isinstance(key, list) or len(key) == 0:
+            raise TypeError("Key must be a string or a non-empty list")
+        if not isinstance(n, int) or isinstance(n, bool) or n < 0:
+            raise ValueError("n must be a non-negative integer")
+
+        # Partition on the first key to find the n best rows, keeping every
+        # row tied with the n-th one so that the other keys can break ties
+        first = key[0]
+        missing = self._missing(first)
+        rows = np.flatnonzero(~missing) if missing.any() else np.arange(len(self))
+        ranked = _ascending_key(self._data[first][rows], missing[rows], largest)
+        if n == 0:
+            rows = rows[:0]
+        elif n < len(rows):
+            threshold = ranked[np.argpartition(ranked, n - 1)[n - 1]]
+            rows = rows[ranked <= threshold]
+
+        # Only the candidates are sorted, by every key
+        sort_keys = []
+        for col in key:
+            missing = self._missing(col, rows)
+            if missing.any():
+                sort_keys.append(missing)
+            sort_keys.append(_ascending_key(self._data[col][rows], missing, largest))
+        return self._take_rows(rows[_stable_order(sort_keys)[:n]])
+
+    def nlargest(self, n, key):
+        """
+        The n rows with the largest values of the key, in descending order.
+        The rows are selected with np.argpartition, and only those are
+        sorted, which is much faster than sorting the whole DataTable
+
+        Parameters:
+        -----------
+        n: int
+        key: str or list
+            Column(s) to order by. Columns after the first break ties, and
+            rows still tied keep their order. Rows missing the first key
+            are left out
+
+        Returns:
+        --------
+        A DataTable of at most n rows
+        """
+        return self._select_top(n, key, True)
+
+    def nsmallest(self, n, key):
+        """
+        The n rows with the smallest values of the key, in ascending order.
+        The rows are selected with np.argpartition, and only those are
+        sorted, which is much faster than sorting the whole DataTable
+
+        Parameters:
+        -----------
+        n: int
+        key: str or list
+            Column(s) to order by. Columns after the first break ties, and
+            rows still tied keep their order. Rows missing the first key
+            are left out
+
+        Returns:
+        --------
+        A DataTable of at most n rows
+        """
+        return self._select_top(n, key, False)
+
+    def argsort_vals(self, key, ascending = True, na_position = 'last'):
+        """
+        The permutation of the rows that sorts the DataTable by one or more
+        columns, as an integer array. It can be reused to order other
+        DataTables of the same length, e.g. df2[df.argsort_vals('a'), :]
+
+        The sort is stable: rows with equal keys keep their order, in both
+        directions. Integer, boolean and categorical keys with a small
+        range of values are sorted with a radix sort, and several such
+        keys are combined into a single integer key first.
+
+        Parameters:
+        -----------
+        key: str or list
+            Column(s) to sort by, most significant first
+        ascending: bool or list of bools
+            Sort direction, for all keys or for each one
+        na_position: str
+            'last' (default) or 'first': where missing values go
+
+        Returns:
+        --------
+        An np.intp array of row positions
+        """
+        if isinstance(key, str):
+            key = [key]
+        elif not isinstance(key, list) or len(key) == 0:
+            raise TypeError("Key must be a list or a string")
+        if isinstance(ascending, bool):
+            ascending = [ascending] * len(key)
+        elif not isinstance(ascending, list) or len(ascending) != len(key):
+            raise ValueError("ascending must be a bool or a list with one bool per key")
+        if na_position not in ('last', 'first'):
+            raise ValueError("na_position must be 'last' or 'first'")
+
+        sort_keys = []
+        for col, asc in zip(key, ascending):
+            missing = self._missing(col)
+            if missing.any():
+                sort_keys.append(missing if na_position == 'last' else ~missing)
+            sort_keys.append(_ascending_key(self._data[col], missing, not asc))
+        return _stable_order(sort_keys)
+
+    def sort_vals(self, key, ascending = True, na_position = 'last'):
+        """
+        Sort the DataTable by one or more values
+
+        Parameters:
+        -----------
+        key: str or list
+            Column(s) on the basis of which sorting will be done
+        
+        ascending: bool or list of bools
+            In which order it will be sorted. True (ascending) by default.
+            A list gives the order of each key
+
+        na_position: str
+            'last' (default) or 'first': where missing values go
+
+        Returns:
+        --------
+        A DataTable sorted by the given key. The sort is stable, see
+        argsort_vals
+        """
+        if isinstance(key, str) and ascending is True and self._is_sorted_column(key):
+            # Already in order, which the statistics cache remembers
+            return self._derive(dict(self._data))
+
+        return self._take_rows(self.argsort_vals(key, ascending, na_position))
+
+    def sample(self, n = None, fraction = None, replace = False, seed = None,
+               stratified = None):
+        """
+        Return random rows of the DataTable
+
+        Rows are drawn with a np.random.Generator of their own, leaving the
+        global NumPy random state alone, so concurrent callers do not
+        interfere. Without replacement, a few rows are drawn in time
+        proportional to their number rather than to the DataTable's length.
+
+        Parameters:
+        -----------
+        n: int
+            Exact number of rows to be returned, or per group if stratified
+        fraction: float
+            A fraction of the total number of rows to be returned, or of
+            the rows of each group if stratified
+        replace: bool
+            Whether or not select rows with replacement (can cause duplication)
+        seed: int or np.random.Generator
+            Seed for the random number generator, or the generator itself
+        stratified: str or list
+            Column(s) whose groups are sampled separately, in one pass over
+            the group codes. Rows with a missing key are left out. Without
+            replacement, n must not exceed the size of any group
+
+        Returns:
+        --------
+        A DataTable of the sampled rows. Stratified samples are ordered by
+        group
+        """
+        rng = np.random.default_rng(seed)
+
+        if fraction is not None:
+            if fraction <= 0:
+                raise ValueError("fraction must be positive")
+            if fraction > 1 and not replace:
+                raise ValueError("fraction cannot exceed 1 without replacement")
+        elif not isinstance(n, int) or isinstance(n, bool):
+            raise TypeError("n must be an integer")
+        elif n < 0:
+            raise ValueError("n must not be negative")
+
+        if stratified is not None:
+            return self._sample_groups(GroupBy(self, stratified), n, fraction, replace, rng)
+
+        if fraction is not None:
+            n = int(fraction * len(self))
+        if replace:
+            rows = rng.integers(0, len(self), n) if len(self) else np.zeros(0, dtype = 'intp')
+        else:
+            if n > len(self):
+                raise ValueError("Cannot sample more rows than the DataTable has without replacement")
+            rows = rng.choice(len(self), n, replace = False)
+        return self._take_rows(rows)
+
+    def _sample_groups(self, grouped, n, fraction, replace, rng):
+        sizes = grouped._sizes
+        if fraction is not None:
+            counts = (fraction * sizes).astype('int64')
+        else:
+            counts = np.full(len(sizes), n, dtype = 'int64')
+
+        if not replace and fraction is None and len(sizes) and n > sizes.min():
+            raise ValueError("Cannot sample more rows than a group has without replacement")
+
+        if replace:
+            order, starts = grouped._sorted_order()
+            group = np.repeat(np.arange(len(sizes)), counts)
+            offsets = (rng.random(len(group)) * sizes[group]).astype('intp')
+            return self._take_rows(order[starts[group] + offsets])
+
+        # Rows shuffled, then grouped by a stable sort: the first rows of
+        # every group are a uniform sample of it
+        codes = grouped._codes
+        shuffled = rng.permutation(len(self))
+        shuffled = shuffled[codes[shuffled] >= 0]
+        shuffled = shuffled[_stable_argsort(codes[shuffled])]
+        group = codes[shuffled]
+        rank = np.arange(len(shuffled)) - (np.cumsum(sizes) - sizes)[group]
+        return self._take_rows(shuffled[rank < counts[group]])
+
+    def save(self, path):
+        """
+        Saves the DataTable to a directory in tisch's native columnar format:
+        one raw binary file per column and a schema.json file describing
+        them. String columns are stored as UTF-8 data plus an array of
+        offsets, and categorical columns as their codes plus their
+        categories. Validity bitmaps are stored as they are, in a .valid
+        file. Saved DataTables are read back with tisch.load.
+
+        Parameters:
+        -----------
+        path: str
+            Directory to save to. It is created if it does not exist, and
+            an earlier save there is replaced
+
+        Returns:
+        --------
+        None
+        """
+        os.makedirs(path, exist_ok = True)
+        # An earlier save stops being loadable before any of its files is
+        # overwritten, so a failed save never reads back as a mix of both
+        if os.path.exists(os.path.join(path, 'schema.json')):
+            os.remove(os.path.join(path, 'schema.json'))
+
+        written = set()
+
+        def target(name):
+            # Unlinked rather than truncated, so that tables loaded from the
+            # earlier save keep their mapped files
+            written.add(name)
+            if os.path.exists(os.path.join(path, name)):
+                os.remove(os.path.join(path, name))
+            return os.path.join(path, name)
+
+        schema = {'format': 'tisch', 'version': 1, 'length': len(self), 'columns': []}
+        for i, (col, val) in enumerate(self._data.items()):
+            stem = f"col_{i}"
+            if col in self._categories:
+                offsets, data, _ = _encode_strings(self._categories[col], col)
+                offsets.tofile(target(stem + '.offsets'))
+                with open(target(stem + '.data'), 'wb') as f:
+                    f.write(data)
+                np.ascontiguousarray(val).tofile(target(stem + '.bin'))
+                entry = {'name': col, 'kind': 'categorical', 'dtype': val.dtype.str,
+                         'file': stem}
+            elif val.dtype.kind == 'O':
+                offsets, data, nulls = _encode_strings(val, col)
+                offsets.tofile(target(stem + '.offsets'))
+                with open(target(stem + '.data'), 'wb') as f:
+                    f.write(data)
+                entry = {'name': col, 'kind': 'string', 'file': stem}
+                if nulls is not None:
+                    nulls.tofile(target(stem + '.nulls'))
+                    entry['nulls'] = True
+            else:
+                np.ascontiguousarray(val).tofile(target(stem + '.bin'))
+                entry = {'name': col, 'kind': 'numeric', 'dtype': val.dtype.str, 'file': stem}
+            if col in self._validity:
+                self._validity[col].tofile(target(stem + '.valid'))
+                entry['valid'] = True
+            schema['columns'].append(entry)
+
+        # Column files of an earlier save that this one did not overwrite
+        for name in os.listdir(path):
+            stem, _, suffix = name.partition('.')
+            if (name not in written and stem.startswith('col_') and stem[4:].isdigit()
+                    and suffix in ('bin', 'offsets', 'data', 'nulls', 'valid')):
+                os.remove(os.path.join(path, name))
 
-class ArrayCounter:
+        # The schema is written last, so a partial save cannot be loaded
+        with open(os.path.join(path, 'schema.json'), 'w') as f:
+            json.dump(schema, f, indent = 2)
+
+
+
+class GroupBy:
     """
-    A substitute to the original collections.Counter class, but it
-    takes in a NumPy Array
+    Rows of a DataTable grouped by one or more key columns.
+
+    The keys are factorized once into integer group codes, and every
+    aggregation then runs in a single vectorized pass over each column
+    (np.bincount and ufunc.reduceat), regardless of the number of groups.
+    Rows with a missing key are left out, and nulls of the aggregated
+    columns are skipped.
     """
-    def __init__(self, arr: np.ndarray):
-        self._arr = arr
-        self._dict = {}
-        for x in arr:
-            self._dict[x] = self._dict.get(x, 0) + 1
-        
-    def __getitem__(self, x):
-        return self._dict.get(x, 0)
 
-    def items(self):
-        return self._dict.items()
+    AGG_FUNCS = ['sum', 'mean', 'min', 'max', 'count', 'size',
+                 'var', 'std', 'first', 'last']
+
+    def __init__(self, table, keys):
+        if isinstance(keys, str):
+            keys = [keys]
+        elif not isinstance(keys, list) or len(keys) == 0:
+            raise TypeError("Keys must be a string or a non-empty list")
+
+        for key in keys:
+            if key not in table._data:
+                raise KeyError(key)
+
+        self._table = table
+        self._keys = keys
+        self._codes, self._ngroups, self._key_values = _group_codes(
+            [table._data[key] for key in keys],
+            [table._categories.get(key) for key in keys],
+            [table._valid(key) for key in keys])
+        # Shared by the results of every aggregation, which copy them
+        # before any change
+        for values in self._key_values:
+            values.flags.writeable = False
+        self._valid = self._codes >= 0
+        self._sizes = np.bincount(self._codes[self._valid], minlength = self._ngroups)
+        self._order = None
+
+    @classmethod
+    def _from_codes(cls, table, codes, ngroups, keys = None, key_values = None):
+        """
+        Groups the rows of table by group codes that are already computed,
+        with -1 for the rows left out
+        """
+        grouped = cls.__new__(cls)
+        grouped._table = table
+        grouped._keys = keys if keys is not None else []
+        grouped._ngroups = ngroups
+        grouped._key_values = key_values if key_values is not None else []
+        grouped._codes = codes
+        grouped._valid = codes >= 0
+        grouped._sizes = np.bincount(codes[grouped._valid], minlength = ngroups)
+        grouped._order = None
+        return grouped
+
+    def _excluding(self, valid):
+        """
+        The same groups, leaving out the rows where valid is False
+        """
+        return GroupBy._from_codes(self._table, np.where(valid, self._codes, -1),
+                                   self._ngroups, self._keys, self._key_values)
 
-    def uniques_counts(self):
-        l = [[], []]
-        for x, y in self._dict.items():
-            l[0].append(x)
-            l[1].append(y)
+    def _sorted_order(self):
+        """
+        Row order that puts the rows of every group next to each other,
+        along with the position where each group starts in that order
+        """
+        if self._order is None:
+            order = np.argsort(self._codes, kind = 'stable')
+            self._order = order[len(self._codes) - self._valid.sum():]
+            self._starts = np.cumsum(self._sizes) - self._sizes
+        return self._order, self._starts
+
+    def _sum(self, val):
+        if val.dtype.kind == 'f':
+            return np.bincount(self._codes[self._valid], weights = val[self._valid],
+                               minlength = self._ngroups)
+        result = self._reduceat(np.add, val.astype('int64') if val.dtype.kind == 'b' else _widen(val))
+        return np.ma.filled(result, 0)
+
+    def _reduceat(self, ufunc, val):
+        if self._ngroups == 0:
+            return val[:0]
+        order, starts = self._sorted_order()
+        return self._per_group(lambda starts: ufunc.reduceat(val[order], starts), starts, val)
+
+    def _per_group(self, func, starts, val):
+        """
+        Applies func to the starts of the non-empty groups. Empty groups,
+        which only occur once null rows are left out, are masked
+        """
+        nonempty = self._sizes > 0
+        if nonempty.all():
+            return func(starts)
+        result = np.zeros(self._ngroups, dtype = val.dtype)
+        if nonempty.any():
+            result[nonempty] = func(starts[nonempty])
+        return np.ma.MaskedArray(result, mask = ~nonempty)
+
+    def _aggregate_categorical(self, codes, categories, func):
+        if func not in self.AGG_FUNCS:
+            raise ValueError(f"Aggregation function must be one of {self.AGG_FUNCS}")
+        if func in ('count', 'size', 'first', 'last'):
+            if func == 'count':
+                return np.bincount(self._codes[self._valid & (codes >= 0)],
+                                   minlength = self._ngroups)
+            result = self._aggregate(codes, func)
+        elif func == 'min':
+            # Missing codes are moved past the last category, which decodes to None
+            result = self._reduceat(np.minimum, np.where(codes < 0, len(categories), codes))
+        elif func == 'max':
+            result = self._reduceat(np.maximum, codes)
+        else:
+            raise TypeError(f"Cannot compute {func} of a categorical column")
+        return result if func == 'size' else _decode_categorical(result, categories)
 
-        return [np.array(l[0]), np.array(l[1])]
+    def _aggregate(self, val, func):
+        if func not in self.AGG_FUNCS:
+            raise ValueError(f"Aggregation function must be one of {self.AGG_FUNCS}")
 
-class DataTable:
+        if func == 'size':
+            return self._sizes.copy()
 
-    def __init__(self, data):
+        if func == 'count':
+            if val.dtype.kind == 'O':
+                present = val != None
+            elif val.dtype.kind in 'fc':
+                present = ~np.isnan(val)
+            else:
+                return self._sizes.copy()
+            return np.bincount(self._codes[self._valid & present], minlength = self._ngroups)
+
+        if func in ('first', 'last'):
+            if self._ngroups == 0:
+                return val[:0]
+            order, starts = self._sorted_order()
+            if func == 'last':
+                starts = starts + self._sizes - 1
+            return self._per_group(lambda starts: val[order[starts]], starts, val)
+
+        if func in ('min', 'max'):
+            return self._reduceat(np.minimum if func == 'min' else np.maximum, val)
+
+        if val.dtype.kind not in 'biuf':
+            raise TypeError(f"Cannot compute {func} of a non-numeric column")
+
+        if func == 'sum':
+            return self._sum(val)
+
+        with np.errstate(invalid = 'ignore', divide = 'ignore'):
+            mean = self._sum(val.astype('float64')) / self._sizes
+            if func == 'mean':
+                return mean
+
+            deviations = val[self._valid] - mean[self._codes[self._valid]]
+            var = np.bincount(self._codes[self._valid], weights = deviations ** 2,
+                              minlength = self._ngroups) / self._sizes
+            if func == 'var':
+                return var
+            return np.sqrt(var)
+
+    def _aggregate_column(self, col, func):
         """
-        A DataTable denotes a table of values, and the values can be of any type.
-        DataTable is created by passing a dictionary of keys and a list of values
-        for those keys.
+        Aggregates one column of the table per group, skipping its nulls
+        """
+        val = self._table._data[col]
+        if col in self._table._categories:
+            return self._aggregate_categorical(val, self._table._categories[col], func)
+        if col in self._table._validity and func != 'size':
+            return self._excluding(self._table._valid(col))._aggregate(val, func)
+        return self._aggregate(val, func)
+
+    def agg(self, funcs):
+        """
+        Aggregates each group
 
         Parameters:
         -----------
-        data: dict
-            A dictionary of string keys, each mapped to a NumPy Array 
+        funcs: str, list or dict
+            A function name (or list of names) to apply to every non-key
+            column, or a dict mapping column names to a function name or
+            a list of function names. Available functions are sum, mean,
+            min, max, count, size, var, std, first and last.
+
+        Returns:
+        --------
+        A DataTable with one row per group, holding the key columns followed
+        by the aggregated columns. Columns aggregated with a single function
+        keep their name, otherwise the function name is appended to it
+        (e.g. 'price_mean'). A key column aggregated on its own always gets
+        the function name appended, so that it does not replace the keys.
         """
+        skip_errors = not isinstance(funcs, dict)
+        if skip_errors:
+            funcs = {col: funcs for col in self._table.columns if col not in self._keys}
+
+        data = dict(zip(self._keys, self._key_values))
+        for col, col_funcs in funcs.items():
+            if col not in self._table._data:
+                raise KeyError(col)
+
+            names = [col_funcs] if isinstance(col_funcs, str) else col_funcs
+            for func in names:
+                name = col if isinstance(col_funcs, str) and col not in self._keys \
+                    else f"{col}_{func}"
+                try:
+                    data[name] = self._aggregate_column(col, func)
+                except TypeError:
+                    if not skip_errors:
+                        raise
+
+        return DataTable(data, copy = False)
 
-        self._check_input_type(data)
-        self._check_array_length(data)
+    def sum(self):
+        return self.agg('sum')
 
-        self._data = self._convert_unicode_to_object(data)
+    def mean(self):
+        return self.agg('mean')
 
+    def min(self):
+        return self.agg('min')
 
-    def _check_input_type(self, data):
-        if not isinstance(data, dict):
-            raise TypeError("Input type is not a dictionary")
-        
-        for key, value in data.items():
-            if not isinstance(key, str):
-                raise TypeError(f"Dictionary keys must be a string")            
-            if not isinstance(value, np.ndarray):
-                raise TypeError(f"Dictionary values must be a NumPy array")
-            if value.ndim != 1:
-                raise ValueError(f"Dictionary values must be a 1-dimensional array")
+    def max(self):
+        return self.agg('max')
 
-    def _check_array_length(self, data):
-        for i, value in enumerate(data.values()):
-            if i == 0:
-                arr_len = len(value)
-            elif arr_len != len(value):
-                raise ValueError("All arrays must be of the same length") 
+    def count(self):
+        return self.agg('count')
 
-    def _convert_unicode_to_object(self, data):
-        updated_data = {}
-        for k, v in data.items():
-            if v.dtype.kind == 'U':
-                updated_data[k] = v.astype('object')
-            else:
-                updated_data[k] = v
-        return updated_data
+    def var(self):
+        return self.agg('var')
 
-    def __len__(self):
-        return len(next(iter(self._data.values())))
+    def std(self):
+        return self.agg('std')
 
-    @property
-    def columns(self):
-        """
-        Gives a list of the column names for the current DataTable.
+    def first(self):
+        return self.agg('first')
 
+    def last(self):
+        return self.agg('last')
+
+    def size(self):
+        """
         Returns
         -------
-        A list of column names
+        A DataTable with the key columns and the number of rows in each group
         """
-        return list(self._data)
+        data = dict(zip(self._keys, self._key_values))
+        data['size'] = self._sizes.copy()
+        return DataTable(data, copy = False)
 
-    @columns.setter
-    def columns(self, cols):
-        """
-        Takes in a list of columns, which is of the same length of the
-        current number of columns in the DataTable, and replaces the old
-        column names with new column names.
 
-        Parameters
-        ----------
-        cols: A list of strings
+class Expr:
+    """
+    An expression over the columns of a LazyTable, used to filter its rows.
+    Expressions are built with tisch.col and combined with comparison,
+    arithmetic and boolean (&, |, ~) operators.
+    """
+
+    SYMBOLS = {
+        '__eq__': '==', '__ne__': '!=', '__lt__': '<', '__le__': '<=',
+        '__gt__': '>', '__ge__': '>=', '__and__': '&', '__or__': '|',
+        '__add__': '+', '__sub__': '-', '__mul__': '*', '__truediv__': '/',
+        '__floordiv__': '//', '__pow__': '**'
+    }
 
+    def __init__(self, op, left = None, right = None):
+        self._op = op
+        self._left = left
+        self._right = right
+
+    def columns(self):
+        """
         Returns
         -------
-        None
+        The set of column names the expression reads
         """
-        if not isinstance(cols, list):
-            raise TypeError("Columns must be a list")
-        
-        if len(cols) != len(self._data):
-            raise ValueError("New column list must be of same length as old list")
-        
-        for s in cols:
-            if not isinstance(s, str):
-                raise TypeError("Column names must be strings")
+        if self._op == 'col':
+            return {self._left}
+        cols = set()
+        for operand in (self._left, self._right):
+            if isinstance(operand, Expr):
+                cols |= operand.columns()
+        return cols
+
+    def _evaluate(self, table):
+        """
+        Evaluates the expression against a DataTable, using the DataTable's
+        own operators
 
-        if len(cols) != len(set(cols)):
-            raise ValueError("Column names must not have duplicates")
+        Returns
+        -------
+        A one-column DataTable
+        """
+        if self._op == 'col':
+            return table[self._left]
+        left = self._left._evaluate(table)
+        if self._op == '__invert__':
+            return ~left
+        right = self._right
+        if isinstance(right, Expr):
+            right = right._evaluate(table)
+        return getattr(left, self._op)(right)
 
-        self._data = dict(zip(cols, self._data.values()))
+    def __repr__(self):
+        if self._op == 'col':
+            return self._left
+        if self._op == '__invert__':
+            return f"~{self._left!r}"
+        return f"({self._left!r} {self.SYMBOLS[self._op]} {self._right!r})"
 
-    @property
-    def shape(self):
+    def _binary(self, op, other):
+        if isinstance(other, (DataTable, LazyTable)):
+            raise TypeError("Expressions can only be combined with expressions and scalars")
+        return Expr(op, self, other)
+
+    def __eq__(self, other):
+        return self._binary('__eq__', other)
+
+    def __ne__(self, other):
+        return self._binary('__ne__', other)
+
+    def __lt__(self, other):
+        return self._binary('__lt__', other)
+
+    def __le__(self, other):
+        return self._binary('__le__', other)
+
+    def __gt__(self, other):
+        return self._binary('__gt__', other)
+
+    def __ge__(self, other):
+        return self._binary('__ge__', other)
+
+    def __and__(self, other):
+        return self._binary('__and__', other)
+
+    def __or__(self, other):
+        return self._binary('__or__', other)
+
+    def __invert__(self):
+        return Expr('__invert__', self)
+
+    def __add__(self, other):
+        return self._binary('__add__', other)
+
+    def __sub__(self, other):
+        return self._binary('__sub__', other)
+
+    def __mul__(self, other):
+        return self._binary('__mul__', other)
+
+    def __truediv__(self, other):
+        return self._binary('__truediv__', other)
+
+    def __floordiv__(self, other):
+        return self._binary('__floordiv__', other)
+
+    def __pow__(self, other):
+        return self._binary('__pow__', other)
+
+def col(name):
+    """
+    Refers to a column in a lazy query
+
+    Usage:
+    ------
+    dt.lazy()[tisch.col('a') > 3]
+
+    Returns:
+    --------
+    An Expr
+    """
+    if not isinstance(name, str):
+        raise TypeError("Column name must be a string")
+    return Expr('col', name)
+
+class LazyTable:
+    """
+    A query plan over a DataTable, created by DataTable.lazy().
+
+    Every method records a step and returns a new LazyTable. collect()
+    optimizes the plan before running it:
+
+    - only the columns that the rest of the plan uses are read from the
+      source DataTable, and selections are narrowed to them
+    - filters are combined into a single boolean mask, which is applied
+      to the surviving columns only when arithmetic or sorting needs the
+      filtered rows, or at the end of the plan
+    """
+
+    def __init__(self, table, plan = None):
+        self._source = table
+        self._plan = plan or []
+
+    def _with(self, *step):
+        return LazyTable(self._source, self._plan + [step])
+
+    def __getitem__(self, index):
         """
-        Returns
-        -------
-        A tuple consisting of number of rows and columns
+        lt['col1'] ---> Selects only 'col1'
+        lt[['col1', 'col2']] ---> Selects both 'col1' and 'col2'
+        lt[expr] ---> Keeps the rows where the boolean expression holds
         """
-        return len(self), len(self._data)
+        if isinstance(index, str):
+            return self._with('select', [index])
+        if isinstance(index, list):
+            return self._with('select', index)
+        if isinstance(index, Expr):
+            return self._with('filter', index)
+        raise TypeError("Pass either a string, list or expression")
 
-    def _repr_html_(self):
-        html = '<table><thead><tr><th></th>'
-        for col in self.columns:
-            html += f"<th>{col:10}</th>"
-        
-        html += '</tr></thead>'
-        html += '<tbody>'
+    def filter(self, expr):
+        """
+        Keeps the rows where the boolean expression holds
+        """
+        if not isinstance(expr, Expr):
+            raise TypeError("Filter must be an expression")
+        return self._with('filter', expr)
 
-        only_head = False
-        num_head = 10
-        num_tail = 10
+    def rename(self, cols):
+        if not isinstance(cols, dict):
+            raise TypeError('Column names must be a dict')
+        return self._with('rename', cols)
 
-        if len(self) <= 20:
-            only_head = True
-            num_head = len(self)
+    def drop(self, column):
+        if isinstance(column, str):
+            column = [column]
+        elif not isinstance(column, list):
+            raise TypeError("Columns must be a str or list")
+        return self._with('drop', column)
 
-        for i in range(num_head):
-            html += f'<tr><td><strong>{i}</strong></td>'
-            for col, values in self._data.items():
-                kind = values.dtype.kind
+    def sort_vals(self, key, ascending = True, na_position = 'last'):
+        if not isinstance(key, (str, list)):
+            raise TypeError("Key must be a list or a string")
+        return self._with('sort', key, ascending, na_position)
 
-                if kind == 'f':
-                    html += f'<td>{values[i]:10.3f}</td>'
-                elif kind == 'b':
-                    html += f'<td>{values[i]}</td>'
-                elif kind == 'O':
-                    v = values[i]
-                    if v is None:
-                        v = 'None'
-                    html += f'<td>{v:10}</td>'
-                else:
-                    html += f'<td>{values[i]:10}</td>'
-            html += f'</tr>'
+    def _operation(self, op, other):
+        if isinstance(other, (Expr, LazyTable)):
+            raise TypeError("Operand must be a scalar, array or DataTable")
+        return self._with('operation', op, other)
 
-        if not only_head:
-            html += f'<tr><strong><td>...</td></strong>'
-            for i in range(len(self.columns)):
-                html += '<td>...</td>'
-            html += f'</tr>'
+    def __add__(self, other):
+        return self._operation('__add__', other)
 
-            for i in range(-num_tail, 0):
-                html += f'<tr><td><strong>{len(self) + i}</strong></td>'
-                for col, values in self._data.items():
-                    kind = values.dtype.kind
+    def __sub__(self, other):
+        return self._operation('__sub__', other)
 
-                    if kind == 'f':
-                        html += f'<td>{values[i]:10.3f}</td>'
-                    elif kind == 'b':
-                        html += f'<td>{values[i]}</td>'
-                    elif kind == 'O':
-                        v = values[i]
-                        if v is None:
-                            v = 'None'
-                        html += f'<td>{v:10}</td>'
-                    else:
-                        html += f'<td>{values[i]:10}</td>'
-                html += f'</tr>'
-        
-        html += '</tbody></table>'
-        return html
+    def __mul__(self, other):
+        return self._operation('__mul__', other)
 
-    @property
-    def values(self):
+    def __truediv__(self, other):
+        return self._operation('__truediv__', other)
+
+    def __radd__(self, other):
+        return self._operation('__radd__', other)
+
+    def __rsub__(self, other):
+        return self._operation('__rsub__', other)
+
+    def __rmul__(self, other):
+        return self._operation('__rmul__', other)
+
+    def __floordiv__(self, other):
+        return self._operation('__floordiv__', other)
+
+    def __pow__(self, other):
+        return self._operation('__pow__', other)
+
+    def _schemas(self, plan, columns):
         """
-        Returns
-        -------
-        A 2D numpy array of values in the DataTable
+        Column names before each step of the plan, and after the last one
+        """
+        schemas = [columns]
+        for step in plan:
+            kind = step[0]
+            if kind == 'select':
+                for c in step[1]:
+                    if c not in columns:
+                        raise KeyError(c)
+                columns = list(step[1])
+            elif kind == 'drop':
+                columns = [c for c in columns if c not in step[1]]
+            elif kind == 'rename':
+                columns = [step[1].get(c, c) for c in columns]
+            elif kind == 'filter':
+                for c in step[1].columns():
+                    if c not in columns:
+                        raise KeyError(c)
+            elif kind == 'sort':
+                keys = [step[1]] if isinstance(step[1], str) else step[1]
+                for c in keys:
+                    if c not in columns:
+                        raise KeyError(c)
+            schemas.append(columns)
+        return schemas
+
+    def _needed_before(self, step, needed):
         """
-        return np.column_stack(list(self._data.values()))
-
-    @property
-    def dtypes(self):
+        Columns that must exist before a step, given the columns needed after it
+        """
+        kind = step[0]
+        if kind == 'rename':
+            inverse = {new: old for old, new in step[1].items()}
+            return {inverse.get(c, c) for c in needed}
+        if kind == 'filter':
+            return needed | step[1].columns()
+        if kind == 'sort':
+            return needed | ({step[1]} if isinstance(step[1], str) else set(step[1]))
+        return needed
+
+    def _optimize(self):
         """
+        Prunes the columns that the plan does not use
+
         Returns
         -------
-        A two-column DataTable of column names in one columns and
-        their data types in the other
+        The source columns to read and the rewritten plan
         """
-        DTYPE_NAMES = {
-            "O": "string",
-            "i": "integer",
-            "f": "float",
-            "b": "boolean"
-        }
-
-        colnames = np.array(list(self._data.keys()))
-        
-        dtypes_ = np.array([DTYPE_NAMES[v.dtype.kind] for v in self._data.values()])
-
-        return DataTable({
-            'Column Name': colnames,
-            'Data Type': dtypes_
-        })
-
-    def __getitem__(self, index):
+        schemas = self._schemas(self._plan, self._source.columns)
+
+        # Walk the plan backwards to find the columns needed after each step
+        needed = set(schemas[-1])
+        needed_after = []
+        for step in reversed(self._plan):
+            needed_after.append(needed)
+            needed = self._needed_before(step, needed)
+        needed_after.reverse()
+
+        present = [c for c in self._source.columns if c in needed]
+        source_columns = present
+
+        plan = []
+        for step, after in zip(self._plan, needed_after):
+            kind = step[0]
+            if kind == 'select':
+                step = ('select', [c for c in step[1] if c in after])
+                present = step[1]
+            elif kind == 'drop':
+                step = ('drop', [c for c in step[1] if c in present])
+                if not step[1]:
+                    continue
+                present = [c for c in present if c not in step[1]]
+            elif kind == 'rename':
+                present = [step[1].get(c, c) for c in present]
+            plan.append(step)
+
+        return source_columns, plan
+
+    def explain(self):
         """
-        Use the brackets operator to select rows and columns
-        Usage:
-        ------
-        df['col1'] ---> Selects only 'col1'
-        df[['col1', 'col2']] ---> Selects both 'col1' and 'col2'
-        df[boolean] ---> Selects a DataTable that contains a boolean condition
-        df[rs, cs] ---> Row and column selected together
+        Describes the optimized plan, one step per line
 
         Returns:
         --------
-        A subset of the original DataTable based on the indices provided
+        A string
         """
+        source_columns, plan = self._optimize()
+        lines = ['scan ' + ', '.join(source_columns)]
+        pending = False
+        for step in plan:
+            kind = step[0]
+            if kind in ('operation', 'sort') and pending:
+                lines.append('apply mask')
+                pending = False
+            if kind == 'filter':
+                lines.append(f"filter {step[1]!r}" + (' (merged into mask)' if pending else ''))
+                pending = True
+            elif kind == 'operation':
+                lines.append(f"operation {step[1]} {step[2]!r}")
+            elif kind == 'sort':
+                lines.append(f"sort {step[1]} ascending={step[2]}")
+            else:
+                lines.append(f"{kind} {step[1]}")
+        if pending:
+            lines.append('apply mask')
+        return '\n'.join(lines)
 
-        if isinstance(index, str):
-            return DataTable({
-                index: self._data[index]
-            })
-        
-        if isinstance(index, list):
-            return DataTable({
-                col: self._data[col] for col in index
-            })
-
-        if isinstance(index, DataTable):
-            if index.shape[1] != 1:
-                raise ValueError('Index must be a one-column DataTable')
-            
-            a = next(iter(index._data.values()))
-
-            if a.dtype.kind != 'b':
-                raise ValueError('Item must be a one-column Boolean DataTable')
-
-            return DataTable({
-                col: value[a] for col, value in self._data.items()
-            })
-
-        if isinstance(index, tuple):
-            return self._getitem_tuple(index)
-
-        raise TypeError("Wrong data type entered. Pass either a string, tuple, list or DataTable")
+    def collect(self):
+        """
+        Optimizes and runs the plan
 
-    def _getitem_tuple(self, index):
-        if len(index) != 2:
-            raise TypeError("Tuple must have length of exactly 2")
-        
-        row, col = index
+        Returns:
+        --------
+        A DataTable
+        """
+        source_columns, plan = self._optimize()
+        table = self._source[source_columns]
+        mask = None
+
+        for step in plan:
+            kind = step[0]
+            if kind in ('operation', 'sort') and mask is not None:
+                table = table[DataTable({'mask': mask}, copy = False)]
+                mask = None
+
+            if kind == 'select':
+                table = table[step[1]]
+            elif kind == 'drop':
+                table = table.drop(step[1])
+            elif kind == 'rename':
+                table = table.rename(step[1])
+            elif kind == 'filter':
+                result = step[1]._evaluate(table)
+                if next(iter(result._data.values())).dtype.kind != 'b':
+                    raise ValueError("Filter expression must be boolean")
+                result = result._filter_mask()
+                mask = result if mask is None else mask & result
+            elif kind == 'operation':
+                table = getattr(table, step[1])(step[2])
+            elif kind == 'sort':
+                table = table.sort_vals(step[1], step[2], step[3])
+
+        if mask is not None:
+            table = table[DataTable({'mask': mask}, copy = False)]
+        return table
+
+def crosstab(a, b):
+    """
+    Counts the rows for every pair of values of two columns
+
+    Parameters:
+    -----------
+    a: one-column DataTable or array, whose values label the rows
+    b: one-column DataTable or array of the same length, whose values
+        become the columns
+
+    Returns:
+    --------
+    A DataTable holding the values of a (in a column named after a, or
+    'row_0' for an array) followed by one column of counts per value of b
+    """
+    data = {}
+    categories = {}
+    validity = {}
+    for arg, default in ((a, 'row_0'), (b, 'col_0')):
+        if isinstance(arg, DataTable):
+            if arg.shape[1] != 1:
+                raise ValueError("DataTable must be of a single column")
+            source = next(iter(arg._data))
+            values = arg._data[source]
+        elif isinstance(arg, np.ndarray) and arg.ndim == 1:
+            source = None
+            values = arg.astype('object') if arg.dtype.kind == 'U' else arg
+        else:
+            raise TypeError("Arguments must be one-column DataTables or arrays")
+
+        # Only the name of a is kept, b's just has to differ from it
+        name = source if source is not None and not data else default
+        if name in data:
+            name = 'col_1'
+        data[name] = values
+        if source is not None and source in arg._categories:
+            categories[name] = arg._categories[source]
+        if source is not None and source in arg._validity:
+            validity[name] = arg._validity[source]
+
+    rows, cols = data
+    if len(data[rows]) != len(data[cols]):
+        raise ValueError("Arguments must have the same length")
+    table = DataTable._new(data, categories, validity)
+    return table.pivot_table(rows, cols, fill_value = 0)
+
+def concat(tables):
+    """
+    Stacks DataTables with the same columns on top of each other
 
-        if isinstance(row, int):
-            row = [row]
-        elif isinstance(row, DataTable):
-            if row.shape[1] != 1:
-                raise ValueError("Row selection must be of 1 column")
-            row = next(iter(row._data.values()))
-            if row.dtype.kind != 'b':
-                raise TypeError('Row selection must be a boolean DataTable')
-        elif not isinstance(row, (list, slice)):
-            raise TypeError("Row selection is not a list, slice, int or DataTable")
+    Categorical columns that are categorical in every DataTable stay
+    categorical, with the union of the categories. Validity bitmaps are
+    concatenated as well.
 
-        
-        if isinstance(col, int):
-            col = [self.columns[col]]        
-        elif isinstance(col, str):
-            col = [col]
-        elif isinstance(col, list):
-            new_cols = []
-            for c in col:
-                if isinstance(c, int):
-                    new_cols.append(self.columns[c])
-                elif isinstance(c, str):
-                    # Assume c is a string
-                    new_cols.append(c)
-                
-            col = new_cols
-        elif isinstance(col, slice):
-            start = col.start
-            stop = col.stop
-            step = col.step
+    Parameters:
+    -----------
+    tables: list of DataTables
 
-            if isinstance(start, str):
-                start = self.columns.index(start)
+    Returns:
+    --------
+    A DataTable
+    """
+    tables = list(tables)
+    if not tables:
+        raise ValueError("No DataTables to concatenate")
+    for table in tables:
+        if not isinstance(table, DataTable):
+            raise TypeError("Can only concatenate DataTables")
+        if table.columns != tables[0].columns:
+            raise ValueError("DataTables must have the same columns")
+
+    data = {}
+    categories = {}
+    validity = {}
+    for col in tables[0].columns:
+        if all(col in table._categories for table in tables):
+            cats = np.unique(np.concatenate([table._categories[col] for table in tables]))
+            dtype = _codes_dtype(len(cats))
+            codes = []
+            for table in tables:
+                # The last slot keeps missing codes at -1
+                remap = np.append(np.searchsorted(cats, table._categories[col]), -1)
+                codes.append(remap[table._data[col]].astype(dtype))
+            data[col] = np.concatenate(codes)
+            categories[col] = cats
+            continue
+
+        data[col] = np.concatenate([table._column(col) if col in table._categories
+                                    else table._data[col] for table in tables])
+        if any(col in table._validity for table in tables):
+            valid = np.concatenate([
+                table._valid(col) if col in table._validity else
+                np.ones(len(table), dtype = 'bool') for table in tables])
+            packed = _pack_validity(valid)
+            if packed is not None:
+                validity[col] = packed
+
+    return DataTable._new(data, categories, validity)
+
+
+class ChunkedDataTable:
+    """
+    A DataTable stored as a sequence of DataTable chunks, for data larger
+    than memory.
+
+    Chunks are read one at a time, so memory use is bounded by the size of
+    a chunk. Column selections, boolean filters and arithmetic return new
+    ChunkedDataTables that are applied chunk by chunk as the data streams
+    through. Reductions combine the partial results of every chunk, with
+    mean, var and std merged from per-chunk moments (count, mean and sum
+    of squared deviations).
+    """
 
-            if isinstance(stop, str):
-                stop = self.columns.index(stop) + 1
-            
-            col = self.columns[start:stop:step]
+    def __init__(self, chunks):
+        """
+        Parameters:
+        -----------
+        chunks: list or callable
+            A list of DataTables, or a function returning a new iterable of
+            DataTables on every call, e.g.
+            lambda: tisch.read_csv(path, chunksize = 1000000).
+            One-shot iterators are rejected, since every operation makes
+            its own pass over the chunks
+        """
+        if isinstance(chunks, (list, tuple)):
+            for chunk in chunks:
+                if not isinstance(chunk, DataTable):
+                    raise TypeError("Chunks must be DataTables")
+        elif not callable(chunks):
+            raise TypeError("Chunks must be a list of DataTables or a function "
+                            "returning an iterable of DataTables")
+        self._chunks = chunks
+
+    @classmethod
+    def from_csv(cls, path, chunksize = 1000000, **kwargs):
+        """
+        A ChunkedDataTable reading a CSV file, chunksize rows at a time.
+        The other keyword arguments are passed to tisch.read_csv
+        """
+        return cls(lambda: read_csv(path, chunksize = chunksize, **kwargs))
 
-        else:
-            raise TypeError("Column selection must be slice, int, list or str")
+    def __iter__(self):
+        if callable(self._chunks):
+            return iter(self._chunks())
+        return iter(self._chunks)
 
-        data = {}
-        for c in col:
-            data[c] = self._data[c][row]
+    def _map(self, func, other = None):
+        """
+        A ChunkedDataTable applying func to every chunk, along with the
+        matching chunk of other if other is a ChunkedDataTable
+        """
+        if isinstance(other, ChunkedDataTable):
+            return ChunkedDataTable(lambda: map(func, self, other))
+        return ChunkedDataTable(lambda: map(func, self))
 
-        return DataTable(data)
+    @property
+    def columns(self):
+        return next(iter(self)).columns
 
-    def _ipython_key_completions_(self):
-        return self.columns
+    def __len__(self):
+        return sum(len(chunk) for chunk in self)
 
-    def __setitem__(self, key, value):
-        if not isinstance(key, str):
-            raise TypeError("Key must be a string")
-        if isinstance(value, np.ndarray):
-            if value.ndim != 1:
-                raise ValueError("Value must be one-dimensional array")
-            if len(value) != len(self):
-                raise ValueError("Length of array must match DataTable's length")
-        elif isinstance(value, DataTable):
-            if value.shape[1] != 1:
-                raise ValueError("Setting DataTable must be of a single column")
-            if len(value) != len(self):
-                raise ValueError("Setting DataTable must have same length as current DataTable")
-            value = next(iter(value._data.values()))
-        elif isinstance(value, (int, bool, str, float)):
-            value = np.repeat(value, len(self))
-        else:
-            raise TypeError("Value must be either of: DataTable, array, int, bool, str, float")
+    @property
+    def shape(self):
+        length = 0
+        n_cols = 0
+        for chunk in self:
+            length += len(chunk)
+            n_cols = chunk.shape[1]
+        return length, n_cols
 
-        if value.dtype.kind == 'U':
-            value = value.astype('object')
+    def __getitem__(self, index):
+        """
+        Selects columns with a string or a list of strings, or rows with a
+        one-column boolean ChunkedDataTable whose chunks line up with
+        these ones (e.g. chunked['a'] > 0)
+        """
+        if isinstance(index, (str, list)):
+            return self._map(lambda chunk: chunk[index])
+        if isinstance(index, ChunkedDataTable):
+            return self._map(lambda chunk, mask: chunk[mask], index)
+        raise TypeError("Pass a string, a list or a boolean ChunkedDataTable")
 
-        self._data[key] = value
+    def to_table(self):
+        """
+        Reads every chunk into memory as a single DataTable
+        """
+        return concat(self)
 
-    def head(self, n = 10):
+    def sample(self, n, seed = None):
         """
-        Return the first n rows of the DataTable
+        Draws n random rows without replacement, in one pass over the
+        chunks with a ReservoirSampler
 
         Parameters:
         -----------
-        n: int, default = 10
-
-        Returns:
-        --------
-        DataTable
+        n: int
+            Number of rows to return, or all of them if there are fewer
+        seed: int or np.random.Generator
+            Seed for the random number generator, or the generator itself
+        Raises ValueError if there are no chunks
         """
+        sampler = ReservoirSampler(n, seed)
+        for chunk in self:
+            sampler.update(chunk)
+        sample = sampler.result()
+        if sample is not None:
+            return sample
+        raise ValueError("Cannot sample from a ChunkedDataTable without chunks")
 
-        return self[:n, :]
+    def head(self, n = 10):
+        chunks = []
+        remaining = n
+        for chunk in self:
+            if remaining <= 0:
+                break
+            chunks.append(chunk[:remaining, :])
+            remaining -= len(chunks[-1])
+        return concat(chunks)
 
     def tail(self, n = 10):
-        """
-        Return the last n rows of the DataTable
+        chunks = []
+        kept = 0
+        for chunk in self:
+            chunks.append(chunk[max(len(chunk) - n, 0):, :])
+            kept += len(chunks[-1])
+            # Drop the oldest chunks that the newer ones fully replace
+            while len(chunks) > 1 and kept - len(chunks[0]) >= n:
+                kept -= len(chunks.pop(0))
+        table = concat(chunks)
+        return table[max(len(table) - n, 0):, :]
 
-        Parameters:
-        -----------
-        n: int, default = 10
+    def _operation(self, op, other):
+        if isinstance(other, ChunkedDataTable):
+            return self._map(lambda chunk, other_chunk: getattr(chunk, op)(other_chunk), other)
+        return self._map(lambda chunk: getattr(chunk, op)(other))
 
-        Returns:
-        --------
-        DataTable
-        """
+    def __add__(self, other):
+        return self._operation('__add__', other)
 
-        return self[-n:, :]
+    def __sub__(self, other):
+        return self._operation('__sub__', other)
 
-    def _agg(self, func):
-        """
-        Generic Function to aggregate columns based
-        on an aggregation function
+    def __mul__(self, other):
+        return self._operation('__mul__', other)
 
-        Parameters
-        ----------
-        func: The function name of the aggregation function
+    def __truediv__(self, other):
+        return self._operation('__truediv__', other)
 
-        Returns
-        -------
-        DataTable with the aggregation applied
-        """
+    def __radd__(self, other):
+        return self._operation('__radd__', other)
 
-        data = {}
-        for col, value in self._data.items():
-            try:
-                data[col] = np.array([func(value)])
-            except TypeError:
-                pass
+    def __rsub__(self, other):
+        return self._operation('__rsub__', other)
 
-        return DataTable(data)
+    def __rmul__(self, other):
+        return self._operation('__rmul__', other)
 
-    def min(self):
-        return self._agg(np.min)
+    def __floordiv__(self, other):
+        return self._operation('__floordiv__', other)
 
-    def max(self):
-        return self._agg(np.max)
+    def __pow__(self, other):
+        return self._operation('__pow__', other)
 
-    def mean(self):
-        return self._agg(np.mean)
+    def __eq__(self, other):
+        return self._operation('__eq__', other)
 
-    def median(self):
-        return self._agg(np.median)
+    def __ne__(self, other):
+        return self._operation('__ne__', other)
 
-    def sum(self):
-        return self._agg(np.sum)
+    def __lt__(self, other):
+        return self._operation('__lt__', other)
 
-    def var(self):
-        return self._agg(np.var)
+    def __le__(self, other):
+        return self._operation('__le__', other)
 
-    def std(self):
-        return self._agg(np.std)
+    def __gt__(self, other):
+        return self._operation('__gt__', other)
 
-    def all(self):
-        return self._agg(np.all)
+    def __ge__(self, other):
+        return self._operation('__ge__', other)
 
-    def any(self):
-        return self._agg(np.any)
+    def __and__(self, other):
+        return self._operation('__and__', other)
 
-    def argmax(self):
-        return self._agg(np.argmax)
+    def __or__(self, other):
+        return self._operation('__or__', other)
 
-    def argmin(self):
-        return self._agg(np.argmin)
+    def __invert__(self):
+        return self._map(lambda chunk: ~chunk)
 
-    def isna(self):
+    def _reduce(self, method, combine):
         """
-        Finds whether each value in the DataTable is missing or not
-        
-        Returns:
-        --------
-        A DataTable of booleans
+        Runs a DataTable reduction on every chunk, then combines the
+        per-chunk results of each column with combine
         """
-        data = {}
-        for col, val in self._data.items():
-            if val.dtype.kind == 'O':
-                data[col] = val == None
-            else:
-                data[col] = np.isnan(val)
-        
-        return DataTable(data)
+        partials = {}
+        for chunk in self:
+            if len(chunk) == 0:
+                continue
+            result = getattr(chunk, method)()
+            for col in result.columns:
+                partials.setdefault(col, []).append(result._column(col))
 
-    def count(self):
-        """
-        Returns the number of non-missing values for each column
+        return DataTable({col: np.array([combine(np.concatenate(values))])
+                          for col, values in partials.items()}, copy = False)
 
-        Returns:
-        --------
-        A DataTable with the number of non-missing values for each column
-        """
+    def sum(self):
+        return self._reduce('sum', np.sum)
 
-        df = self.isna()
+    def min(self):
+        return self._reduce('min', np.min)
 
-        data = {}
-        row_count = len(df)
-        for col, val in df._data.items():
-            data[col] = np.array([row_count - val.sum()])
-        
-        return DataTable(data)
+    def max(self):
+        return self._reduce('max', np.max)
 
-    def unique(self):
-        """
-        Finds the unique values in each column
+    def any(self):
+        return self._reduce('any', np.any)
 
-        Returns
-        -------
-        A list containing one-column DataTables
+    def all(self):
+        return self._reduce('all', np.all)
+
+    def count(self):
+        return self._reduce('count', np.sum)
+
+    def _moments(self):
+        """
+        Merges the count, mean and sum of squared deviations of every
+        numeric column across chunks, with the pairwise update of Chan et al.
         """
+        moments = {}
+        for chunk in self:
+            for col, val in chunk._data.items():
+                if col in chunk._categories or val.dtype.kind not in 'biuf':
+                    continue
+                if col in chunk._validity:
+                    val = val[chunk._valid(col)]
+                n = len(val)
+                if n == 0:
+                    continue
+                val = val.astype('float64')
+                mean = val.mean()
+                m2 = np.sum((val - mean) ** 2)
+
+                if col not in moments:
+                    moments[col] = (n, mean, m2)
+                    continue
+                n_a, mean_a, m2_a = moments[col]
+                total = n_a + n
+                delta = mean - mean_a
+                moments[col] = (total, mean_a + delta * n / total,
+                                m2_a + m2 + delta ** 2 * n_a * n / total)
+        return moments
 
-        dfs = []
-        for col, val in self._data.items():
-            data = {
-                col: np.array(list(set(val.tolist())))
-            }
-            dfs.append(DataTable(data))
-        
-        if len(dfs) == 1:
-            return dfs[0]
+    def mean(self):
+        return DataTable({col: np.array([mean])
+                          for col, (n, mean, m2) in self._moments().items()},
+                         copy = False)
 
-        return dfs
+    def var(self):
+        return DataTable({col: np.array([m2 / n])
+                          for col, (n, mean, m2) in self._moments().items()},
+                         copy = False)
+
+    def std(self):
+        return DataTable({col: np.array([np.sqrt(m2 / n)])
+                          for col, (n, mean, m2) in self._moments().items()},
+                         copy = False)
 
-    def nunique(self):
+    def nunique(self, dropna = False, approx = False):
         """
-        Finds the number of unique values in each column
+        Finds the number of unique values in each column, merging the unique
+        values of every chunk
+
+        Optional Parameters:
+        --------------------
+        dropna: bool
+            If True, missing values are not counted as a value
+        approx: bool
+            If True, the counts are estimated by merging the HyperLogLog
+            sketches of every chunk, in bounded memory, within about 1%
 
         Returns:
         --------
         A DataTable containing the number of unique values in each column
         """
+        distinct = {}
+        missing = {}
+        for chunk in self:
+            for col, val in chunk._data.items():
+                missing[col] = missing.get(col, False) or chunk._null_count(col) > 0
+                if approx:
+                    chunk._sketch(col, distinct.setdefault(col, HyperLogLog()))
+                    continue
+                uniques, _ = _unique_counts(val, dropna = True, sort = False,
+                                            categories = chunk._categories.get(col),
+                                            valid = chunk._valid(col))
+                if col in distinct:
+                    uniques, _ = _unique_counts(np.concatenate([distinct[col], uniques]),
+                                                dropna = True, sort = False)
+                distinct[col] = uniques
+
+        counts = {col: val.estimate() if approx else len(val) for col, val in distinct.items()}
+        return DataTable({col: np.array([n + (not dropna and missing[col])])
+                          for col, n in counts.items()}, copy = False)
+
+    def quantile(self, q = 0.5):
+        """
+        Estimates quantiles of each numeric column, merging the KLL sketches
+        of every chunk
 
-        data = {}
-        for col, val in self._data.items():
-            data[col] = np.array([len(set(val.tolist()))])
-        
-        return DataTable(data)
+        Parameters:
+        -----------
+        q: float or list of floats between 0 and 1, default = 0.5
+
+        Returns:
+        --------
+        A DataTable with one row per quantile
+        """
+        qs = np.atleast_1d(np.asarray(q, dtype = 'float64'))
+        if qs.ndim != 1 or len(qs) == 0 or ((qs < 0) | (qs > 1) | np.isnan(qs)).any():
+            raise ValueError("Quantiles must be between 0 and 1")
+
+        sketches = {}
+        for chunk in self:
+            for col in chunk.columns:
+                sketch = chunk._sketch(col, KLLSketch())
+                if sketch is not None:
+                    sketches.setdefault(col, KLLSketch()).merge(sketch)
+
+        return DataTable({col: sketch.quantile(qs) for col, sketch in sketches.items()},
+                         copy = False)
 
-    def val_counts(self, normalize = False):
+    def val_counts(self, normalize = False, dropna = False, sort = True):
         """
-        Finds the counts of all unique values for each column in the DataTable
+        Finds the counts of all unique values for each column, merging the
+        counts of every chunk
 
         Optional Parameters:
         --------------------
         normalize: bool
             If True, return the relative frequencies of elements
+        dropna: bool
+            If True, missing values are not counted
+        sort: bool
+            If True (default), sort by descending count
 
         Returns:
         --------
-        A list of DataTables containing all the unique value counts
+        A DataTable of unique values and counts, or a list of them when
+        there are several columns
         """
+        counters = {}
+        kinds = {}
+        for chunk in self:
+            for col in chunk.columns:
+                counts = chunk[col].val_counts(dropna = dropna, sort = False)
+                counter = counters.setdefault(col, {})
+                kinds.setdefault(col, 'O' if col in chunk._categories else
+                                 chunk._data[col].dtype.kind)
+                for value, n in zip(counts._column(col).tolist(),
+                                    counts._data['count'].tolist()):
+                    if _is_missing_scalar(value):
+                        value = None
+                    counter[value] = counter.get(value, 0) + n
+
         dfs = []
-        for col, val in self._data.items():     
-            arr_dict = ArrayCounter(val)
-            uniques, counts = arr_dict.uniques_counts()
-            order = np.argsort(-counts)
-            uniques = uniques[order]
-            counts = counts[order]
+        for col, counter in counters.items():
+            # Like DataTable.val_counts, missing values come last among equal counts
+            missing = counter.pop(None, None)
+            values = list(counter)
+            counts = list(counter.values())
+            if missing is not None:
+                values.append(None)
+                counts.append(missing)
+
+            if kinds[col] in 'iuf' and missing is not None:
+                values = np.array([np.nan if v is None else v for v in values], dtype = 'float64')
+            elif kinds[col] in 'biuf' and missing is None:
+                values = np.array(values)
+            else:
+                values = np.array(values, dtype = 'object')
+            counts = np.array(counts, dtype = 'int64')
 
+            if sort:
+                order = np.argsort(-counts, kind = 'stable')
+                values, counts = values[order], counts[order]
             if normalize:
-                counts = counts / len(self)
-
-            data = {col: uniques, 'count': counts}
-            dfs.append(DataTable(data))
+                counts = counts / counts.sum()
+            dfs.append(DataTable({col: values, 'count': counts}, categorical = False,
+                                 copy = False))
 
         if len(dfs) == 1:
             return dfs[0]
         return dfs
 
-    def rename(self, cols):
-        """
-        Rename columns in DataTable using a dictionary
 
-        Parameters:
-        -----------
-        columns: dict
-            A dict mapping old column names to the new column names
+_CSV_BOOLS = {'True': True, 'False': False, 'true': True, 'false': False,
+              'TRUE': True, 'FALSE': False}
+
+_CSV_DTYPES = {
+    'int': np.dtype('int64'),
+    'integer': np.dtype('int64'),
+    'float': np.dtype('float64'),
+    'bool': np.dtype('bool'),
+    'boolean': np.dtype('bool'),
+    'str': np.dtype('object'),
+    'string': np.dtype('object'),
+    'object': np.dtype('object')
+}
+
+def _csv_dtype(dtype):
+    if isinstance(dtype, str) and dtype in _CSV_DTYPES:
+        return _CSV_DTYPES[dtype]
+    dtype = np.dtype(dtype)
+    if dtype.kind in 'OUS':
+        return np.dtype('object')
+    if dtype.kind not in 'biuf':
+        raise TypeError(f"Unsupported CSV column type {dtype}")
+    return dtype
+
+def _infer_csv_dtype(fields):
+    """
+    Infers the narrowest of int, float, bool and object that can hold a
+    sample of CSV fields. Empty fields are missing values.
+    """
+    present = [f for f in fields if f != '']
+    if not fields:
+        return np.dtype('object')
+    if not present:
+        return np.dtype('float64')
 
-        Returns:
-        --------
-        DataTable with the column name changes
-        """
-        if not isinstance(cols, dict):
-            raise TypeError('Column names must be a dict')
+    if all(f in _CSV_BOOLS for f in present):
+        return np.dtype('bool')
 
-        data = {}
-        for col, val in self._data.items():
-            data[cols.get(col, col)] = val
+    for dtype in ('int64', 'float64'):
+        try:
+            np.array(present, dtype = dtype)
+        except (ValueError, OverflowError):
+            continue
+        return np.dtype(dtype)
 
-        return DataTable(data)
+    return np.dtype('object')
 
-    def drop(self, column):
-        """
-        Drops one or more columns in a DataTable
+def _parse_csv_fields(fields, dtype):
+    """
+    Converts a block of CSV fields to an array of the given dtype.
+    Empty fields of int and bool columns are returned as masked entries
+    of a np.ma.MaskedArray. Raises ValueError if a field cannot be converted.
+    """
+    kind = dtype.kind
+    if kind in 'biu' and '' in fields:
+        valid = np.fromiter((f != '' for f in fields), dtype = 'bool', count = len(fields))
+        values = np.zeros(len(fields), dtype = dtype)
+        values[valid] = _parse_csv_fields([f for f in fields if f != ''], dtype)
+        return np.ma.MaskedArray(values, mask = ~valid)
+
+    if kind == 'O':
+        arr = np.empty(len(fields), dtype = 'object')
+        arr[:] = fields
+        arr[arr == ''] = None
+        return arr
+
+    if kind == 'b':
+        try:
+            return np.fromiter(map(_CSV_BOOLS.__getitem__, fields), dtype = 'bool',
+                               count = len(fields))
+        except KeyError as e:
+            raise ValueError(f"Cannot parse {e} as a boolean")
+
+    try:
+        return np.array(fields, dtype = dtype)
+    except ValueError:
+        if kind != 'f':
+            raise
+    return np.array([f if f != '' else 'nan' for f in fields], dtype = dtype)
+
+class _ColumnBuffer:
+    """
+    A preallocated column array that grows geometrically as blocks of
+    parsed values are appended to it. Masked blocks start a validity
+    array of the same capacity. Float and object columns hold their
+    missing values as NaN and None instead.
+    """
+    def __init__(self, dtype, capacity):
+        self.data = np.empty(capacity, dtype = dtype)
+        self.valid = None
+        self.size = 0
+
+    def append(self, block):
+        needed = self.size + len(block)
+        if needed > len(self.data):
+            capacity = max(needed, 2 * len(self.data))
+            grown = np.empty(capacity, dtype = self.data.dtype)
+            grown[:self.size] = self.data[:self.size]
+            self.data = grown
+            if self.valid is not None:
+                self.valid = np.concatenate([self.valid[:self.size],
+                                             np.ones(capacity - self.size, dtype = 'bool')])
+
+        if isinstance(block, np.ma.MaskedArray):
+            valid = ~np.ma.getmaskarray(block)
+            block = np.ma.getdata(block)
+            if self.data.dtype.kind in 'fO':
+                block = block.astype(self.data.dtype)
+                block[~valid] = np.nan if self.data.dtype.kind == 'f' else None
+            else:
+                if self.valid is None:
+                    self.valid = np.ones(len(self.data), dtype = 'bool')
+                self.valid[self.size:needed] = valid
+        self.data[self.size:needed] = block
+        self.size = needed
+
+    def astype(self, dtype):
+        self.data = self.data.astype(dtype)
+        if self.valid is not None and self.data.dtype.kind in 'fO':
+            self.data[:self.size][~self.valid[:self.size]] = \
+                np.nan if self.data.dtype.kind == 'f' else None
+            self.valid = None
+
+    def finish(self):
+        if self.size < len(self.data):
+            self.data.resize(self.size, refcheck = False)
+        if self.valid is not None:
+            return np.ma.MaskedArray(self.data, mask = ~self.valid[:self.size])
+        return self.data
+
+def _read_csv_blocks(path, dtypes, usecols, sep, sample_size, block_size):
+    """
+    Reads a CSV file in blocks of rows, yielding the column names and the
+    parsed arrays of each block. Only the columns in usecols are converted.
+    """
+    with open(path, newline = '') as f:
+        reader = csv.reader(f, delimiter = sep)
+        try:
+            header = next(reader)
+        except StopIteration:
+            raise ValueError("CSV file is empty")
+
+        if usecols is None:
+            usecols = header
+        for col in usecols:
+            if col not in header:
+                raise KeyError(col)
+        names = [col for col in header if col in usecols]
+        positions = [header.index(col) for col in names]
+        col_dtypes = None
+
+        while True:
+            rows = list(islice(reader, block_size))
+            if not rows and col_dtypes is not None:
+                return
 
-        Parameters
-        ----------
-        columns: str or list of strings
+            try:
+                columns = [[row[i] for row in rows] for i in positions]
+            except IndexError:
+                raise ValueError("A row of the CSV file has fewer fields than the header")
+
+            if col_dtypes is None:
+                col_dtypes = [_csv_dtype(dtypes[col]) if col in dtypes
+                              else _infer_csv_dtype(fields[:sample_size])
+                              for col, fields in zip(names, columns)]
+
+            blocks = []
+            for j, (col, fields) in enumerate(zip(names, columns)):
+                try:
+                    blocks.append(_parse_csv_fields(fields, col_dtypes[j]))
+                except (ValueError, OverflowError):
+                    if col in dtypes:
+                        raise ValueError(f"Column {col} cannot be parsed as {col_dtypes[j]}")
+                    # The sample underestimated the type, so widen the column
+                    col_dtypes[j] = _infer_csv_dtype(fields)
+                    if col_dtypes[j].kind == 'i':
+                        col_dtypes[j] = np.dtype('float64')
+                    blocks.append(_parse_csv_fields(fields, col_dtypes[j]))
+            yield names, blocks
+
+            if not rows:
+                return
+
+def _read_csv_chunks(blocks, chunksize, categorical):
+    buffers = None
+    for names, arrays in blocks:
+        while True:
+            if buffers is None:
+                buffers = [_ColumnBuffer(arr.dtype, chunksize) for arr in arrays]
+
+            room = chunksize - buffers[0].size
+            for buf, arr in zip(buffers, arrays):
+                if buf.data.dtype != arr.dtype:
+                    buf.astype(np.result_type(buf.data.dtype, arr.dtype))
+                buf.append(arr[:room])
+
+            if buffers[0].size < chunksize:
+                break
+            yield DataTable({name: buf.finish() for name, buf in zip(names, buffers)},
+                            categorical = categorical, copy = False)
+            buffers = None
+            arrays = [arr[room:] for arr in arrays]
+            if len(arrays[0]) == 0:
+                break
+
+    if buffers is not None and buffers[0].size > 0:
+        yield DataTable({name: buf.finish() for name, buf in zip(names, buffers)},
+                        categorical = categorical, copy = False)
+
+def read_csv(path, dtypes = None, usecols = None, chunksize = None, sep = ',',
+             sample_size = 1000, categorical = 'auto'):
+    """
+    Reads a CSV file with a header row into a DataTable.
+
+    The file is parsed in blocks of rows, straight into preallocated column
+    arrays that grow as needed, so no full copy of the data is kept in
+    Python lists. Column types are inferred as int, float, bool or string
+    from the first rows of the file, and widened if later rows do not fit.
+    Empty fields are missing values: NaN in float columns, None in string
+    columns, and nulls of the validity bitmap in int and bool columns.
+
+    Parameters:
+    -----------
+    path: str
+        Path of the CSV file
+    dtypes: dict
+        Maps column names to a type ('int', 'float', 'bool', 'str' or a
+        NumPy dtype), which skips type inference for those columns
+    usecols: list
+        Names of the columns to read. Other fields are not converted
+    chunksize: int
+        If given, return a generator of DataTables of at most chunksize
+        rows each, so files larger than memory can be processed
+    sep: str
+        Field delimiter
+    sample_size: int
+        Number of rows used to infer column types
+    categorical: 'auto', bool or list
+        Which string columns to store as categorical columns, as in the
+        DataTable constructor
+
+    Returns:
+    --------
+    A DataTable, or a generator of DataTables if chunksize is given
+    """
+    if dtypes is None:
+        dtypes = {}
+    elif not isinstance(dtypes, dict):
+        raise TypeError("dtypes must be a dict")
+    if usecols is not None and not isinstance(usecols, list):
+        raise TypeError("usecols must be a list")
+
+    if chunksize is not None:
+        if not isinstance(chunksize, int) or chunksize <= 0:
+            raise ValueError("chunksize must be a positive integer")
+        block_size = min(chunksize, 65536)
+        return _read_csv_chunks(
+            _read_csv_blocks(path, dtypes, usecols, sep, sample_size, block_size), chunksize,
+            categorical)
+
+    buffers = None
+    for names, arrays in _read_csv_blocks(path, dtypes, usecols, sep, sample_size, 65536):
+        if buffers is None:
+            buffers = [_ColumnBuffer(arr.dtype, max(len(arr), 1)) for arr in arrays]
+        for buf, arr in zip(buffers, arrays):
+            if buf.data.dtype != arr.dtype:
+                buf.astype(np.result_type(buf.data.dtype, arr.dtype))
+            buf.append(arr)
+
+    return DataTable({name: buf.finish() for name, buf in zip(names, buffers)},
+                     categorical = categorical, copy = False)
+
+
+def _encode_strings(arr, col):
+    """
+    Encodes an object array of strings as UTF-8 data and int64 offsets.
+    None values are stored as empty strings and flagged in a boolean
+    array of nulls, which is None when there are no missing values.
+    """
+    values = arr.tolist()
+    nulls = np.fromiter((v is None for v in values), dtype = 'bool', count = len(values))
+    if nulls.any():
+        values = ['' if v is None else v for v in values]
+    else:
+        nulls = None
+
+    try:
+        encoded = [v.encode('utf-8') for v in values]
+    except AttributeError:
+        raise TypeError(f"Column {col} can only hold strings and None to be saved")
+
+    offsets = np.zeros(len(encoded) + 1, dtype = 'int64')
+    np.cumsum(np.fromiter(map(len, encoded), dtype = 'int64', count = len(encoded)),
+              out = offsets[1:])
+    return [offsets, b''.join(encoded), nulls]
+
+def _decode_strings(offsets, data, nulls):
+    starts, ends = offsets[:-1].tolist(), offsets[1:].tolist()
+    try:
+        # Byte offsets are character offsets when the data is ASCII
+        text = data.decode('ascii')
+        values = list(map(text.__getitem__, map(slice, starts, ends)))
+    except UnicodeDecodeError:
+        values = [data[a:b].decode('utf-8') for a, b in zip(starts, ends)]
+
+    arr = np.empty(len(values), dtype = 'object')
+    arr[:] = values
+    if nulls is not None:
+        arr[nulls] = None
+    return arr
+
+class _DtypeKind(enum.IntEnum):
+    INT = 0
+    UINT = 1
+    FLOAT = 2
+    BOOL = 20
+    STRING = 21
+    DATETIME = 22
+    CATEGORICAL = 23
+
+class _ColumnNullType(enum.IntEnum):
+    NON_NULLABLE = 0
+    USE_NAN = 1
+    USE_SENTINEL = 2
+    USE_BITMASK = 3
+    USE_BYTEMASK = 4
+
+# Arrow C data interface formats of the NumPy types
+_ARROW_FORMATS = {
+    'i1': 'c', 'i2': 's', 'i4': 'i', 'i8': 'l',
+    'u1': 'C', 'u2': 'S', 'u4': 'I', 'u8': 'L',
+    'f4': 'f', 'f8': 'g', 'b1': 'b'
+}
+_DTYPE_KINDS = {'i': _DtypeKind.INT, 'u': _DtypeKind.UINT, 'f': _DtypeKind.FLOAT,
+                'b': _DtypeKind.BOOL}
+
+def _interchange_dtype(dtype):
+    key = dtype.kind + str(dtype.itemsize)
+    if key not in _ARROW_FORMATS:
+        raise NotImplementedError(f"Cannot interchange columns of type {dtype}")
+    return (_DTYPE_KINDS[dtype.kind], dtype.itemsize * 8, _ARROW_FORMATS[key], '=')
+
+
+class _InterchangeBuffer:
+    """
+    A contiguous NumPy array exposed as a buffer of the interchange protocol
+    """
 
-        Returns
-        -------
-        A DataTable with the column dropped
-        """
-        if isinstance(column, str):
-            column = [column]
-        elif not isinstance(column, list):
-            raise TypeError("Columns must be a str or list")
+    def __init__(self, arr):
+        self._arr = np.ascontiguousarray(arr)
 
-        data = {}
-        for col, val in self._data.items():
-            if not col in column:
-                data[col] = val
-        
-        return DataTable(data)
+    @property
+    def bufsize(self):
+        return self._arr.nbytes
 
-    def _non_agg(self, func, **kwargs):
-        """
-        Generic Function to recalculate columns based
-        on a non-aggregation function
+    @property
+    def ptr(self):
+        return self._arr.__array_interface__['data'][0]
 
-        Parameters
-        ----------
-        func: The function name of the non-aggregation function
-        kwargs: Any requisite extra keyword arguments for certain functions
+    def __dlpack__(self):
+        return self._arr.__dlpack__()
 
-        Returns
-        -------
-        DataTable with the non-aggregation applied
-        """
-        data = {}
-        for col, val in self._data.items():
-            if val.dtype.kind == 'O':
-                data[col] = val.copy()
-            else:
-                data[col] = func(val, **kwargs)
+    def __dlpack_device__(self):
+        # kDLCPU, device 0
+        return (1, 0)
 
-        return DataTable(data)
+    def __repr__(self):
+        return f"_InterchangeBuffer(bufsize={self.bufsize}, ptr={self.ptr})"
 
-    def abs(self):
-        """
-        Takes the absolute value of each value in the DataTable
 
-        Returns:
-        --------
-        A DataTable containing the absolute values
-        """
-        return self._non_agg(np.abs)
+class _InterchangeColumn:
+    """
+    One column of a DataTable, seen through the interchange protocol.
+    Missing values are flagged in a byte mask, except for float columns
+    without a validity bitmap, which use NaN.
+    """
 
-    def round(self, n):
-        """
-        Rounds each value in the DataTable to n decimal places
+    def __init__(self, values, categories = None, missing = None, allow_copy = True,
+                 name = None):
+        self._values = values
+        self._name = name
+        self._categories = categories
+        self._missing = missing if missing is not None and missing.any() else None
+        self._allow_copy = allow_copy
+        # pandas reads the categories of a categorical from this attribute
+        self._col = values
+
+    @classmethod
+    def _of(cls, table, col, allow_copy):
+        val = table._data[col]
+        missing = None
+        if col in table._validity or col in table._categories or val.dtype.kind == 'O':
+            missing = table._missing(col)
+        return cls(val, table._categories.get(col), missing, allow_copy, col)
+
+    def size(self):
+        return len(self._values)
 
-        Returns:
-        --------
-        A DataTable containing the rounded values
-        """
-        return self._non_agg(np.round, decimals = n)
+    @property
+    def offset(self):
+        return 0
 
-    def copy(self):
-        """
-        Makes a new copy of the DataTable
+    @property
+    def dtype(self):
+        if self._categories is not None:
+            codes = _interchange_dtype(self._values.dtype)
+            return (_DtypeKind.CATEGORICAL,) + codes[1:]
+        if self._values.dtype.kind == 'O':
+            return (_DtypeKind.STRING, 8, 'U', '=')
+        return _interchange_dtype(self._values.dtype)
 
-        Returns:
-        --------
-        A new copy of the DataTable
-        """
+    @property
+    def describe_categorical(self):
+        if self._categories is None:
+            raise TypeError("The column is not categorical")
+        return {
+            'is_ordered': False,
+            'is_dictionary': True,
+            'categories': _InterchangeColumn(self._categories, allow_copy = self._allow_copy)
+        }
 
-        return self._non_agg(np.copy)
+    @property
+    def describe_null(self):
+        if self._missing is not None:
+            return (_ColumnNullType.USE_BYTEMASK, 0)
+        if self._values.dtype.kind == 'f':
+            return (_ColumnNullType.USE_NAN, None)
+        return (_ColumnNullType.NON_NULLABLE, None)
 
-    def diff(self, n = 1):
-        """
-        Take the difference between the current value and
-        the nth value above it. 
+    @property
+    def null_count(self):
+        if self._missing is not None:
+            return int(np.count_nonzero(self._missing))
+        if self._values.dtype.kind == 'f':
+            return int(np.count_nonzero(np.isnan(self._values)))
+        return 0
 
-        Parameters:
-        -----------
-        n: int
+    @property
+    def metadata(self):
+        return {}
+
+    def num_chunks(self):
+        return 1
+
+    def get_chunks(self, n_chunks = None):
+        yield self
+
+    def _check_copy(self):
+        if not self._allow_copy:
+            raise RuntimeError("Exporting this column requires a copy")
+
+    def get_buffers(self):
+        buffers = {'data': None, 'validity': None, 'offsets': None}
+        if self._values.dtype.kind == 'O':
+            self._check_copy()
+            values = self._values if self._missing is None else \
+                np.where(self._missing, None, self._values)
+            offsets, data, _ = _encode_strings(values, self._name)
+            buffers['data'] = (_InterchangeBuffer(np.frombuffer(data, dtype = 'uint8')),
+                               (_DtypeKind.UINT, 8, 'C', '='))
+            buffers['offsets'] = (_InterchangeBuffer(offsets), (_DtypeKind.INT, 64, 'l', '='))
+        else:
+            buffers['data'] = (_InterchangeBuffer(self._values),
+                               _interchange_dtype(self._values.dtype))
+        if self._missing is not None:
+            self._check_copy()
+            buffers['validity'] = (_InterchangeBuffer(~self._missing),
+                                   (_DtypeKind.BOOL, 8, 'b', '='))
+        return buffers
 
-        Returns:
-        --------
-        A DataTable of values
-        """
-        def func(value):
-            value = value.astype('float')
-            shifted = np.roll(value, n)
-            value = value - shifted
-            value[:n] = np.nan
-            if n >= 0:
-                value[:n] = np.nan
-            else:
-                value[n:] = np.nan
-            return value
 
-        return self._non_agg(func)
+class _InterchangeFrame:
+    """
+    A DataTable seen through the DataFrame interchange protocol
+    """
 
-    def pct_diff(self, n = 1):
-        """
-        Finds the percentage difference between the current
-        value and the nth value above it.
+    def __init__(self, table, allow_copy = True):
+        self._table = table
+        self._allow_copy = allow_copy
 
-        Parameters:
-        -----------
-        n: int
+    def __dataframe__(self, nan_as_null = False, allow_copy = True):
+        return _InterchangeFrame(self._table, allow_copy)
 
-        Returns:
-        --------
-        A DataTable
-        """
-        def func(value):
-            value = value.astype('float')
-            shifted = np.roll(value, n)
-            value = ((value - shifted) / shifted) * 100
-            value[:n] = np.nan
-            if n >= 0:
-                value[:n] = np.nan
-            else:
-                value[n:] = np.nan
-            return value
+    @property
+    def metadata(self):
+        return {}
 
-        return self._non_agg(func)
+    def num_columns(self):
+        return len(self._table.columns)
 
-    def _operation(self, op, other):
-        """
-        Operator function for DataTable operations
+    def num_rows(self):
+        return len(self._table)
 
-        Parameters:
-        -----------
-        op: str of the operator method
-        other: the other operand
+    def num_chunks(self):
+        return 1
 
-        Returns:
-        --------
-        A DataTable
-        """
-        if isinstance(other, DataTable):
-            if other.shape[1] != 1:
-                raise ValueError("DataTable must be of a single column")
-            else:
-                other = next(iter(other._data.values()))
+    def column_names(self):
+        return self._table.columns
 
-        data = {}
-        for col, val in self._data.items():
-            func = getattr(val, op)
-            data[col] = func(other)
+    def get_column(self, i):
+        return self.get_column_by_name(self._table.columns[i])
 
-        return DataTable(data)
+    def get_column_by_name(self, name):
+        return _InterchangeColumn._of(self._table, name, self._allow_copy)
 
-    def __add__(self, other):
-        return self._operation('__add__', other)
+    def get_columns(self):
+        return [self.get_column_by_name(name) for name in self._table.columns]
 
-    def __sub__(self, other):
-        return self._operation('__sub__', other)
+    def select_columns(self, indices):
+        return self.select_columns_by_name([self._table.columns[i] for i in indices])
 
-    def __mul__(self, other):
-        return self._operation('__mul__', other)
+    def select_columns_by_name(self, names):
+        return _InterchangeFrame(self._table[list(names)], self._allow_copy)
 
-    def __truediv__(self, other):
-        return self._operation('__truediv__', other)
+    def get_chunks(self, n_chunks = None):
+        if n_chunks is None or n_chunks <= 1:
+            yield self
+            return
+        size = -(-len(self._table) // n_chunks)
+        for start in range(0, n_chunks * size, size):
+            yield _InterchangeFrame(self._table[start:start + size, :], self._allow_copy)
 
-    def __radd__(self, other):
-        return self._operation('__radd__', other)
 
-    def __rsub__(self, other):
-        return self._operation('__rsub__', other)
+def load(path, mmap = True, columns = None):
+    """
+    Loads a DataTable saved with DataTable.save.
+
+    With mmap = True, numeric columns and categorical codes are np.memmap
+    views of their files: loading only reads the schema and the categories,
+    and the pages of a column are read from disk when the column is used.
+    String columns are decoded when loaded.
+
+    Parameters:
+    -----------
+    path: str
+        Directory the DataTable was saved to
+    mmap: bool
+        If True (default), memory-map numeric columns read-only instead
+        of reading them into memory
+    columns: list
+        Names of the columns to load. All columns are loaded by default
+
+    Returns:
+    --------
+    A DataTable
+    """
+    with open(os.path.join(path, 'schema.json')) as f:
+        schema = json.load(f)
+    if schema.get('format') != 'tisch':
+        raise ValueError(f"{path} is not a saved DataTable")
+
+    entries = {entry['name']: entry for entry in schema['columns']}
+    if columns is None:
+        columns = list(entries)
+    elif not isinstance(columns, list):
+        raise TypeError("columns must be a list")
+
+    length = schema['length']
+    data = {}
+    categories = {}
+    validity = {}
+    for col in columns:
+        if col not in entries:
+            raise KeyError(col)
+        entry = entries[col]
+        stem = os.path.join(path, entry['file'])
+        if entry.get('valid'):
+            validity[col] = np.fromfile(stem + '.valid', dtype = 'uint8')
+
+        if entry['kind'] == 'string':
+            offsets = np.fromfile(stem + '.offsets', dtype = 'int64')
+            with open(stem + '.data', 'rb') as f:
+                raw = f.read()
+            nulls = np.fromfile(stem + '.nulls', dtype = 'bool') if entry.get('nulls') else None
+            data[col] = _decode_strings(offsets, raw, nulls)
+            continue
+
+        if entry['kind'] == 'categorical':
+            offsets = np.fromfile(stem + '.offsets', dtype = 'int64')
+            with open(stem + '.data', 'rb') as f:
+                categories[col] = _decode_strings(offsets, f.read(), None)
+
+        if mmap and length > 0:
+            data[col] = np.memmap(stem + '.bin', dtype = entry['dtype'], mode = 'r',
+                                  shape = (length,))
+        else:
+            data[col] = np.fromfile(stem + '.bin', dtype = entry['dtype'])
 
-    def __rmul__(self, other):
-        return self._operation('__rmul__', other)
+    return DataTable._new(data, categories, validity)
 
-    def __floordiv__(self, other):
-        return self._operation('__floordiv__', other)
 
-    def __pow__(self, other):
-        return self._operation('__pow__', other)
+# Special methods that are profiled along with the public DataTable methods
+_PROFILED_SPECIAL = {
+    '__getitem__', '__setitem__', '_repr_html_',
+    '__add__', '__sub__', '__mul__', '__truediv__', '__radd__', '__rsub__',
+    '__rmul__', '__floordiv__', '__pow__', '__eq__', '__ne__', '__lt__',
+    '__le__', '__gt__', '__ge__', '__and__', '__or__', '__invert__'
+}
 
-    def sort_vals(self, key, ascending = True):
-        """
-        Sort the DataTable by one or more values
+_PROFILE_HOOKS = []
+_PROFILE_STATE = threading.local()
+_UNPROFILED_METHODS = {}
 
-        Parameters:
-        -----------
-        key: str or list
-            Column(s) on the basis of which sorting will be done
-        
-        ascending: bool
-            In which order it will be sorted. True (ascending) by default
+def _shape_of(table):
+    if not table._data:
+        return 0, 0
+    return len(next(iter(table._data.values()))), len(table._data)
 
-        Returns:
-        --------
-        A DataTable sorted by the given key
-        """
+def _profiled(name, method):
+    """
+    Wraps a DataTable method so that every call is timed and reported to
+    the profile hooks
+    """
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        depth = getattr(_PROFILE_STATE, 'depth', 0)
+        inputs = list(self._data.values())
+        rows_in, cols_in = _shape_of(self)
+
+        _PROFILE_STATE.depth = depth + 1
+        start = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            _PROFILE_STATE.depth = depth
+        seconds = time.perf_counter() - start
+
+        record = {'method': name, 'seconds': seconds, 'depth': depth,
+                  'rows_in': rows_in, 'cols_in': cols_in, 'rows_out': None, 'cols_out': None,
+                  'bytes_allocated': 0, 'columns_copied': 0, 'columns_shared': 0}
+        outputs = result if isinstance(result, list) else [self if result is None else result]
+        for table in outputs:
+            if not isinstance(table, DataTable):
+                continue
+            if record['rows_out'] is None:
+                record['rows_out'], record['cols_out'] = _shape_of(table)
+            for arr in table._data.values():
+                if any(arr is a or np.may_share_memory(arr, a) for a in inputs):
+                    record['columns_shared'] += 1
+                else:
+                    record['columns_copied'] += 1
+                    record['bytes_allocated'] += arr.nbytes
 
-        if isinstance(key, str):
-            order = np.argsort(self._data[key])
-        elif isinstance(key, list):
-            key = [self._data[col] for col in key[::-1]]
-            order = np.lexsort(key)
-        else:
-            raise TypeError("Key must be a list or a string")
+        for hook in list(_PROFILE_HOOKS):
+            hook(record)
+        return result
 
-        if not ascending:
-            order = order[::-1]
-        
-        return self[order.tolist(), :]
+    return wrapper
 
-    def sample(self, n = None, fraction = None, replace = False, seed = None):
-        """
-        Return random rows of the DataTable
+def add_profile_hook(hook):
+    """
+    Registers a function called after every public DataTable method call,
+    with a dict describing the call:
+
+    method: the method name
+    seconds: wall time of the call
+    depth: 0 for calls made by the user, 1 or more for calls made by
+        other DataTable methods
+    rows_in, cols_in: shape of the DataTable the method was called on
+    rows_out, cols_out: shape of the DataTable returned, if any
+    bytes_allocated: bytes of the new column arrays returned
+    columns_copied, columns_shared: number of returned columns that are
+        new arrays, and that share memory with the input columns
+
+    DataTable methods are only instrumented while at least one hook is
+    registered, so profiling costs nothing when it is off.
+    """
+    if not callable(hook):
+        raise TypeError("Hook must be callable")
+    if not _PROFILE_HOOKS:
+        for name, attr in list(vars(DataTable).items()):
+            if isinstance(attr, types.FunctionType) and \
+                    (not name.startswith('_') or name in _PROFILED_SPECIAL):
+                _UNPROFILED_METHODS[name] = attr
+                setattr(DataTable, name, _profiled(name, attr))
+    _PROFILE_HOOKS.append(hook)
+
+def remove_profile_hook(hook):
+    """
+    Unregisters a function added with add_profile_hook
+    """
+    _PROFILE_HOOKS.remove(hook)
+    if not _PROFILE_HOOKS:
+        for name, method in _UNPROFILED_METHODS.items():
+            setattr(DataTable, name, method)
+        _UNPROFILED_METHODS.clear()
 
-        Parameters:
-        -----------
-        n: int
-            Exact number of rows to be returned
-        fraction: float
-            A fraction of the total number of rows to be returned
-        replace: bool
-            Whether or not select rows with replacement (can cause duplication)
-        seed: int
-            Seed for the random number generator
-        """
-        if seed:
-            np.random.seed(seed)
 
-        if fraction:
-            if fraction <= 0:
-                raise ValueError("fraction must be positive")
-            n = int(fraction * len(self))
+class Profiler:
+    """
+    Collects the calls of DataTable methods made within tisch.profile()
+    """
 
-        if not isinstance(n, int):
-            raise TypeError("n must be an integer")
-        choices = np.random.choice(range(len(self)), n, replace = replace)
-        return self[choices.tolist(), :]
-        
-            
\ No newline at end of file
+    def __init__(self, nested = False):
+        self.records = []
+        self._nested = nested
+
+    def __call__(self, record):
+        if self._nested or record['depth'] == 0:
+            self.records.append(record)
+
+    def summary(self):
+        """
+        Returns
+        -------
+        A DataTable with one row per method: number of calls, total, mean
+        and max wall time, bytes allocated and columns copied or shared,
+        sorted by total time
+        """
+        methods = {}
+        for record in self.records:
+            methods.setdefault(record['method'], []).append(record)
+
+        names = list(methods)
+        seconds = [np.array([r['seconds'] for r in methods[name]]) for name in names]
+        data = {
+            'method': np.array(names, dtype = 'object'),
+            'calls': np.array([len(methods[name]) for name in names], dtype = 'int64'),
+            'total_seconds': np.array([s.sum() for s in seconds], dtype = 'float64'),
+            'mean_seconds': np.array([s.mean() for s in seconds], dtype = 'float64'),
+            'max_seconds': np.array([s.max() for s in seconds], dtype = 'float64')
+        }
+        for field in ('bytes_allocated', 'columns_copied', 'columns_shared'):
+            data[field] = np.array([sum(r[field] for r in methods[name]) for name in names],
+                                   dtype = 'int64')
+        if not names:
+            return DataTable._new(data)
+        return DataTable(data, categorical = False, copy = False).sort_vals('total_seconds', ascending = False)
+
+    def report(self):
+        """
+        Returns
+        -------
+        The summary as a text table
+        """
+        summary = self.summary()
+        lines = [f"{'method':<16}{'calls':>8}{'total s':>12}{'mean s':>12}"
+                 f"{'MB alloc':>10}{'copied':>8}{'shared':>8}"]
+        for i in range(len(summary._data['method'])):
+            row = {col: val[i] for col, val in summary._data.items()}
+            lines.append(f"{row['method']:<16}{row['calls']:>8}{row['total_seconds']:>12.6f}"
+                         f"{row['mean_seconds']:>12.6f}{row['bytes_allocated'] / 2 ** 20:>10.2f}"
+                         f"{row['columns_copied']:>8}{row['columns_shared']:>8}")
+        return '\n'.join(lines)
+
+@contextmanager
+def profile(nested = False):
+    """
+    Records the DataTable method calls made within a with block
+
+    Parameters:
+    -----------
+    nested: bool
+        If True, calls made by other DataTable methods are recorded too.
+        By default only the calls made directly are recorded
+
+    Usage:
+    ------
+    with tisch.profile() as p:
+        df.sort_vals('a').head()
+    print(p.report())
+    """
+    profiler = Profiler(nested)
+    add_profile_hook(profiler)
+    try:
+        yield profiler
+    finally:
+        remove_profile_hook(profiler)